@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+安卓桥接缓存
+进程内只解析一次 autoclass 类句柄、ContactsContract 的URI、列名和MIME类型，
+之后以普通 Python 常量的形式提供给各个查询函数，避免每行都做反射查询
+"""
+import threading
+from types import SimpleNamespace
+
+try:
+    import android  # noqa: F401
+    from jnius import autoclass
+    IS_ANDROID = True
+except ImportError:
+    autoclass = None
+    IS_ANDROID = False
+
+# 需要缓存的 ContactsContract 常量：命名空间 -> (Java类名, 字段)
+CONTRACT_FIELDS = {
+    "Contacts": ("android.provider.ContactsContract$Contacts", (
+        "CONTENT_URI", "_ID", "LOOKUP_KEY", "DISPLAY_NAME", "PHOTO_URI",
+        "PHOTO_THUMBNAIL_URI", "HAS_PHONE_NUMBER", "CONTACT_LAST_UPDATED_TIMESTAMP",
+    )),
+    "Data": ("android.provider.ContactsContract$Data", (
+        "CONTENT_URI", "_ID", "CONTACT_ID", "MIMETYPE",
+    )),
+    "DeletedContacts": ("android.provider.ContactsContract$DeletedContacts", (
+        "CONTENT_URI", "CONTACT_ID", "CONTACT_DELETED_TIMESTAMP", "DAYS_KEPT_MILLISECONDS",
+    )),
+}
+
+COMMON_DATA_KINDS_FIELDS = {
+    "Phone": ("android.provider.ContactsContract$CommonDataKinds$Phone", (
+        "CONTENT_URI", "CONTENT_ITEM_TYPE", "CONTACT_ID", "NUMBER", "TYPE",
+    )),
+    "Email": ("android.provider.ContactsContract$CommonDataKinds$Email", (
+        "CONTENT_URI", "CONTENT_ITEM_TYPE", "CONTACT_ID", "ADDRESS", "TYPE",
+    )),
+    "StructuredPostal": ("android.provider.ContactsContract$CommonDataKinds$StructuredPostal", (
+        "CONTENT_URI", "CONTENT_ITEM_TYPE", "CONTACT_ID", "STREET", "CITY", "REGION",
+    )),
+    "Organization": ("android.provider.ContactsContract$CommonDataKinds$Organization", (
+        "CONTENT_ITEM_TYPE", "COMPANY",
+    )),
+}
+
+# 应用自带的类，需要在主线程用应用的类加载器解析
+APP_CLASSES = (
+    "org.kivy.android.PythonActivity",
+    "com.example.contacts.CursorPacker",
+    "com.example.contacts.ContactsObserver",
+)
+
+
+class AndroidBridge:
+    """缓存的类句柄与 ContactsContract 常量"""
+
+    def __init__(self, autoclass_func):
+        self._autoclass = autoclass_func
+        self._classes = {}
+        self._lock = threading.RLock()
+        self._contract = None
+        self._content_resolver = None
+
+    def get_class(self, name):
+        """获取（并缓存）Java类句柄"""
+        cls = self._classes.get(name)
+        if cls is None:
+            with self._lock:
+                cls = self._classes.get(name)
+                if cls is None:
+                    cls = self._autoclass(name)
+                    self._classes[name] = cls
+        return cls
+
+    @property
+    def ContactsContract(self):
+        """由普通 Python 值组成的 ContactsContract 镜像"""
+        if self._contract is None:
+            with self._lock:
+                if self._contract is None:
+                    self._contract = self._build_contract()
+        return self._contract
+
+    @property
+    def content_resolver(self):
+        """当前 Activity 的 ContentResolver"""
+        if self._content_resolver is None:
+            with self._lock:
+                if self._content_resolver is None:
+                    PythonActivity = self.get_class("org.kivy.android.PythonActivity")
+                    self._content_resolver = PythonActivity.mActivity.getContentResolver()
+        return self._content_resolver
+
+    def _build_contract(self):
+        """一次性读取所有用到的静态字段"""
+        contract = SimpleNamespace()
+        for name, (class_name, fields) in CONTRACT_FIELDS.items():
+            setattr(contract, name, self._read_fields(class_name, fields))
+
+        kinds = SimpleNamespace()
+        for name, (class_name, fields) in COMMON_DATA_KINDS_FIELDS.items():
+            setattr(kinds, name, self._read_fields(class_name, fields))
+        contract.CommonDataKinds = kinds
+        return contract
+
+    def _read_fields(self, class_name, fields):
+        cls = self.get_class(class_name)
+        return SimpleNamespace(**{field: getattr(cls, field) for field in fields})
+
+    def warm_up(self):
+        """预先解析全部常量
+
+        应用自带的类在调用线程（主线程）解析，框架类在后台线程解析。
+        """
+        for name in APP_CLASSES:
+            try:
+                self.get_class(name)
+            except Exception as e:
+                print(f"加载类失败 {name}: {str(e)}")
+
+        thread = threading.Thread(target=self._warm_up_contract)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _warm_up_contract(self):
+        try:
+            self.ContactsContract
+            self.content_resolver
+        except Exception as e:
+            print(f"预加载通讯录常量失败: {str(e)}")
+        finally:
+            detach_thread()
+
+
+def detach_thread():
+    """后台线程结束前从JVM分离"""
+    if not IS_ANDROID:
+        return
+    try:
+        from jnius import detach
+        detach()
+    except Exception:
+        pass
+
+
+_bridge = None
+_bridge_lock = threading.Lock()
+
+
+def get_bridge():
+    """进程内唯一的桥接对象"""
+    global _bridge
+    if _bridge is None:
+        with _bridge_lock:
+            if _bridge is None:
+                if autoclass is None:
+                    raise RuntimeError("当前环境没有可用的 autoclass")
+                _bridge = AndroidBridge(autoclass)
+    return _bridge
+
+
+def set_autoclass(autoclass_func):
+    """替换 autoclass 实现并清空缓存，用于桌面替身环境"""
+    global _bridge, autoclass
+    with _bridge_lock:
+        autoclass = autoclass_func
+        _bridge = None
+
+
+def has_autoclass():
+    """能否解析 Java 类：安卓环境，或桌面上已安装替身 provider"""
+    return autoclass is not None
+
+
+def warm_up():
+    """启动时预热缓存"""
+    return get_bridge().warm_up()
@@ -21,7 +21,7 @@ source.include_exts = py,png,jpg,kv,atlas
 version = 1.0.0
 
 # 依赖要求 - 只使用最基本的依赖
-requirements = python3,kivy
+requirements = python3,kivy,sqlite3
 
 # 安卓权限 - 不需要特殊权限
 android.permissions = INTERNET
@@ -46,6 +46,9 @@ log_level = 2
 # 调试模式
 android.debuggable = True
 
+# 附带的Java源码（通讯录变更监听等辅助类）
+android.add_src = java
+
 [buildozer]
 # Buildozer版本
 version = 1.5.0
\ No newline at end of file
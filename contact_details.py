@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+联系人详情按需加载
+列表只保存摘要（ID、姓名、第一个号码、公司、缩略图），
+完整的电话、邮箱、地址在查看详情时加载，并放入有容量上限的LRU缓存
+"""
+import threading
+from collections import OrderedDict
+
+from contact_record import Contact
+
+# 详情缓存容量
+DETAIL_CACHE_SIZE = 200
+
+
+def summarize_contact(contact):
+    """把完整联系人（字典或记录）转换为列表摘要记录"""
+    return Contact.from_dict(contact).summary()
+
+
+def is_summary(contact):
+    """是否只是列表摘要"""
+    return "phones" not in contact
+
+
+class LRUCache:
+    """线程安全的LRU缓存"""
+
+    def __init__(self, maxsize=DETAIL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class ContactDetailLoader:
+    """按联系人ID加载完整信息
+
+    fetch_details(ids) 返回完整联系人字典列表，可以一次加载多个联系人。
+    """
+
+    def __init__(self, fetch_details, maxsize=DETAIL_CACHE_SIZE):
+        self.fetch_details = fetch_details
+        self.cache = LRUCache(maxsize)
+
+    def get(self, contact_id):
+        """获取完整信息，未缓存时立即加载"""
+        detail = self.cache.get(contact_id)
+        if detail is None:
+            loaded = self.load([contact_id])
+            detail = loaded.get(contact_id)
+        return detail
+
+    def peek(self, contact_id):
+        """只查缓存，不触发加载"""
+        return self.cache.get(contact_id)
+
+    def load(self, contact_ids):
+        """批量加载并放入缓存，返回 {ID: 详情}"""
+        missing = [contact_id for contact_id in contact_ids if contact_id not in self.cache]
+        loaded = {}
+        if missing:
+            try:
+                for detail in self.fetch_details(missing):
+                    self.cache.put(detail["id"], detail)
+                    loaded[detail["id"]] = detail
+            except Exception as e:
+                print(f"加载联系人详情失败: {str(e)}")
+
+        for contact_id in contact_ids:
+            if contact_id not in loaded:
+                detail = self.cache.get(contact_id)
+                if detail is not None:
+                    loaded[contact_id] = detail
+        return loaded
+
+    def invalidate(self, contact_ids=None):
+        """联系人变化后使缓存失效，不传ID时全部清空"""
+        if contact_ids is None:
+            self.cache.clear()
+            return
+        for contact_id in contact_ids:
+            self.cache.discard(contact_id)
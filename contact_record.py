@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑的联系人记录
+用 __slots__ 对象代替每个联系人一个字典：电话和邮箱打包为元组，类型标签和公司名驻留，
+“有电话/邮箱/地址”合并为一个整数标志位；保留字典式的读取接口，
+contact["name"]、contact.get("company", "") 等原有写法不需要修改
+"""
+import sys
+
+# 标志位
+HAS_PHONE = 1
+HAS_EMAIL = 2
+HAS_ADDRESS = 4
+
+FLAG_KEYS = {
+    "has_phone": HAS_PHONE,
+    "has_email": HAS_EMAIL,
+    "has_address": HAS_ADDRESS,
+}
+
+_ATTR_KEYS = ("id", "lookup_key", "name", "phone", "company", "photo_uri")
+
+# 与原来的字典格式保持相同的键顺序
+SUMMARY_KEYS = ("id", "lookup_key", "name", "phone", "company", "photo_uri",
+                "has_phone", "has_email", "has_address")
+DETAIL_KEYS = ("id", "lookup_key", "name", "phone", "phones", "emails", "addresses",
+               "company", "photo_uri", "avatar")
+
+_intern = sys.intern
+
+
+class Contact:
+    """联系人记录
+
+    phones 为 ((号码, 类型), ...)，emails 为 ((地址, 类型), ...)，addresses 为地址元组；
+    只有摘要时三者为 None。
+    """
+
+    __slots__ = ("id", "lookup_key", "name", "phone", "company", "photo_uri", "flags",
+                 "phones", "emails", "addresses")
+
+    def __init__(self, id, name, phone="", company="", photo_uri="", flags=0,
+                 phones=None, emails=None, addresses=None, lookup_key=""):
+        self.id = id
+        self.lookup_key = lookup_key
+        self.name = name
+        self.phone = phone
+        self.company = _intern(company) if company else ""
+        self.photo_uri = photo_uri
+        self.flags = flags
+        self.phones = phones
+        self.emails = emails
+        self.addresses = addresses
+
+    @classmethod
+    def from_dict(cls, data):
+        """由摘要或完整联系人字典创建记录"""
+        if isinstance(data, Contact):
+            return data
+
+        phones = data.get("phones")
+        if phones is None:
+            flags = 0
+            for key, bit in FLAG_KEYS.items():
+                if data.get(key):
+                    flags |= bit
+            return cls(
+                str(data["id"]), data.get("name", ""), data.get("phone", "") or "",
+                data.get("company", "") or "", data.get("photo_uri", "") or "", flags,
+                lookup_key=data.get("lookup_key", "") or ""
+            )
+
+        phones = tuple((phone["number"], _intern(phone["type"])) for phone in phones)
+        emails = tuple((email["address"], _intern(email["type"])) for email in data.get("emails") or ())
+        addresses = tuple(data.get("addresses") or ())
+        flags = ((HAS_PHONE if phones else 0)
+                 | (HAS_EMAIL if emails else 0)
+                 | (HAS_ADDRESS if addresses else 0))
+        phone = data.get("phone", "") or (phones[0][0] if phones else "")
+        return cls(
+            str(data["id"]), data.get("name", ""), phone or "",
+            data.get("company", "") or "", data.get("photo_uri", "") or "", flags,
+            phones, emails, addresses, data.get("lookup_key", "") or ""
+        )
+
+    @property
+    def is_summary(self):
+        return self.phones is None
+
+    def summary(self):
+        """只保留列表字段的记录"""
+        if self.phones is None:
+            return self
+        return Contact(self.id, self.name, self.phone, self.company, self.photo_uri, self.flags,
+                       lookup_key=self.lookup_key)
+
+    # ---- 字典式接口 ----
+
+    def __getitem__(self, key):
+        if key in _ATTR_KEYS:
+            return getattr(self, key)
+        bit = FLAG_KEYS.get(key)
+        if bit is not None:
+            return bool(self.flags & bit)
+        if self.phones is not None:
+            if key == "phones":
+                return [{"number": number, "type": label} for number, label in self.phones]
+            if key == "emails":
+                return [{"address": address, "type": label} for address, label in self.emails]
+            if key == "addresses":
+                return list(self.addresses)
+            if key == "avatar":
+                return None
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def keys(self):
+        return SUMMARY_KEYS if self.phones is None else DETAIL_KEYS
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """转换为原来的字典格式，用于JSON快照和导出"""
+        return {key: self[key] for key in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, Contact):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Contact({self.to_dict()!r})"
+
+
+def as_dict(contact):
+    """记录或字典统一转换为字典"""
+    if isinstance(contact, Contact):
+        return contact.to_dict()
+    return contact
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+二进制联系人快照
+文件结构（小端）：
+    文件头      魔数 "CSN1"、版本、记录数、字符串数、上次同步时间、两张偏移表的位置
+    记录偏移表  每条记录一个 u32 偏移
+    记录区      种类、标志位和若干字符串编号；完整记录另有电话/邮箱/地址数量和编号
+    字符串偏移表 每个字符串一个 u32 偏移
+    字符串池    u32 长度前缀 + UTF-8 字节，相同字符串只存一次
+读取时用 mmap 映射整个文件，只在访问某条记录时解码该记录，打开文件只触及用到的页
+"""
+import os
+import sys
+import mmap
+import struct
+
+from contact_record import Contact
+
+MAGIC = b"CSN1"
+VERSION = 1
+
+KIND_SUMMARY = 0
+KIND_FULL = 1
+
+_HEADER = struct.Struct("<4sHHIIqII")
+_U32 = struct.Struct("<I")
+_RECORD = struct.Struct("<BB6I")
+_COUNTS = struct.Struct("<HHH")
+_PAIR = struct.Struct("<II")
+
+_intern = sys.intern
+
+
+class _StringPool:
+    """写入时的字符串去重表"""
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, text):
+        text = text or ""
+        number = self.index.get(text)
+        if number is None:
+            number = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return number
+
+
+def encode_snapshot(contacts, last_sync=0):
+    """把联系人记录（或字典）编码为快照字节串"""
+    pool = _StringPool()
+    add = pool.add
+    records = []
+    for contact in contacts:
+        contact = Contact.from_dict(contact)
+        full = contact.phones is not None
+        parts = [_RECORD.pack(
+            KIND_FULL if full else KIND_SUMMARY, contact.flags,
+            add(contact.id), add(contact.lookup_key), add(contact.name),
+            add(contact.phone), add(contact.company), add(contact.photo_uri)
+        )]
+        if full:
+            parts.append(_COUNTS.pack(len(contact.phones), len(contact.emails), len(contact.addresses)))
+            for number, label in contact.phones:
+                parts.append(_PAIR.pack(add(number), add(label)))
+            for address, label in contact.emails:
+                parts.append(_PAIR.pack(add(address), add(label)))
+            for address in contact.addresses:
+                parts.append(_U32.pack(add(address)))
+        records.append(b"".join(parts))
+
+    count = len(records)
+    record_table = _HEADER.size
+    offset = record_table + 4 * count
+    record_offsets = []
+    for record in records:
+        record_offsets.append(offset)
+        offset += len(record)
+
+    string_table = offset
+    offset += 4 * len(pool.strings)
+    string_offsets = []
+    encoded = []
+    for text in pool.strings:
+        data = text.encode("utf-8")
+        string_offsets.append(offset)
+        encoded.append(_U32.pack(len(data)) + data)
+        offset += 4 + len(data)
+
+    return b"".join([
+        _HEADER.pack(MAGIC, VERSION, 0, count, len(pool.strings), last_sync, record_table, string_table),
+        struct.pack(f"<{count}I", *record_offsets),
+        b"".join(records),
+        struct.pack(f"<{len(string_offsets)}I", *string_offsets),
+        b"".join(encoded),
+    ])
+
+
+def write_snapshot(path, contacts, last_sync=0):
+    """写入快照文件，先写临时文件再替换"""
+    data = encode_snapshot(contacts, last_sync)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ContactSnapshot:
+    """映射到内存的只读快照，按下标访问时才解码记录"""
+
+    def __init__(self, path):
+        self.path = path
+        self._view = None
+        self._map = None
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._file.close()
+            raise ValueError("快照文件为空")
+        self._view = memoryview(self._map)
+
+        if len(self._view) < _HEADER.size:
+            self.close()
+            raise ValueError("快照文件不完整")
+        (magic, version, _, self._count, self._string_count,
+         self.last_sync, self._record_table, self._string_table) = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("快照文件格式错误")
+
+        self._labels = {}
+        self._pool = None
+
+    def __len__(self):
+        return self._count
+
+    def _string(self, number):
+        view = self._view
+        offset = _U32.unpack_from(view, self._string_table + 4 * number)[0]
+        length = _U32.unpack_from(view, offset)[0]
+        return str(view[offset + 4:offset + 4 + length], "utf-8")
+
+    def _label(self, number):
+        """类型标签种类很少，解码一次后缓存"""
+        text = self._labels.get(number)
+        if text is None:
+            text = self._labels[number] = _intern(self._string(number))
+        return text
+
+    def _decode_pool(self):
+        """一次解码整个字符串池，顺序读取全部记录时使用"""
+        if self._pool is None:
+            view = self._view
+            offsets = struct.unpack_from(f"<{self._string_count}I", view, self._string_table)
+            ends = offsets[1:] + (len(view),)
+            self._pool = [str(view[start + 4:end], "utf-8") for start, end in zip(offsets, ends)]
+        return self._pool
+
+    def record(self, index, string=None):
+        """解码第 index 条记录"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        view = self._view
+        offset = _U32.unpack_from(view, self._record_table + 4 * index)[0]
+        kind, flags, id_ref, lookup_ref, name_ref, phone_ref, company_ref, photo_ref = \
+            _RECORD.unpack_from(view, offset)
+        if string is None:
+            string = self._string
+        contact = Contact(
+            string(id_ref), string(name_ref), string(phone_ref), string(company_ref),
+            string(photo_ref), flags, lookup_key=string(lookup_ref)
+        )
+        if kind != KIND_FULL:
+            return contact
+
+        offset += _RECORD.size
+        phone_count, email_count, address_count = _COUNTS.unpack_from(view, offset)
+        offset += _COUNTS.size
+        label = self._label
+        phones = []
+        for _ in range(phone_count):
+            number_ref, label_ref = _PAIR.unpack_from(view, offset)
+            phones.append((string(number_ref), label(label_ref)))
+            offset += _PAIR.size
+        emails = []
+        for _ in range(email_count):
+            address_ref, label_ref = _PAIR.unpack_from(view, offset)
+            emails.append((string(address_ref), label(label_ref)))
+            offset += _PAIR.size
+        addresses = []
+        for _ in range(address_count):
+            addresses.append(string(_U32.unpack_from(view, offset)[0]))
+            offset += 4
+
+        contact.phones = tuple(phones)
+        contact.emails = tuple(emails)
+        contact.addresses = tuple(addresses)
+        return contact
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        return self.record(index)
+
+    def __iter__(self):
+        string = self._decode_pool().__getitem__
+        for index in range(self._count):
+            yield self.record(index, string)
+
+    def close(self):
+        """释放映射；已解码的记录不受影响"""
+        self._pool = None
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def read_snapshot(path):
+    """读取整个快照，返回 (联系人记录列表, 上次同步时间)"""
+    with ContactSnapshot(path) as snapshot:
+        return list(snapshot), snapshot.last_sync
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+列式联系人存储
+把联系人列表拆成平行的列（ID、姓名、主号码、标志位），多值字段用偏移数组加扁平值列表保存；
+按类型筛选、计数在整列上一次完成。安装了 NumPy 时使用 NumPy 数组，否则使用 array 模块。
+筛选条件和搜索结果都可以表示为位图（Python 整数，第 i 位对应第 i 行），用 & 和 | 组合后再取回记录
+"""
+from array import array
+from collections import Counter
+from itertools import compress
+
+from contact_record import Contact, FLAG_KEYS
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+
+# 二进制字符串的 "0"/"1" 换成 0/1 字节，供 compress 按位挑选
+_BIT_VALUES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def bitmap_from_indices(indices, size):
+    """行下标转为位图"""
+    bits = bytearray((size + 7) // 8)
+    for index in indices:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitmap_indices(bitmap, use_numpy=HAS_NUMPY):
+    """位图中为 1 的行下标，从小到大"""
+    if not bitmap:
+        return []
+    if use_numpy and HAS_NUMPY:
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits).tolist()
+    # 低位在前的 0/1 字节串，逐位挑选全部在 C 层完成
+    bits = format(bitmap, "b")[::-1].encode("ascii").translate(_BIT_VALUES)
+    return list(compress(range(len(bits)), bits))
+
+
+def normalize_digits(number):
+    """只保留号码中的数字"""
+    if not number:
+        return ""
+    return "".join(ch for ch in number if ch.isdigit())
+
+
+class ContactColumns:
+    """联系人列表的列式视图
+
+    records 保存原始记录的引用，筛选结果按下标取回记录。
+    """
+
+    def __init__(self, contacts, use_numpy=HAS_NUMPY):
+        self.use_numpy = use_numpy and HAS_NUMPY
+        self.records = list(contacts)
+
+        ids = []
+        names = []
+        phones = []
+        flags = array('B')
+        phone_offsets = array('I', [0])
+        phone_values = []
+
+        for contact in self.records:
+            contact = Contact.from_dict(contact)
+            ids.append(contact.id)
+            names.append(contact.name)
+            phones.append(normalize_digits(contact.phone))
+            flags.append(contact.flags)
+
+            # 完整记录保存全部号码，摘要只有主号码
+            if contact.phones is not None:
+                phone_values.extend(normalize_digits(number) for number, _ in contact.phones)
+            elif contact.phone:
+                phone_values.append(phones[-1])
+            phone_offsets.append(len(phone_values))
+
+        self.ids = ids
+        self.names = names
+        self.phones = phones
+        self.phone_offsets = phone_offsets
+        self.phone_values = phone_values
+        self.flags = np.frombuffer(flags, dtype=np.uint8) if self.use_numpy else flags
+        self._id_index = None
+        self._bitmaps = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    # ---- 下标运算 ----
+
+    def flag_indices(self, bit):
+        """标志位包含 bit 的行下标"""
+        if self.use_numpy:
+            return np.flatnonzero(self.flags & bit).tolist()
+        return list(compress(range(len(self.flags)), [flag & bit for flag in self.flags]))
+
+    def _rows(self, contact_ids):
+        """ID 对应的行下标，不排序"""
+        if self._id_index is None:
+            self._id_index = {contact_id: index for index, contact_id in enumerate(self.ids)}
+        index = self._id_index
+        return [index[contact_id] for contact_id in contact_ids if contact_id in index]
+
+    def row_of(self, contact_id):
+        """联系人所在的行，不在列表中时返回 None"""
+        rows = self._rows([contact_id])
+        return rows[0] if rows else None
+
+    def take(self, indices):
+        """按下标取回记录"""
+        records = self.records
+        return [records[i] for i in indices]
+
+    # ---- 位图 ----
+
+    @property
+    def all_bitmap(self):
+        """全部行"""
+        return (1 << len(self.records)) - 1
+
+    def bitmap(self, key):
+        """条件的位图；标志位条件首次使用时由标志位列算出，其他条件需先 set_bitmap"""
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self._bitmaps[key] = bitmap_from_indices(
+                self.flag_indices(FLAG_KEYS[key]), len(self.records)
+            )
+        return bitmap
+
+    def has_bitmap(self, key):
+        return key in self._bitmaps or key in FLAG_KEYS
+
+    def set_bitmap(self, key, bitmap):
+        self._bitmaps[key] = bitmap
+
+    def set_row_bit(self, key, row, value):
+        """修改某一行在条件位图中的值"""
+        if value:
+            self._bitmaps[key] = self.bitmap(key) | (1 << row)
+        else:
+            self._bitmaps[key] = self.bitmap(key) & ~(1 << row)
+
+    def bitmap_where(self, predicate):
+        """满足 predicate(记录) 的行的位图，需要逐条检查记录，结果应通过 set_bitmap 保存"""
+        return bitmap_from_indices(
+            [index for index, record in enumerate(self.records) if predicate(record)], len(self.records)
+        )
+
+    def ids_bitmap(self, contact_ids):
+        """ID 集合的位图"""
+        return bitmap_from_indices(self._rows(contact_ids), len(self.records))
+
+    def combine(self, keys, any_of=False):
+        """多个条件的组合：any_of 为假时全部满足，为真时满足任一；没有条件时为全部行"""
+        if not keys:
+            return self.all_bitmap
+        bitmaps = [self.bitmap(key) for key in keys]
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result | bitmap if any_of else result & bitmap
+        return result
+
+    def take_bitmap(self, bitmap):
+        """按位图取回记录，按原顺序"""
+        return self.take(bitmap_indices(bitmap, self.use_numpy))
+
+    # ---- 常用操作 ----
+
+    def count_flags(self):
+        """各标志位的联系人数量"""
+        if self.use_numpy:
+            return {key: int(np.count_nonzero(self.flags & bit)) for key, bit in FLAG_KEYS.items()}
+        # 标志位组合只有8种，先按取值计数再按位汇总
+        by_value = Counter(self.flags)
+        return {
+            key: sum(count for value, count in by_value.items() if value & bit)
+            for key, bit in FLAG_KEYS.items()
+        }
+
+    def phone_numbers(self, index):
+        """第 index 行的全部号码（只含数字）"""
+        return self.phone_values[self.phone_offsets[index]:self.phone_offsets[index + 1]]
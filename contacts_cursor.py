@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+游标读取层
+每个查询声明所需的列（投影），列索引每个游标只解析一次，按行返回带类型的元组
+"""
+from collections import namedtuple
+
+# 列类型
+STRING = "string"
+INT = "int"
+LONG = "long"
+
+_GETTERS = {
+    STRING: "getString",
+    INT: "getInt",
+    LONG: "getLong",
+}
+
+
+class Projection:
+    """查询投影声明
+
+    fields 为 (字段名, 列名, 类型) 三元组，字段名用于生成行元组，
+    列名是传给 provider 的真实列名，多个字段可以共用同一列。
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self.names = tuple(name for name, _, _ in fields)
+        self.Row = namedtuple("Row", self.names)
+
+        # 去重后的投影列，保持声明顺序
+        columns = []
+        for _, column, kind in fields:
+            if kind not in _GETTERS:
+                raise ValueError(f"未知的列类型: {kind}")
+            if column not in columns:
+                columns.append(column)
+        self.columns = columns
+
+
+class CursorReader:
+    """按投影读取游标"""
+
+    def __init__(self, cursor, projection):
+        self.cursor = cursor
+        self.projection = projection
+
+        # 每个游标只解析一次列索引，并缓存绑定的取值方法
+        self.index = {}
+        self._readers = []
+        for name, column, kind in projection.fields:
+            column_index = cursor.getColumnIndex(column)
+            self.index[name] = column_index
+            self._readers.append((getattr(cursor, _GETTERS[kind]), column_index))
+        self._by_name = dict(zip(projection.names, self._readers))
+        self._move_to_next = cursor.moveToNext
+
+    def __iter__(self):
+        return self.rows()
+
+    def rows(self):
+        """逐行生成带类型的行元组"""
+        Row = self.projection.Row
+        readers = self._readers
+        move_to_next = self._move_to_next
+        while move_to_next():
+            yield Row(*[read(i) if i >= 0 else None for read, i in readers])
+
+    def move_to_next(self):
+        """移动到下一行，配合 get() 只读取需要的列"""
+        return self._move_to_next()
+
+    def get(self, name):
+        """读取当前行的单个字段"""
+        read, column_index = self._by_name[name]
+        if column_index < 0:
+            return None
+        return read(column_index)
+
+    def close(self):
+        """关闭游标"""
+        self.cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def query(content_resolver, uri, projection, selection=None, selection_args=None, sort_order=None):
+    """带投影的 provider 查询，游标为空时返回 None"""
+    cursor = content_resolver.query(
+        uri, projection.columns, selection, selection_args, sort_order
+    )
+    if not cursor:
+        return None
+    return CursorReader(cursor, projection)
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+联系人批量提取引擎
+只查询一次 ContactsContract.Data（电话、邮箱、地址、公司四种MIME类型），
+按 CONTACT_ID 与联系人游标做一次流式归并，生成界面使用的联系人字典；
+列表用的摘要分别查询电话和公司，每个联系人只读取第一行的 DATA1，
+有无邮箱和地址在筛选时由 data_flag_ids 另行查询
+"""
+import heapq
+from operator import itemgetter
+
+from contacts_cursor import Projection, query, STRING, INT, LONG
+from contacts_native import query_packed
+from contact_record import Contact
+
+# 分页加载的页大小，首页较小以便尽快显示第一屏
+PAGE_SIZE = 200
+FIRST_PAGE_SIZE = 50
+
+# 电话类型标签
+PHONE_TYPE_LABELS = {
+    1: "住宅",
+    2: "手机",
+    3: "工作",
+    4: "工作传真",
+    5: "住宅传真",
+    6: "寻呼机",
+    7: "其他",
+    0: "自定义"
+}
+
+# 邮箱类型标签
+EMAIL_TYPE_LABELS = {
+    1: "住宅",
+    2: "工作",
+    3: "其他",
+    4: "手机",
+    0: "自定义"
+}
+
+
+def get_phone_type_label(phone_type):
+    """获取电话类型标签"""
+    return PHONE_TYPE_LABELS.get(phone_type, "其他")
+
+
+def get_email_type_label(email_type):
+    """获取邮箱类型标签"""
+    return EMAIL_TYPE_LABELS.get(email_type, "其他")
+
+
+class BulkContactExtractor:
+    """批量联系人提取器
+
+    联系人游标按 _ID 升序、Data 游标按 CONTACT_ID 升序读取，
+    两个游标同步前进，整个通讯录只需要两次 provider 查询。
+    """
+
+    def __init__(self, content_resolver, ContactsContract, packer=None, summary=False):
+        self.content_resolver = content_resolver
+        self.ContactsContract = ContactsContract
+        # 提供 CursorPacker 时按页打包读取，不再逐个单元格跨越JNI
+        self.packer = packer
+        # 摘要模式只生成列表需要的字段，完整信息在查看详情时再加载
+        self.summary = summary
+
+        Contacts = ContactsContract.Contacts
+        Data = ContactsContract.Data
+        kinds = ContactsContract.CommonDataKinds
+        self.phone_mime = kinds.Phone.CONTENT_ITEM_TYPE
+        self.email_mime = kinds.Email.CONTENT_ITEM_TYPE
+        self.postal_mime = kinds.StructuredPostal.CONTENT_ITEM_TYPE
+        self.org_mime = kinds.Organization.CONTENT_ITEM_TYPE
+
+        self.contacts_projection = Projection(
+            ("id", Contacts._ID, LONG),
+            ("name", Contacts.DISPLAY_NAME, STRING),
+            ("lookup_key", Contacts.LOOKUP_KEY, STRING),
+            ("photo_uri", Contacts.PHOTO_THUMBNAIL_URI if summary else Contacts.PHOTO_URI, STRING),
+        )
+        # 电话号码、邮箱地址、公司名都存放在 DATA1，投影中只出现一次
+        self.data_projection = Projection(
+            ("contact_id", Data.CONTACT_ID, LONG),
+            ("mimetype", Data.MIMETYPE, STRING),
+            ("number", kinds.Phone.NUMBER, STRING),
+            ("phone_type", kinds.Phone.TYPE, INT),
+            ("email", kinds.Email.ADDRESS, STRING),
+            ("email_type", kinds.Email.TYPE, INT),
+            ("street", kinds.StructuredPostal.STREET, STRING),
+            ("city", kinds.StructuredPostal.CITY, STRING),
+            ("region", kinds.StructuredPostal.REGION, STRING),
+            ("company", kinds.Organization.COMPANY, STRING),
+        )
+        # 摘要只需要第一个号码和公司名，两者都在 DATA1
+        self.summary_projection = Projection(
+            ("contact_id", Data.CONTACT_ID, LONG),
+            ("data1", kinds.Phone.NUMBER, STRING),
+        )
+        self.flag_projection = Projection(
+            ("contact_id", Data.CONTACT_ID, LONG),
+            ("mimetype", Data.MIMETYPE, STRING),
+            ("street", kinds.StructuredPostal.STREET, STRING),
+            ("city", kinds.StructuredPostal.CITY, STRING),
+            ("region", kinds.StructuredPostal.REGION, STRING),
+        )
+
+    def extract_all(self):
+        """提取全部联系人"""
+        return list(self.iter_contacts())
+
+    def extract_ids(self, contact_ids):
+        """只提取指定ID的联系人，用于增量同步和加载详情"""
+        if not contact_ids:
+            return []
+        return list(self.iter_contacts(contact_ids))
+
+    def data_flag_ids(self):
+        """有邮箱和有地址的联系人ID，返回 {"has_email": 集合, "has_address": 集合}
+
+        摘要不读取邮箱和地址行，第一次按这两个条件筛选或计数时调用；只读取ID和地址列。
+        """
+        Data = self.ContactsContract.Data
+        result = {"has_email": set(), "has_address": set()}
+        reader = self._query(
+            Data.CONTENT_URI, self.flag_projection,
+            Data.MIMETYPE + " IN (?, ?)", [self.email_mime, self.postal_mime]
+        )
+        if not reader:
+            return result
+        with reader:
+            for row in reader.rows():
+                if row.mimetype == self.email_mime:
+                    result["has_email"].add(str(row.contact_id))
+                elif " ".join(value or "" for value in (row.street, row.city, row.region)).strip():
+                    result["has_address"].add(str(row.contact_id))
+        return result
+
+    def iter_pages(self, page_size=PAGE_SIZE, first_page_size=FIRST_PAGE_SIZE):
+        """按页生成联系人列表，每读完一页立即交给调用方"""
+        page = []
+        limit = first_page_size or page_size
+        for contact in self.iter_contacts():
+            page.append(contact)
+            if len(page) >= limit:
+                yield page
+                page = []
+                limit = page_size
+        if page:
+            yield page
+
+    def iter_contacts(self, contact_ids=None):
+        """逐个生成联系人字典，contact_ids 不为空时只读取这些联系人"""
+        contacts_reader = self._query_contacts(contact_ids)
+        if not contacts_reader:
+            return
+
+        if self.summary:
+            mime_types = (self.phone_mime, self.org_mime)
+            data_readers = [self._query_data(contact_ids, mime_type) for mime_type in mime_types]
+        else:
+            data_readers = [self._query_data(contact_ids)]
+        try:
+            if self.summary:
+                # 两个游标都按 CONTACT_ID 升序，归并成一个数据行序列
+                data_rows = heapq.merge(
+                    *[self._iter_first_values(reader, mime_type)
+                      for reader, mime_type in zip(data_readers, mime_types)],
+                    key=itemgetter(0)
+                )
+                new_contact = self._new_summary
+                apply_data_row = self._apply_summary_row
+            else:
+                data_rows = self._iter_data_rows(data_readers[0])
+                new_contact = self._new_contact
+                apply_data_row = self._apply_data_row
+            data_row = next(data_rows, None)
+
+            for row in contacts_reader.rows():
+                contact_id = row.id
+                contact = new_contact(contact_id, row.name, row.photo_uri, row.lookup_key)
+
+                # 跳过不属于可见联系人的数据行
+                while data_row is not None and data_row[0] < contact_id:
+                    data_row = next(data_rows, None)
+
+                while data_row is not None and data_row[0] == contact_id:
+                    apply_data_row(contact, data_row)
+                    data_row = next(data_rows, None)
+
+                # 列表界面和搜索使用第一个号码的字符串
+                if not self.summary and contact["phones"]:
+                    contact["phone"] = contact["phones"][0]["number"] or ""
+                # 归并完成后转换为紧凑记录
+                yield Contact.from_dict(contact)
+        finally:
+            contacts_reader.close()
+            for reader in data_readers:
+                if reader:
+                    reader.close()
+
+    def _query(self, uri, projection, selection=None, selection_args=None, sort_order=None):
+        """按配置选择逐单元格读取或打包读取"""
+        if self.packer is not None:
+            return query_packed(
+                self.content_resolver, uri, projection,
+                selection, selection_args, sort_order, self.packer
+            )
+        return query(self.content_resolver, uri, projection, selection, selection_args, sort_order)
+
+    def _query_contacts(self, contact_ids=None):
+        """查询联系人表"""
+        Contacts = self.ContactsContract.Contacts
+        selection = None
+        selection_args = None
+        if contact_ids:
+            selection = Contacts._ID + " IN (" + ", ".join("?" * len(contact_ids)) + ")"
+            selection_args = [str(contact_id) for contact_id in contact_ids]
+
+        return self._query(
+            Contacts.CONTENT_URI, self.contacts_projection,
+            selection, selection_args,
+            Contacts._ID + " ASC"
+        )
+
+    def _query_data(self, contact_ids=None, mime_type=None):
+        """一次性查询四种MIME类型的数据行；给出 mime_type 时只查询该类型的 DATA1"""
+        Data = self.ContactsContract.Data
+        if mime_type is not None:
+            projection = self.summary_projection
+            selection = Data.MIMETYPE + " = ?"
+            selection_args = [mime_type]
+        else:
+            projection = self.data_projection
+            selection = Data.MIMETYPE + " IN (?, ?, ?, ?)"
+            selection_args = [self.phone_mime, self.email_mime, self.postal_mime, self.org_mime]
+        if contact_ids:
+            selection += " AND " + Data.CONTACT_ID + " IN (" + ", ".join("?" * len(contact_ids)) + ")"
+            selection_args += [str(contact_id) for contact_id in contact_ids]
+
+        return self._query(
+            Data.CONTENT_URI, projection,
+            selection, selection_args,
+            Data.CONTACT_ID + " ASC, " + Data._ID + " ASC"
+        )
+
+    def _iter_data_rows(self, reader):
+        """读取 Data 游标，生成 (contact_id, mimetype, 数据) 元组
+
+        每行按MIME类型只读取用到的列，减少JNI调用次数。
+        """
+        if not reader:
+            return
+
+        get = reader.get
+        while reader.move_to_next():
+            try:
+                contact_id = get("contact_id")
+                mime_type = get("mimetype")
+
+                if mime_type == self.phone_mime:
+                    value = (get("number"), get("phone_type"))
+                elif mime_type == self.email_mime:
+                    value = (get("email"), get("email_type"))
+                elif mime_type == self.postal_mime:
+                    value = (get("street") or "", get("city") or "", get("region") or "")
+                else:
+                    value = get("company") or ""
+
+                yield (contact_id, mime_type, value)
+
+            except Exception as e:
+                print(f"读取联系人数据失败: {str(e)}")
+                continue
+
+    def _iter_first_values(self, reader, mime_type):
+        """读取单一类型的数据游标，每个联系人只生成第一行 (contact_id, mimetype, DATA1)
+
+        同一联系人的后续行只读取ID，不读取值。
+        """
+        if not reader:
+            return
+
+        get = reader.get
+        last_id = None
+        while reader.move_to_next():
+            try:
+                contact_id = get("contact_id")
+                if contact_id == last_id:
+                    continue
+                last_id = contact_id
+                yield (contact_id, mime_type, get("data1"))
+            except Exception as e:
+                print(f"读取联系人数据失败: {str(e)}")
+                continue
+
+    def _new_contact(self, contact_id, name, photo_uri, lookup_key=None):
+        """创建空的联系人字典"""
+        return {
+            "id": str(contact_id),
+            "lookup_key": lookup_key or "",
+            "name": name or "未知姓名",
+            "phone": "",
+            "phones": [],
+            "emails": [],
+            "addresses": [],
+            "company": "",
+            "photo_uri": photo_uri or "",
+            "avatar": None  # 将在需要时加载
+        }
+
+    def _new_summary(self, contact_id, name, photo_uri, lookup_key=None):
+        """创建列表用的联系人摘要，有无邮箱和地址不在这里读取"""
+        return {
+            "id": str(contact_id),
+            "lookup_key": lookup_key or "",
+            "name": name or "未知姓名",
+            "phone": "",
+            "company": "",
+            "photo_uri": photo_uri or "",
+            "has_phone": False,
+            "has_email": False,
+            "has_address": False
+        }
+
+    def _apply_summary_row(self, contact, data_row):
+        """把一行数据归并到联系人摘要"""
+        _, mime_type, value = data_row
+
+        if mime_type == self.phone_mime:
+            if not contact["has_phone"]:
+                contact["phone"] = value or ""
+                contact["has_phone"] = True
+        elif mime_type == self.org_mime:
+            if not contact["company"]:
+                contact["company"] = value or ""
+
+    def _apply_data_row(self, contact, data_row):
+        """把一行数据归并到联系人字典"""
+        _, mime_type, value = data_row
+
+        if mime_type == self.phone_mime:
+            contact["phones"].append({
+                "number": value[0],
+                "type": get_phone_type_label(value[1])
+            })
+        elif mime_type == self.email_mime:
+            contact["emails"].append({
+                "address": value[0],
+                "type": get_email_type_label(value[1])
+            })
+        elif mime_type == self.postal_mime:
+            full_address = " ".join(value).strip()
+            if full_address:
+                contact["addresses"].append(full_address)
+        elif mime_type == self.org_mime:
+            # 与原实现一致，只取第一条公司信息
+            if not contact["company"]:
+                contact["company"] = value
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+模拟通讯录生成器
+按随机种子生成任意规模的通讯录：中文与混合文字姓名、偏斜分布的电话/邮箱/地址数量、
+重复联系人、空字段和头像URI，可以直接输出界面使用的联系人字典，也可以写入桌面 provider 替身
+"""
+import os
+import random
+
+
+def _env_int(name, default=0):
+    """读取整数环境变量，未设置或不是整数时使用默认值"""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"环境变量 {name} 不是整数，使用默认值 {default}: {value}")
+        return default
+
+
+# 通过环境变量让桌面模拟模式使用生成的大通讯录，例如 CONTACTS_MOCK_COUNT=20000
+MOCK_CONTACT_COUNT = max(_env_int("CONTACTS_MOCK_COUNT"), 0)
+MOCK_CONTACT_SEED = _env_int("CONTACTS_MOCK_SEED")
+# 设置后生成结果保存为二进制快照，下次启动直接映射读取，例如 CONTACTS_MOCK_SNAPSHOT=/tmp/mock.bin；
+# 文件名会加上数量和种子（/tmp/mock-20000-0.bin），不同规模和种子的快照互不覆盖
+MOCK_CONTACT_SNAPSHOT = os.environ.get("CONTACTS_MOCK_SNAPSHOT", "")
+# 设置 CONTACTS_FAKE_PROVIDER=1 时桌面应用改走安卓的读取链路，数据来自写入了生成通讯录的 provider 替身，
+# 规模仍由 CONTACTS_MOCK_COUNT 决定
+FAKE_PROVIDER = os.environ.get("CONTACTS_FAKE_PROVIDER", "") not in ("", "0")
+# 未设置 CONTACTS_MOCK_COUNT 时替身 provider 中的联系人数量
+FAKE_PROVIDER_DEFAULT_COUNT = 200
+
+# 常见姓氏及大致权重，包含单、曾、区、解等多音字姓氏
+SURNAMES = (
+    ("王", 70), ("李", 70), ("张", 65), ("刘", 50), ("陈", 45), ("杨", 30), ("黄", 25),
+    ("赵", 22), ("吴", 20), ("周", 20), ("徐", 15), ("孙", 15), ("马", 13), ("朱", 12),
+    ("胡", 12), ("郭", 11), ("何", 10), ("高", 10), ("林", 10), ("罗", 9), ("郑", 9),
+    ("梁", 8), ("谢", 7), ("宋", 7), ("唐", 6), ("许", 6), ("韩", 6), ("冯", 5),
+    ("邓", 5), ("曹", 5), ("彭", 4), ("曾", 4), ("萧", 3), ("田", 3), ("董", 3),
+    ("单", 2), ("区", 1), ("仇", 1), ("解", 1), ("查", 1), ("朴", 1), ("乐", 1),
+    ("覃", 1), ("尉迟", 1), ("欧阳", 2), ("司马", 1), ("诸葛", 1),
+)
+
+GIVEN_CHARS = (
+    "伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超秀兰霞平刚桂英华玉萍红娥玲芬"
+    "建国志强海燕晓东俊峰丹辉婷雪梅文斌浩然子涵欣怡梓轩一诺思远佳琪宇航"
+)
+
+WESTERN_FIRST = (
+    "James", "Mary", "David", "Linda", "Michael", "Sarah", "Tony", "Kevin",
+    "Emily", "Jason", "Grace", "Eric", "Lucy", "Peter", "Anna", "Leo",
+)
+WESTERN_LAST = (
+    "Smith", "Johnson", "Brown", "Lee", "Wong", "Chan", "Garcia", "Miller",
+    "Davis", "Wilson", "Taylor", "Anderson",
+)
+OTHER_SCRIPT_NAMES = (
+    "山田太郎", "佐藤花子", "김민준", "이서연", "Анна Иванова", "Иван Петров",
+    "Nguyễn Văn An", "José Álvarez", "Zoë Müller", "محمد علي",
+)
+NAME_SUFFIXES = ("(同事)", "(客户)", "-物业", " 老师", " 师傅", "（快递）", " HR", " 妈妈")
+
+COMPANY_PREFIXES = ("北京", "上海", "深圳", "杭州", "广州", "成都", "武汉", "南京", "西安", "苏州")
+COMPANY_WORDS = ("华信", "鼎盛", "中科", "恒达", "新世纪", "云帆", "博远", "天成", "卓越", "金桥")
+COMPANY_TRADES = ("科技", "信息技术", "贸易", "物流", "建筑工程", "文化传媒", "医药", "咨询", "电子商务")
+COMPANY_SUFFIXES = ("有限公司", "股份有限公司", "集团有限公司", "工作室")
+WESTERN_COMPANIES = ("Acme Corp", "Globex", "Initech", "Umbrella Ltd", "Stark Industries")
+
+CITIES = (
+    ("北京市", "朝阳区"), ("北京市", "海淀区"), ("上海市", "浦东新区"), ("上海市", "徐汇区"),
+    ("广州市", "天河区"), ("深圳市", "南山区"), ("杭州市", "西湖区"), ("成都市", "武侯区"),
+)
+STREETS = ("建国路", "中山路", "人民路", "解放路", "长安街", "南京路", "科技园路", "滨江大道")
+
+EMAIL_DOMAINS = ("qq.com", "163.com", "126.com", "gmail.com", "outlook.com", "sina.com", "example.com")
+MOBILE_PREFIXES = (
+    "130", "131", "132", "133", "135", "136", "137", "138", "139", "150",
+    "151", "152", "157", "158", "159", "176", "177", "180", "186", "188", "189", "199",
+)
+AREA_CODES = ("010", "021", "020", "0755", "0571", "028", "027", "025")
+
+PHONE_TYPES = ("手机", "手机", "手机", "住宅", "工作", "工作传真", "其他", "自定义")
+EMAIL_TYPES = ("住宅", "工作", "工作", "其他")
+
+
+class AddressBookGenerator:
+    """可复现的通讯录生成器
+
+    相同的 seed 与参数总是生成相同的通讯录。
+    """
+
+    def __init__(self, seed=0, duplicate_ratio=0.03, empty_name_ratio=0.01,
+                 photo_ratio=0.3, heavy_ratio=0.002):
+        self.seed = seed
+        self.duplicate_ratio = duplicate_ratio
+        self.empty_name_ratio = empty_name_ratio
+        self.photo_ratio = photo_ratio
+        # 拥有几十个号码、超长公司名的“重度”联系人比例
+        self.heavy_ratio = heavy_ratio
+
+        self._surnames = [s for s, _ in SURNAMES]
+        self._surname_weights = [w for _, w in SURNAMES]
+
+    def generate_raw(self, count):
+        """生成原始记录，姓名可能为空，适合写入 provider 替身"""
+        rng = random.Random(self.seed)
+        records = []
+        for index in range(count):
+            contact_id = str(index + 1)
+            if records and rng.random() < self.duplicate_ratio:
+                record = self._duplicate(rng, rng.choice(records), contact_id)
+            else:
+                record = self._new_record(rng, contact_id)
+            records.append(record)
+        return records
+
+    def generate(self, count):
+        """生成与 BulkContactExtractor 输出一致的联系人字典"""
+        return [to_app_contact(record) for record in self.generate_raw(count)]
+
+    # ---- 单个字段 ----
+
+    def _new_record(self, rng, contact_id):
+        heavy = rng.random() < self.heavy_ratio
+        return {
+            "id": contact_id,
+            "lookup_key": _lookup_key(rng),
+            "name": self._name(rng),
+            "phones": self._phones(rng, heavy),
+            "emails": self._emails(rng),
+            "addresses": self._addresses(rng),
+            "company": self._company(rng, heavy),
+            "photo_uri": self._photo_uri(rng, contact_id),
+        }
+
+    def _duplicate(self, rng, original, contact_id):
+        """重复联系人：同名同号，号码写法可能不同，其余字段可能缺失"""
+        record = dict(original)
+        record["id"] = contact_id
+        record["lookup_key"] = _lookup_key(rng)
+        phones = [dict(phone) for phone in original["phones"]]
+        if phones and rng.random() < 0.5:
+            phones[0]["number"] = _reformat_number(rng, phones[0]["number"])
+        record["phones"] = phones
+        if rng.random() < 0.5:
+            record["emails"] = []
+        record["photo_uri"] = self._photo_uri(rng, contact_id)
+        return record
+
+    def _name(self, rng):
+        roll = rng.random()
+        if roll < self.empty_name_ratio:
+            return ""
+        if roll < 0.78:
+            name = rng.choices(self._surnames, self._surname_weights)[0]
+            name += "".join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2, 2, 2))))
+            if rng.random() < 0.06:
+                name += rng.choice(NAME_SUFFIXES)
+            return name
+        if roll < 0.86:
+            # 英文名加中文姓，或中文名加英文名
+            surname = rng.choices(self._surnames, self._surname_weights)[0]
+            first = rng.choice(WESTERN_FIRST)
+            return f"{first} {surname}" if rng.random() < 0.5 else f"{surname}{rng.choice(GIVEN_CHARS)} {first}"
+        if roll < 0.95:
+            return f"{rng.choice(WESTERN_FIRST)} {rng.choice(WESTERN_LAST)}"
+        return rng.choice(OTHER_SCRIPT_NAMES)
+
+    def _phones(self, rng, heavy):
+        if heavy:
+            count = rng.randint(12, 40)
+        else:
+            # 大多数联系人一个号码，少数没有或有多个
+            count = rng.choices((0, 1, 2, 3, 4), (6, 70, 17, 5, 2))[0]
+        return [
+            {"number": self._number(rng), "type": rng.choice(PHONE_TYPES)}
+            for _ in range(count)
+        ]
+
+    def _number(self, rng):
+        roll = rng.random()
+        if roll < 0.75:
+            number = rng.choice(MOBILE_PREFIXES) + "".join(rng.choice("0123456789") for _ in range(8))
+            return _reformat_number(rng, number) if rng.random() < 0.2 else number
+        if roll < 0.95:
+            area = rng.choice(AREA_CODES)
+            return f"{area}-{rng.randint(2000000, 89999999)}"
+        return rng.choice(("10086", "95588", "400-810-8888", "+1 415 555 0100", "*#06#"))
+
+    def _emails(self, rng):
+        count = rng.choices((0, 1, 2, 3), (60, 30, 8, 2))[0]
+        return [
+            {
+                "address": f"{_ascii_user(rng)}@{rng.choice(EMAIL_DOMAINS)}",
+                "type": rng.choice(EMAIL_TYPES)
+            }
+            for _ in range(count)
+        ]
+
+    def _addresses(self, rng):
+        count = rng.choices((0, 1, 2), (75, 22, 3))[0]
+        addresses = []
+        for _ in range(count):
+            city, district = rng.choice(CITIES)
+            addresses.append(f"{city}{district}{rng.choice(STREETS)}{rng.randint(1, 999)}号")
+        return addresses
+
+    def _company(self, rng, heavy):
+        roll = rng.random()
+        if heavy or roll < 0.05:
+            # 超长公司名
+            return (rng.choice(COMPANY_PREFIXES) + rng.choice(COMPANY_WORDS)
+                    + "".join(rng.choice(COMPANY_TRADES) for _ in range(3))
+                    + "发展" + rng.choice(COMPANY_SUFFIXES) + rng.choice(CITIES)[1] + "分公司")
+        if roll < 0.35:
+            return (rng.choice(COMPANY_PREFIXES) + rng.choice(COMPANY_WORDS)
+                    + rng.choice(COMPANY_TRADES) + rng.choice(COMPANY_SUFFIXES))
+        if roll < 0.40:
+            return rng.choice(WESTERN_COMPANIES)
+        return ""
+
+    def _photo_uri(self, rng, contact_id):
+        if rng.random() < self.photo_ratio:
+            return f"content://com.android.contacts/contacts/{contact_id}/photo"
+        return ""
+
+
+def _reformat_number(rng, number):
+    """同一个手机号的不同写法"""
+    digits = "".join(ch for ch in number if ch.isdigit())
+    if len(digits) != 11:
+        return number
+    return rng.choice((
+        f"+86 {digits[:3]} {digits[3:7]} {digits[7:]}",
+        f"+86{digits}",
+        f"{digits[:3]}-{digits[3:7]}-{digits[7:]}",
+        f"0086{digits}",
+    ))
+
+
+def _lookup_key(rng):
+    """形如 provider 生成的查找键"""
+    return f"0r{rng.randint(1, 99999)}-{rng.getrandbits(48):012x}"
+
+
+def _ascii_user(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    user = "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+    if rng.random() < 0.5:
+        user += str(rng.randint(1, 9999))
+    return user
+
+
+def to_app_contact(record):
+    """原始记录转换为 BulkContactExtractor 输出的联系人字典"""
+    phones = [dict(phone) for phone in record["phones"]]
+    return {
+        "id": record["id"],
+        "lookup_key": record["lookup_key"],
+        "name": record["name"] or "未知姓名",
+        "phone": phones[0]["number"] if phones else "",
+        "phones": phones,
+        "emails": [dict(email) for email in record["emails"]],
+        "addresses": list(record["addresses"]),
+        "company": record["company"],
+        "photo_uri": record["photo_uri"],
+        "avatar": None
+    }
+
+
+def generate_contacts(count, seed=0, **options):
+    """生成 count 个界面格式的联系人"""
+    return AddressBookGenerator(seed, **options).generate(count)
+
+
+def build_fake_provider(count, seed=0, query_latency=0.0, call_latency=0.0, **options):
+    """生成通讯录并写入桌面 provider 替身"""
+    from fake_provider import FakeContactsProvider
+
+    records = AddressBookGenerator(seed, **options).generate_raw(count)
+    return FakeContactsProvider(records, query_latency=query_latency, call_latency=call_latency)
+
+
+def install_fake_provider():
+    """按环境变量在桌面安装 provider 替身，返回 provider；未开启时返回 None"""
+    if not FAKE_PROVIDER:
+        return None
+    import fake_provider
+
+    provider = build_fake_provider(MOCK_CONTACT_COUNT or FAKE_PROVIDER_DEFAULT_COUNT, MOCK_CONTACT_SEED)
+    fake_provider.install(provider)
+    return provider
+
+
+_mock_contacts = None
+
+
+def get_mock_contacts():
+    """桌面模拟模式使用的大通讯录，未设置 CONTACTS_MOCK_COUNT 时返回 None"""
+    global _mock_contacts
+    if not MOCK_CONTACT_COUNT:
+        return None
+    if _mock_contacts is None:
+        if MOCK_CONTACT_SNAPSHOT:
+            _mock_contacts = _load_mock_snapshot(MOCK_CONTACT_SNAPSHOT, MOCK_CONTACT_COUNT, MOCK_CONTACT_SEED)
+        else:
+            _mock_contacts = generate_contacts(MOCK_CONTACT_COUNT, MOCK_CONTACT_SEED)
+    return _mock_contacts
+
+
+def mock_snapshot_path(path, count, seed):
+    """按数量和种子区分的快照文件名"""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{count}-{seed}{ext}"
+
+
+def _load_mock_snapshot(path, count, seed):
+    """读取之前保存的模拟通讯录，文件不可用时重新生成并保存"""
+    from contact_snapshot import read_snapshot, write_snapshot
+
+    path = mock_snapshot_path(path, count, seed)
+    try:
+        contacts, _ = read_snapshot(path)
+        if len(contacts) == count:
+            return contacts
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"读取模拟通讯录快照失败: {str(e)}")
+
+    contacts = generate_contacts(count, seed)
+    try:
+        write_snapshot(path, contacts)
+    except Exception as e:
+        print(f"保存模拟通讯录快照失败: {str(e)}")
+    return contacts
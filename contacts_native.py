@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+游标打包桥接
+Java 端 CursorPacker 把一页游标数据打包成字节数组，Python 端用 memoryview/struct
+一次解码，避免每个单元格一次 getString/getInt 的 JNI 调用
+"""
+import struct
+
+from contacts_cursor import STRING
+from android_bridge import get_bridge, has_autoclass
+
+MAGIC = b"CPK1"
+
+TAG_NULL = 0
+TAG_STRING = 1
+TAG_LONG = 2
+
+# 每次JNI调用打包的行数
+PACK_ROWS = 500
+
+_HEADER = struct.Struct(">4sii")
+_INT = struct.Struct(">i")
+_LONG = struct.Struct(">q")
+
+_packer = None
+
+
+def get_cursor_packer():
+    """获取 Java 端打包类，不可用时返回 None"""
+    global _packer
+    if _packer is None and has_autoclass():
+        try:
+            _packer = get_bridge().get_class('com.example.contacts.CursorPacker')
+        except Exception as e:
+            print(f"加载CursorPacker失败: {str(e)}")
+            _packer = False
+    return _packer or None
+
+
+def column_types(projection):
+    """投影各列对应的打包类型字符串"""
+    kinds = {}
+    for _, column, kind in projection.fields:
+        kinds.setdefault(column, kind)
+    return "".join("S" if kinds[column] == STRING else "L" for column in projection.columns)
+
+
+def encode_rows(rows, types):
+    """按 CursorPacker 的格式打包行数据，供桌面环境生成测试缓冲区"""
+    parts = [_HEADER.pack(MAGIC, len(types), len(rows))]
+    for row in rows:
+        for value, kind in zip(row, types):
+            if value is None:
+                parts.append(bytes((TAG_NULL,)))
+            elif kind == "L":
+                parts.append(bytes((TAG_LONG,)))
+                parts.append(_LONG.pack(int(value)))
+            else:
+                data = str(value).encode("utf-8")
+                parts.append(bytes((TAG_STRING,)))
+                parts.append(_INT.pack(len(data)))
+                parts.append(data)
+    return b"".join(parts)
+
+
+def decode_rows(buffer):
+    """解码打包缓冲区，返回行元组列表"""
+    view = memoryview(buffer)
+    if len(view) < _HEADER.size:
+        raise ValueError("打包数据不完整")
+
+    magic, column_count, row_count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("打包数据格式错误")
+
+    unpack_int = _INT.unpack_from
+    unpack_long = _LONG.unpack_from
+    offset = _HEADER.size
+    rows = []
+    for _ in range(row_count):
+        row = []
+        for _ in range(column_count):
+            tag = view[offset]
+            offset += 1
+            if tag == TAG_STRING:
+                length = unpack_int(view, offset)[0]
+                offset += 4
+                row.append(str(view[offset:offset + length], "utf-8"))
+                offset += length
+            elif tag == TAG_LONG:
+                row.append(unpack_long(view, offset)[0])
+                offset += 8
+            elif tag == TAG_NULL:
+                row.append(None)
+            else:
+                raise ValueError(f"未知的单元格类型: {tag}")
+        rows.append(tuple(row))
+    return rows
+
+
+def _to_bytes(data):
+    """pyjnius 返回的 byte[] 转为 bytes"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    if hasattr(data, "tostring"):
+        return data.tostring()
+    return bytes(data)
+
+
+class PackedCursorReader:
+    """通过 CursorPacker 分页读取游标，接口与 CursorReader 相同"""
+
+    def __init__(self, cursor, projection, packer, page_rows=PACK_ROWS):
+        self.cursor = cursor
+        self.projection = projection
+        self.packer = packer
+        self.page_rows = page_rows
+
+        self._column_indices = [cursor.getColumnIndex(column) for column in projection.columns]
+        self._types = column_types(projection)
+        self._positions = [projection.columns.index(column) for _, column, _ in projection.fields]
+        self._by_name = dict(zip(projection.names, self._positions))
+        self._current = None
+        self._pending = None
+        self._exhausted = False
+
+    def __iter__(self):
+        return self.rows()
+
+    def _iter_raw(self):
+        """逐页打包并解码"""
+        while not self._exhausted:
+            data = self.packer.pack(self.cursor, self._column_indices, self._types, self.page_rows)
+            page = decode_rows(_to_bytes(data))
+            if self.page_rows <= 0 or len(page) < self.page_rows:
+                self._exhausted = True
+            yield from page
+
+    def rows(self):
+        """逐行生成带类型的行元组"""
+        Row = self.projection.Row
+        positions = self._positions
+        for raw in self._iter_raw():
+            yield Row(*[raw[position] for position in positions])
+
+    def move_to_next(self):
+        """移动到下一行"""
+        if self._pending is None:
+            self._pending = self._iter_raw()
+        self._current = next(self._pending, None)
+        return self._current is not None
+
+    def get(self, name):
+        """读取当前行的单个字段"""
+        return self._current[self._by_name[name]]
+
+    def close(self):
+        """关闭游标"""
+        self.cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def query_packed(content_resolver, uri, projection, selection=None, selection_args=None,
+                 sort_order=None, packer=None):
+    """带投影的 provider 查询，返回打包读取器，游标为空时返回 None"""
+    cursor = content_resolver.query(
+        uri, projection.columns, selection, selection_args, sort_order
+    )
+    if not cursor:
+        return None
+    return PackedCursorReader(cursor, projection, packer or get_cursor_packer())
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+通讯录变更监听
+安卓上通过 pyjnius 注册 ContentObserver，桌面环境提供可手动触发的替身，
+两者共用同一套去抖与合并逻辑
+"""
+import time
+import threading
+
+from android_bridge import IS_ANDROID, get_bridge
+
+if IS_ANDROID:
+    from jnius import PythonJavaClass, java_method
+
+# 默认去抖延迟，连续通知之间的间隔小于该值时合并为一次
+DEBOUNCE_DELAY = 1.0
+# 通知持续不断时，最长等待多久也要处理一次
+MAX_DELAY = 5.0
+
+
+class ChangeCoalescer:
+    """合并短时间内的多次变更通知
+
+    每次 notify() 重新开始计时，静默 delay 秒后调用一次 callback，
+    参数为期间收到的全部 URI；距第一条通知超过 max_delay 时立即处理。
+    """
+
+    def __init__(self, callback, delay=DEBOUNCE_DELAY, max_delay=MAX_DELAY,
+                 timer_factory=threading.Timer, clock=time.monotonic):
+        self.callback = callback
+        self.delay = delay
+        self.max_delay = max_delay
+        self.timer_factory = timer_factory
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._pending = set()
+        self._first_notify = None
+        self.notify_count = 0
+        self.flush_count = 0
+
+    def notify(self, uri=None):
+        """收到一条变更通知"""
+        with self._lock:
+            self.notify_count += 1
+            self._pending.add(uri)
+
+            now = self.clock()
+            if self._first_notify is None:
+                self._first_notify = now
+
+            # 超过最长等待时间，不再推迟
+            remaining = self.max_delay - (now - self._first_notify)
+            delay = max(0.0, min(self.delay, remaining))
+
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = self.timer_factory(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """立即处理已合并的通知"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            uris = self._pending
+            self._pending = set()
+            self._first_notify = None
+
+        if not uris:
+            return
+        self.flush_count += 1
+        try:
+            self.callback({uri for uri in uris if uri is not None})
+        except Exception as e:
+            print(f"处理通讯录变更失败: {str(e)}")
+
+    def cancel(self):
+        """丢弃尚未处理的通知"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = set()
+            self._first_notify = None
+
+    @property
+    def pending(self):
+        """是否有等待处理的通知"""
+        with self._lock:
+            return bool(self._pending)
+
+
+class DesktopContactsObserver:
+    """桌面环境的监听替身，用 simulate_change() 模拟 provider 通知"""
+
+    def __init__(self, on_change, delay=DEBOUNCE_DELAY, max_delay=MAX_DELAY, **kwargs):
+        self.coalescer = ChangeCoalescer(on_change, delay, max_delay, **kwargs)
+        self.running = False
+
+    def start(self):
+        """开始监听"""
+        self.running = True
+
+    def stop(self):
+        """停止监听"""
+        self.running = False
+        self.coalescer.cancel()
+
+    def simulate_change(self, uri=None):
+        """模拟一条变更通知"""
+        if self.running:
+            self.coalescer.notify(uri)
+
+
+class BridgeContactsObserver(DesktopContactsObserver):
+    """桌面替身 provider 上的监听，经桥接注册 ContactsObserver 替身，provider 的变更真实触发同步"""
+
+    def __init__(self, on_change, delay=DEBOUNCE_DELAY, max_delay=MAX_DELAY, **kwargs):
+        super().__init__(on_change, delay, max_delay, **kwargs)
+        ContactsObserver = get_bridge().get_class('com.example.contacts.ContactsObserver')
+        self._observer = ContactsObserver(self)
+
+    def onContactsChanged(self, self_change, uri):
+        self.simulate_change(uri)
+
+    def start(self):
+        """注册监听，包含子URI的变更"""
+        if self.running:
+            return
+        bridge = get_bridge()
+        bridge.content_resolver.registerContentObserver(
+            bridge.ContactsContract.Contacts.CONTENT_URI, True, self._observer
+        )
+        self.running = True
+
+    def stop(self):
+        """注销监听"""
+        if not self.running:
+            return
+        get_bridge().content_resolver.unregisterContentObserver(self._observer)
+        super().stop()
+
+
+if IS_ANDROID:
+
+    class _ContactsChangeListener(PythonJavaClass):
+        """实现 Java 端 ContactsObserver.Listener 接口"""
+        __javainterfaces__ = ['com/example/contacts/ContactsObserver$Listener']
+        __javacontext__ = 'app'
+
+        def __init__(self, coalescer):
+            super().__init__()
+            self.coalescer = coalescer
+
+        @java_method('(ZLandroid/net/Uri;)V')
+        def onContactsChanged(self, self_change, uri):
+            self.coalescer.notify(uri.toString() if uri else None)
+
+    class AndroidContactsObserver:
+        """在 ContactsContract.Contacts.CONTENT_URI 上注册的 ContentObserver"""
+
+        def __init__(self, on_change, delay=DEBOUNCE_DELAY, max_delay=MAX_DELAY):
+            self.coalescer = ChangeCoalescer(on_change, delay, max_delay)
+            # 保留 Python 端监听对象的引用，避免被回收
+            self._listener = _ContactsChangeListener(self.coalescer)
+            bridge = get_bridge()
+            ContactsObserver = bridge.get_class('com.example.contacts.ContactsObserver')
+            self._observer = ContactsObserver(self._listener)
+            self.running = False
+
+        def start(self):
+            """注册监听，包含子URI的变更"""
+            if self.running:
+                return
+            bridge = get_bridge()
+            bridge.content_resolver.registerContentObserver(
+                bridge.ContactsContract.Contacts.CONTENT_URI, True, self._observer
+            )
+            self.running = True
+
+        def stop(self):
+            """注销监听"""
+            if not self.running:
+                return
+            get_bridge().content_resolver.unregisterContentObserver(self._observer)
+            self.running = False
+            self.coalescer.cancel()
+
+
+def create_contacts_observer(on_change, delay=DEBOUNCE_DELAY, max_delay=MAX_DELAY, bridge=False):
+    """按运行环境创建监听器，bridge 为真时在桌面替身 provider 上注册"""
+    if IS_ANDROID:
+        return AndroidContactsObserver(on_change, delay, max_delay)
+    if bridge:
+        return BridgeContactsObserver(on_change, delay, max_delay)
+    return DesktopContactsObserver(on_change, delay, max_delay)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+联系人增量同步
+本地快照保存上次同步时间和联系人列表，刷新时只查询
+CONTACT_LAST_UPDATED_TIMESTAMP 更新过的联系人，并通过 DeletedContacts 处理删除
+"""
+import time
+from collections import namedtuple
+
+from contacts_cursor import Projection, query, LONG
+from contacts_extractor import BulkContactExtractor
+from contact_snapshot import ContactSnapshot, write_snapshot
+
+# IN 查询每批的ID数量，低于 SQLite 的参数个数上限
+ID_BATCH_SIZE = 400
+
+# 增量变更：更新或新增的联系人、已删除的联系人ID、本次同步时间
+ChangeSet = namedtuple("ChangeSet", ["updated", "deleted", "sync_time"])
+
+
+def current_millis():
+    """当前时间（毫秒），与 provider 的时间戳单位一致"""
+    return int(time.time() * 1000)
+
+
+class ContactSnapshotStore:
+    """本地联系人快照，使用 contact_snapshot 的二进制格式"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self):
+        """映射快照文件，按需解码记录；没有可用快照时返回 None"""
+        try:
+            return ContactSnapshot(self.path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"读取联系人快照失败: {str(e)}")
+            return None
+
+    def save(self, contacts, last_sync):
+        """写入快照，先写临时文件再替换，避免中途退出损坏快照"""
+        try:
+            write_snapshot(self.path, contacts, last_sync)
+            return True
+        except Exception as e:
+            print(f"保存联系人快照失败: {str(e)}")
+            return False
+
+
+class IncrementalSync:
+    """基于时间戳的增量同步"""
+
+    def __init__(self, content_resolver, ContactsContract, packer=None, summary=False):
+        self.content_resolver = content_resolver
+        self.ContactsContract = ContactsContract
+        self.extractor = BulkContactExtractor(content_resolver, ContactsContract, packer, summary)
+
+        Contacts = ContactsContract.Contacts
+        DeletedContacts = ContactsContract.DeletedContacts
+        self.updated_projection = Projection(
+            ("id", Contacts._ID, LONG),
+        )
+        self.deleted_projection = Projection(
+            ("id", DeletedContacts.CONTACT_ID, LONG),
+        )
+
+    def fetch_changes(self, since):
+        """查询 since 之后的变更
+
+        返回 ChangeSet；快照过旧、已删除记录可能被系统清理时返回 None，
+        调用方应改为全量获取。
+        """
+        sync_time = current_millis()
+
+        DeletedContacts = self.ContactsContract.DeletedContacts
+        if not since or sync_time - since > DeletedContacts.DAYS_KEPT_MILLISECONDS:
+            return None
+
+        Contacts = self.ContactsContract.Contacts
+        updated_ids = self._query_ids(
+            Contacts.CONTENT_URI,
+            self.updated_projection,
+            Contacts.CONTACT_LAST_UPDATED_TIMESTAMP,
+            since
+        )
+        deleted_ids = self._query_ids(
+            DeletedContacts.CONTENT_URI,
+            self.deleted_projection,
+            DeletedContacts.CONTACT_DELETED_TIMESTAMP,
+            since
+        )
+
+        updated = []
+        for start in range(0, len(updated_ids), ID_BATCH_SIZE):
+            updated.extend(self.extractor.extract_ids(updated_ids[start:start + ID_BATCH_SIZE]))
+
+        deleted = {str(contact_id) for contact_id in deleted_ids}
+        return ChangeSet(updated, deleted, sync_time)
+
+    def _query_ids(self, uri, projection, timestamp_column, since):
+        """查询时间戳晚于 since 的联系人ID"""
+        reader = query(
+            self.content_resolver, uri, projection,
+            timestamp_column + " > ?", [str(since)]
+        )
+        if not reader:
+            return []
+        with reader:
+            return [row.id for row in reader]
+
+
+def apply_changes(contacts, changes):
+    """把变更应用到联系人列表，返回新列表
+
+    已有联系人原位替换，新联系人追加到末尾，删除的联系人移除。
+    """
+    updated = {contact["id"]: contact for contact in changes.updated}
+    removed = changes.deleted
+
+    merged = []
+    for contact in contacts:
+        contact_id = contact["id"]
+        if contact_id in removed:
+            continue
+        merged.append(updated.pop(contact_id, contact))
+
+    merged.extend(updated.values())
+    return merged
+
+
+def diff_contacts(old_contacts, new_contacts, sync_time):
+    """比较两份完整列表，得到与增量同步相同格式的变更
+
+    用于快照过旧、无法增量同步时：全量读取后只替换有差异的联系人。
+    """
+    old_by_id = {contact["id"]: contact for contact in old_contacts}
+    updated = []
+    for contact in new_contacts:
+        old = old_by_id.pop(contact["id"], None)
+        if old is None or old != contact:
+            updated.append(contact)
+    return ChangeSet(updated, set(old_by_id), sync_time)
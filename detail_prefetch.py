@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+联系人详情预取
+根据列表的可见范围和行按下事件，在低优先级后台线程里提前加载详情，
+用户点开联系人时详情已经在缓存中
+"""
+import threading
+from collections import deque
+
+from android_bridge import IS_ANDROID, get_bridge, detach_thread
+
+# 每次批量加载的联系人数量
+PREFETCH_BATCH = 20
+# 可见范围之外额外预取的行数
+PREFETCH_AHEAD = 10
+
+# android.os.Process.THREAD_PRIORITY_BACKGROUND
+THREAD_PRIORITY_BACKGROUND = 10
+
+
+def set_background_priority():
+    """把当前线程设为后台优先级，不和界面线程抢CPU"""
+    if not IS_ANDROID:
+        return
+    try:
+        Process = get_bridge().get_class('android.os.Process')
+        Process.setThreadPriority(THREAD_PRIORITY_BACKGROUND)
+    except Exception as e:
+        print(f"设置线程优先级失败: {str(e)}")
+
+
+class DetailPrefetcher:
+    """按需预取联系人详情到 ContactDetailLoader 的缓存"""
+
+    def __init__(self, loader, batch_size=PREFETCH_BATCH):
+        self.loader = loader
+        self.batch_size = batch_size
+
+        self._queue = deque()
+        self._queued = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """启动后台线程"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程并丢弃未处理的请求"""
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+
+    def prefetch(self, contact_ids, urgent=False, replace=False):
+        """请求预取
+
+        urgent 为真时排到队首（即将被点开的联系人），
+        replace 为真时先丢弃尚未处理的请求（可见范围已经变化）。
+        """
+        with self._cond:
+            if replace:
+                self._queue.clear()
+                self._queued.clear()
+
+            cache = self.loader.cache
+            if urgent:
+                for contact_id in reversed(contact_ids):
+                    if contact_id in cache:
+                        continue
+                    if contact_id in self._queued:
+                        self._queue.remove(contact_id)
+                    self._queue.appendleft(contact_id)
+                    self._queued.add(contact_id)
+            else:
+                for contact_id in contact_ids:
+                    if contact_id in cache or contact_id in self._queued:
+                        continue
+                    self._queue.append(contact_id)
+                    self._queued.add(contact_id)
+
+            if self._queue:
+                self._cond.notify()
+
+    @property
+    def pending(self):
+        """等待预取的联系人数量"""
+        with self._cond:
+            return len(self._queue)
+
+    def _next_batch(self):
+        """取出下一批ID，没有请求时等待"""
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            if not self._running:
+                return None
+
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                contact_id = self._queue.popleft()
+                self._queued.discard(contact_id)
+                batch.append(contact_id)
+            return batch
+
+    def _run(self):
+        set_background_priority()
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self.loader.load(batch)
+        finally:
+            detach_thread()
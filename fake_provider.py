@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+"""
+桌面通讯录替身
+用 SQLite 内存库模拟 ContactsProvider，并提供假的 autoclass、ContentResolver 和 Cursor，
+真实的提取代码（BulkContactExtractor、IncrementalSync、CursorPacker 读取）可以不加修改地
+在桌面运行；每次查询和每次游标方法调用都可以设置延迟，用来模拟 provider 查询和 JNI 调用开销
+"""
+import time
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import android_bridge
+from contacts_native import encode_rows
+from contacts_extractor import PHONE_TYPE_LABELS, EMAIL_TYPE_LABELS
+
+# 与 Android 一致的列名、URI 和 MIME 类型
+AUTHORITY_URI = "content://com.android.contacts"
+
+PHONE_MIME = "vnd.android.cursor.item/phone_v2"
+EMAIL_MIME = "vnd.android.cursor.item/email_v2"
+POSTAL_MIME = "vnd.android.cursor.item/postal-address_v2"
+ORG_MIME = "vnd.android.cursor.item/organization"
+
+# DeletedContacts 保留删除记录的时长（30天）
+DAYS_KEPT_MILLISECONDS = 30 * 24 * 60 * 60 * 1000
+
+CONTRACT_CLASSES = {
+    "android.provider.ContactsContract$Contacts": {
+        "CONTENT_URI": AUTHORITY_URI + "/contacts",
+        "_ID": "_id",
+        "LOOKUP_KEY": "lookup",
+        "DISPLAY_NAME": "display_name",
+        "PHOTO_URI": "photo_uri",
+        "PHOTO_THUMBNAIL_URI": "photo_thumb_uri",
+        "HAS_PHONE_NUMBER": "has_phone_number",
+        "CONTACT_LAST_UPDATED_TIMESTAMP": "contact_last_updated_timestamp",
+    },
+    "android.provider.ContactsContract$Data": {
+        "CONTENT_URI": AUTHORITY_URI + "/data",
+        "_ID": "_id",
+        "CONTACT_ID": "contact_id",
+        "MIMETYPE": "mimetype",
+    },
+    "android.provider.ContactsContract$DeletedContacts": {
+        "CONTENT_URI": AUTHORITY_URI + "/deleted_contacts",
+        "CONTACT_ID": "contact_id",
+        "CONTACT_DELETED_TIMESTAMP": "contact_deleted_timestamp",
+        "DAYS_KEPT_MILLISECONDS": DAYS_KEPT_MILLISECONDS,
+    },
+    "android.provider.ContactsContract$CommonDataKinds$Phone": {
+        "CONTENT_URI": AUTHORITY_URI + "/data/phones",
+        "CONTENT_ITEM_TYPE": PHONE_MIME,
+        "CONTACT_ID": "contact_id",
+        "DISPLAY_NAME": "display_name",
+        "NUMBER": "data1",
+        "TYPE": "data2",
+    },
+    "android.provider.ContactsContract$CommonDataKinds$Email": {
+        "CONTENT_URI": AUTHORITY_URI + "/data/emails",
+        "CONTENT_ITEM_TYPE": EMAIL_MIME,
+        "CONTACT_ID": "contact_id",
+        "ADDRESS": "data1",
+        "TYPE": "data2",
+    },
+    "android.provider.ContactsContract$CommonDataKinds$StructuredPostal": {
+        "CONTENT_URI": AUTHORITY_URI + "/data/postals",
+        "CONTENT_ITEM_TYPE": POSTAL_MIME,
+        "CONTACT_ID": "contact_id",
+        "STREET": "data4",
+        "CITY": "data7",
+        "REGION": "data8",
+    },
+    "android.provider.ContactsContract$CommonDataKinds$Organization": {
+        "CONTENT_ITEM_TYPE": ORG_MIME,
+        "COMPANY": "data1",
+    },
+}
+
+_SCHEMA = """
+CREATE TABLE contacts (
+    _id INTEGER PRIMARY KEY,
+    lookup TEXT,
+    display_name TEXT,
+    photo_uri TEXT,
+    photo_thumb_uri TEXT,
+    contact_last_updated_timestamp INTEGER
+);
+CREATE TABLE data (
+    _id INTEGER PRIMARY KEY,
+    contact_id INTEGER NOT NULL,
+    mimetype TEXT NOT NULL,
+    data1 TEXT, data2 TEXT, data3 TEXT, data4 TEXT,
+    data5 TEXT, data6 TEXT, data7 TEXT, data8 TEXT
+);
+CREATE INDEX data_contact_id ON data (contact_id);
+CREATE TABLE deleted_contacts (
+    contact_id INTEGER PRIMARY KEY,
+    contact_deleted_timestamp INTEGER
+);
+CREATE VIEW view_contacts AS
+    SELECT c.*, EXISTS (
+        SELECT 1 FROM data d WHERE d.contact_id = c._id AND d.mimetype = '%(phone)s'
+    ) AS has_phone_number
+    FROM contacts c;
+CREATE VIEW view_data AS
+    SELECT d.*, c.display_name, c.lookup, c.photo_uri, c.photo_thumb_uri
+    FROM data d JOIN contacts c ON c._id = d.contact_id;
+CREATE VIEW view_phones AS SELECT * FROM view_data WHERE mimetype = '%(phone)s';
+CREATE VIEW view_emails AS SELECT * FROM view_data WHERE mimetype = '%(email)s';
+CREATE VIEW view_postals AS SELECT * FROM view_data WHERE mimetype = '%(postal)s';
+""" % {"phone": PHONE_MIME, "email": EMAIL_MIME, "postal": POSTAL_MIME}
+
+# URI -> 表或视图
+_URI_VIEWS = {
+    AUTHORITY_URI + "/contacts": "view_contacts",
+    AUTHORITY_URI + "/data": "view_data",
+    AUTHORITY_URI + "/data/phones": "view_phones",
+    AUTHORITY_URI + "/data/emails": "view_emails",
+    AUTHORITY_URI + "/data/postals": "view_postals",
+    AUTHORITY_URI + "/deleted_contacts": "deleted_contacts",
+}
+
+_PHONE_TYPES = {label: code for code, label in PHONE_TYPE_LABELS.items()}
+_EMAIL_TYPES = {label: code for code, label in EMAIL_TYPE_LABELS.items()}
+
+
+def _delay(seconds):
+    """模拟耗时；一毫秒以下用忙等，time.sleep 的精度不够"""
+    if seconds <= 0:
+        return
+    if seconds >= 0.001:
+        time.sleep(seconds)
+        return
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _millis():
+    return int(time.time() * 1000)
+
+
+class FakeContactsProvider:
+    """SQLite 内存库实现的通讯录 provider
+
+    query_latency 为每次查询的额外耗时，call_latency 为每次游标方法调用的耗时（秒）。
+    """
+
+    def __init__(self, contacts=None, query_latency=0.0, call_latency=0.0):
+        self.query_latency = query_latency
+        self.call_latency = call_latency
+        self.query_count = 0
+        self.call_count = 0
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._observers = []
+
+        if contacts:
+            self.add_contacts(contacts)
+
+    # ---- 数据维护 ----
+
+    def add_contacts(self, contacts):
+        """批量写入界面格式的联系人字典，返回联系人ID列表"""
+        with self._lock:
+            ids = [self._insert(contact) for contact in contacts]
+            self._db.commit()
+        return ids
+
+    def add_contact(self, contact):
+        """写入一个联系人并通知监听者"""
+        contact_id = self.add_contacts([contact])[0]
+        self.notify_change(CONTRACT_CLASSES["android.provider.ContactsContract$Contacts"]["CONTENT_URI"])
+        return contact_id
+
+    def update_contact(self, contact):
+        """用新的字典替换联系人的全部数据"""
+        with self._lock:
+            contact_id = int(contact["id"])
+            self._db.execute("DELETE FROM data WHERE contact_id = ?", (contact_id,))
+            self._db.execute("DELETE FROM contacts WHERE _id = ?", (contact_id,))
+            self._insert(contact)
+            self._db.commit()
+        self.notify_change(CONTRACT_CLASSES["android.provider.ContactsContract$Contacts"]["CONTENT_URI"])
+
+    def delete_contact(self, contact_id):
+        """删除联系人，并像系统一样记录到 deleted_contacts"""
+        with self._lock:
+            contact_id = int(contact_id)
+            self._db.execute("DELETE FROM data WHERE contact_id = ?", (contact_id,))
+            self._db.execute("DELETE FROM contacts WHERE _id = ?", (contact_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO deleted_contacts VALUES (?, ?)", (contact_id, _millis())
+            )
+            self._db.commit()
+        self.notify_change(CONTRACT_CLASSES["android.provider.ContactsContract$Contacts"]["CONTENT_URI"])
+
+    def _insert(self, contact):
+        contact_id = contact.get("id")
+        contact_id = int(contact_id) if contact_id not in (None, "") else None
+        cursor = self._db.execute(
+            "INSERT INTO contacts (_id, lookup, display_name, photo_uri, photo_thumb_uri, "
+            "contact_last_updated_timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                contact_id,
+                contact.get("lookup_key") or None,
+                contact.get("name") or None,
+                contact.get("photo_uri") or None,
+                contact.get("photo_uri") or None,
+                _millis(),
+            )
+        )
+        contact_id = cursor.lastrowid
+
+        rows = []
+        phones = contact.get("phones")
+        if phones is None and contact.get("phone"):
+            phones = [{"number": contact["phone"], "type": "手机"}]
+        for phone in phones or []:
+            rows.append((contact_id, PHONE_MIME, phone["number"],
+                         _PHONE_TYPES.get(phone.get("type"), 7), None, None, None))
+        for email in contact.get("emails") or []:
+            rows.append((contact_id, EMAIL_MIME, email["address"],
+                         _EMAIL_TYPES.get(email.get("type"), 3), None, None, None))
+        for address in contact.get("addresses") or []:
+            rows.append((contact_id, POSTAL_MIME, None, None, address, None, None))
+        if contact.get("company"):
+            rows.append((contact_id, ORG_MIME, contact["company"], None, None, None, None))
+
+        self._db.executemany(
+            "INSERT INTO data (contact_id, mimetype, data1, data2, data4, data7, data8) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        return contact_id
+
+    # ---- 变更通知 ----
+
+    def register_observer(self, uri, notify_for_descendants, observer):
+        with self._lock:
+            self._observers.append((str(uri), notify_for_descendants, observer))
+
+    def unregister_observer(self, observer):
+        with self._lock:
+            self._observers = [entry for entry in self._observers if entry[2] is not observer]
+
+    def notify_change(self, uri):
+        """按 ContentObserver 的规则回调 onChange(selfChange, uri)"""
+        with self._lock:
+            observers = list(self._observers)
+        for registered_uri, descendants, observer in observers:
+            if uri == registered_uri or (descendants and uri.startswith(registered_uri + "/")):
+                observer.onChange(False, uri)
+
+    # ---- 查询 ----
+
+    def query(self, uri, projection, selection=None, selection_args=None, sort_order=None):
+        """执行查询并返回 FakeCursor，URI 不支持时返回 None"""
+        view = _URI_VIEWS.get(str(uri))
+        if view is None:
+            return None
+
+        columns = list(projection) if projection else ["*"]
+        sql = "SELECT " + ", ".join(columns) + " FROM " + view
+        if selection:
+            sql += " WHERE " + selection
+        if sort_order:
+            sql += " ORDER BY " + sort_order
+
+        _delay(self.query_latency)
+        with self._lock:
+            self.query_count += 1
+            cursor = self._db.execute(sql, list(selection_args or []))
+            names = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return FakeCursor(self, names, rows)
+
+    def reset_counters(self):
+        self.query_count = 0
+        self.call_count = 0
+
+
+class FakeCursor:
+    """模拟 android.database.Cursor，每次方法调用计入 call_latency"""
+
+    def __init__(self, provider, columns, rows):
+        self._provider = provider
+        self._columns = columns
+        self._rows = rows
+        self._position = -1
+        self._closed = False
+
+    def _call(self):
+        provider = self._provider
+        provider.call_count += 1
+        _delay(provider.call_latency)
+
+    def _value(self, column_index):
+        return self._rows[self._position][column_index]
+
+    def getCount(self):
+        self._call()
+        return len(self._rows)
+
+    def getColumnCount(self):
+        self._call()
+        return len(self._columns)
+
+    def getColumnNames(self):
+        self._call()
+        return list(self._columns)
+
+    def getColumnIndex(self, column):
+        self._call()
+        try:
+            return self._columns.index(column)
+        except ValueError:
+            return -1
+
+    def getPosition(self):
+        self._call()
+        return self._position
+
+    def moveToFirst(self):
+        return self.moveToPosition(0)
+
+    def moveToPosition(self, position):
+        self._call()
+        if position < -1 or position > len(self._rows):
+            return False
+        self._position = position
+        return 0 <= position < len(self._rows)
+
+    def moveToNext(self):
+        self._call()
+        if self._position < len(self._rows):
+            self._position += 1
+        return self._position < len(self._rows)
+
+    def isAfterLast(self):
+        self._call()
+        return self._position >= len(self._rows)
+
+    def isNull(self, column_index):
+        self._call()
+        return self._value(column_index) is None
+
+    def getString(self, column_index):
+        self._call()
+        value = self._value(column_index)
+        return None if value is None else str(value)
+
+    def getLong(self, column_index):
+        self._call()
+        value = self._value(column_index)
+        return int(value) if value is not None else 0
+
+    getInt = getLong
+
+    def close(self):
+        self._call()
+        self._closed = True
+
+    def isClosed(self):
+        return self._closed
+
+    def _pack_rows(self, columns, types, max_rows):
+        """CursorPacker 使用：在一次“JNI调用”内读出一页原始数据"""
+        rows = []
+        while (max_rows <= 0 or len(rows) < max_rows) and self._position + 1 < len(self._rows):
+            self._position += 1
+            row = self._rows[self._position]
+            values = []
+            for column_index, kind in zip(columns, types):
+                value = row[column_index] if column_index >= 0 else None
+                if value is not None:
+                    value = int(value) if kind == "L" else str(value)
+                values.append(value)
+            rows.append(values)
+        return rows
+
+
+class FakeCursorPacker:
+    """com.example.contacts.CursorPacker 的替身，一页只计一次调用开销"""
+
+    @staticmethod
+    def pack(cursor, columns, types, max_rows):
+        cursor._call()
+        return encode_rows(cursor._pack_rows(list(columns), types, max_rows), types)
+
+
+class FakeContentResolver:
+    """android.content.ContentResolver 的替身"""
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    def query(self, uri, projection, selection, selection_args, sort_order):
+        return self.provider.query(uri, projection, selection, selection_args, sort_order)
+
+    def registerContentObserver(self, uri, notify_for_descendants, observer):
+        self.provider.register_observer(uri, notify_for_descendants, observer)
+
+    def unregisterContentObserver(self, observer):
+        self.provider.unregister_observer(observer)
+
+    def notifyChange(self, uri, observer=None):
+        self.provider.notify_change(str(uri))
+
+
+class FakeContactsObserver:
+    """com.example.contacts.ContactsObserver 的替身，把 provider 的 onChange 转给监听对象"""
+
+    def __init__(self, listener):
+        self.listener = listener
+
+    def onChange(self, self_change, uri):
+        self.listener.onContactsChanged(self_change, uri)
+
+
+class FakeAutoclass:
+    """按类名返回替身类，用法同 jnius.autoclass"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        resolver = FakeContentResolver(provider)
+        activity = SimpleNamespace(getContentResolver=lambda: resolver)
+
+        self._classes = {
+            name: SimpleNamespace(**fields) for name, fields in CONTRACT_CLASSES.items()
+        }
+        self._classes["org.kivy.android.PythonActivity"] = SimpleNamespace(mActivity=activity)
+        self._classes["com.example.contacts.CursorPacker"] = FakeCursorPacker
+        self._classes["com.example.contacts.ContactsObserver"] = FakeContactsObserver
+        self._classes["android.os.Process"] = SimpleNamespace(setThreadPriority=lambda priority: None)
+
+    def __call__(self, name):
+        try:
+            return self._classes[name]
+        except KeyError:
+            raise ValueError(f"替身环境中没有这个类: {name}")
+
+
+def install(provider):
+    """让 android_bridge 使用替身 provider，返回桥接对象"""
+    android_bridge.set_autoclass(FakeAutoclass(provider))
+    return android_bridge.get_bridge()
+
+
+if __name__ == "__main__":
+    # 在桌面上测量两种读取方式的耗时
+    from contacts_extractor import BulkContactExtractor
+
+    contacts = [
+        {
+            "name": f"联系人{i}",
+            "phones": [{"number": f"138{i:08d}", "type": "手机"}],
+            "emails": [{"address": f"user{i}@example.com", "type": "工作"}] if i % 3 == 0 else [],
+            "addresses": [],
+            "company": "科技有限公司" if i % 2 == 0 else "",
+        }
+        for i in range(5000)
+    ]
+    provider = FakeContactsProvider(contacts, query_latency=0.02, call_latency=0.00001)
+    bridge = install(provider)
+
+    for label, packer in (("逐单元格读取", None), ("CursorPacker", bridge.get_class("com.example.contacts.CursorPacker"))):
+        provider.reset_counters()
+        start = time.perf_counter()
+        result = BulkContactExtractor(bridge.content_resolver, bridge.ContactsContract, packer).extract_all()
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {len(result)} 个联系人, {elapsed * 1000:.1f} ms, "
+              f"{provider.query_count} 次查询, {provider.call_count} 次游标调用")
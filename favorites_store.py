@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+收藏持久化
+收藏按联系人的 LOOKUP_KEY 记录，联系人ID因合并、同步变化后仍能匹配；
+内存中用集合判断，修改后延迟合并写盘
+"""
+import os
+import json
+import threading
+
+# 修改后延迟写盘的时间（秒），连续操作只写一次
+FLUSH_DELAY = 2.0
+
+
+def lookup_segments(lookup_key):
+    """合并联系人的 LOOKUP_KEY 由各原始联系人的键用 '.' 连接"""
+    return [segment for segment in lookup_key.split(".") if segment]
+
+
+class FavoritesStore:
+    """收藏集合
+
+    有 LOOKUP_KEY 的联系人按键的各段匹配，没有键的（如模拟数据）按ID匹配。
+    """
+
+    def __init__(self, path, flush_delay=FLUSH_DELAY, timer_factory=threading.Timer):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._timer_factory = timer_factory
+
+        self._keys = set()
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+
+        self.load()
+
+    def load(self):
+        """从磁盘读取收藏"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._keys = set(data.get("lookup_keys", []))
+                self._ids = set(data.get("ids", []))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取收藏失败: {str(e)}")
+
+    def contains(self, contact):
+        """联系人是否已收藏"""
+        lookup_key = contact.get("lookup_key")
+        if lookup_key:
+            keys = self._keys
+            return any(segment in keys for segment in lookup_segments(lookup_key))
+        return contact["id"] in self._ids
+
+    __contains__ = contains
+
+    def __len__(self):
+        return len(self._keys) + len(self._ids)
+
+    def add(self, contact):
+        with self._lock:
+            lookup_key = contact.get("lookup_key")
+            if lookup_key:
+                self._keys.update(lookup_segments(lookup_key))
+            else:
+                self._ids.add(contact["id"])
+        self._schedule_flush()
+
+    def remove(self, contact):
+        with self._lock:
+            lookup_key = contact.get("lookup_key")
+            if lookup_key:
+                self._keys.difference_update(lookup_segments(lookup_key))
+            self._ids.discard(contact["id"])
+        self._schedule_flush()
+
+    def toggle(self, contact):
+        """切换收藏状态，返回切换后是否已收藏"""
+        if self.contains(contact):
+            self.remove(contact)
+            return False
+        self.add(contact)
+        return True
+
+    def _schedule_flush(self):
+        """延迟写盘，已有计划时不重复安排"""
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                return
+            self._timer = self._timer_factory(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """把未保存的修改写入磁盘"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            data = {"lookup_keys": sorted(self._keys), "ids": sorted(self._ids)}
+            self._dirty = False
+
+        try:
+            with self._write_lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"保存收藏失败: {str(e)}")
+            with self._lock:
+                self._dirty = True
+            return False
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+联系人获取协调器
+同一时间只保留一个进行中的获取任务：重复请求合并到进行中的任务，
+更高优先级的请求在页与页之间取消旧任务，每个任务带代号，过期结果在到达界面前丢弃
+"""
+import threading
+
+from android_bridge import detach_thread
+
+# 任务类型，数值大的可以取代数值小的；索引重建不产生界面结果，不推进代号
+FETCH_INDEX = 0
+FETCH_SYNC = 1
+FETCH_FULL = 2
+
+
+class FetchToken:
+    """一次获取任务的代号与取消标记"""
+
+    def __init__(self, generation, kind):
+        self.generation = generation
+        self.kind = kind
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """请求取消，任务在下一页之前停止"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class FetchCoordinator:
+    """合并、取消并标记后台获取任务"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current = None
+        self._follow_up = None
+
+    def request(self, kind, target, rerun=False):
+        """请求一次获取，target(token) 在后台线程执行
+
+        已有同级或更高级的任务在进行时合并到该任务并返回它的 token；
+        rerun 为真时，在该任务结束后再补跑一次本请求，避免漏掉期间的变更；
+        多个补跑请求只保留级别最高的一个。
+        """
+        with self._lock:
+            current = self._current
+            if current is not None and not current.cancelled:
+                if current.kind >= kind:
+                    if rerun and (self._follow_up is None or kind >= self._follow_up[0]):
+                        self._follow_up = (kind, target)
+                    return current
+                current.cancel()
+
+            if kind > FETCH_INDEX:
+                self._generation += 1
+            token = FetchToken(self._generation, kind)
+            self._current = token
+            self._follow_up = None
+
+        thread = threading.Thread(target=self._run, args=(token, target))
+        thread.daemon = True
+        thread.start()
+        return token
+
+    def _run(self, token, target):
+        try:
+            target(token)
+        except Exception as e:
+            print(f"获取任务失败: {str(e)}")
+        finally:
+            detach_thread()
+            follow_up = None
+            with self._lock:
+                if self._current is token:
+                    self._current = None
+                    follow_up, self._follow_up = self._follow_up, None
+
+            if follow_up is not None:
+                self.request(*follow_up)
+
+    @property
+    def generation(self):
+        """最新任务的代号"""
+        return self._generation
+
+    def is_current(self, generation):
+        """结果是否来自最新的任务"""
+        return generation == self._generation
+
+    def cancel(self):
+        """取消进行中的任务"""
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._follow_up = None
+
+    @property
+    def busy(self):
+        """是否有任务在进行"""
+        with self._lock:
+            return self._current is not None
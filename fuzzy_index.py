@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+模糊搜索索引
+姓名、公司和邮箱按两个字符一组（n-gram）建倒排表，查询时先按共有的 n-gram 数量挑出候选，
+只对得分最高的若干个候选计算编辑距离并排序，不必和每个联系人逐个比较；
+相邻字符对调算一次编辑，"gmial" 可以找到 "zhang@gmail.com"
+"""
+import heapq
+import threading
+from array import array
+from collections import Counter
+
+# n-gram 长度
+NGRAM_SIZE = 2
+
+# 计算编辑距离的候选数量
+RERANK_LIMIT = 64
+
+# 出现在超过该比例联系人中的 n-gram 不参与计数（如 "co"、"ma"），区分度低且倒排表很长
+STOP_GRAM_RATIO = 0.2
+
+# 增量修改累计超过该数量后整体重建
+COMPACT_LIMIT = 500
+
+
+def contact_texts(contact):
+    """参与模糊搜索的字段，小写；摘要记录没有邮箱"""
+    emails = contact.get("emails") or ()
+    texts = [contact.get("name", ""), contact.get("company", "")]
+    texts.extend(email["address"] for email in emails)
+    return tuple(text.lower() for text in texts if text)
+
+
+def collect_texts(contacts, texts):
+    """逐个生成联系人，同时把 (联系人ID, 字段) 收集到 texts，与 phone_index.collect_numbers 配合使用"""
+    for contact in contacts:
+        texts.append((contact["id"], contact_texts(contact)))
+        yield contact
+
+
+def ngrams(text):
+    """文本中不重复的 n-gram"""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def max_edits(query):
+    """允许的编辑次数，查询越长越宽松；相邻两个字符对调算一次编辑"""
+    if len(query) < 3:
+        return 0
+    if len(query) < 6:
+        return 1
+    return 2
+
+
+def substring_distance(query, text):
+    """query 与 text 中最接近的一段之间的编辑距离，相邻字符对调算一次（OSA 距离）
+
+    Myers 位并行算法加上 Hyyrö 的对调扩展，每个字符只做几次整数运算，适合在候选上逐个计算。
+    """
+    size = len(query)
+    if not size:
+        return 0
+    peq = {}
+    for i, char in enumerate(query):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    full = (1 << size) - 1
+    top = 1 << (size - 1)
+    pv, mv = full, 0
+    d0 = prev_eq = 0
+    score = best = size
+    for char in text:
+        eq = peq.get(char, 0)
+        # 上一列没有匹配、与前一个字符交叉相等的位置可以通过对调到达
+        tr = (((~d0) & eq) << 1) & prev_eq
+        d0 = ((((eq & pv) + pv) ^ pv) | eq | mv | tr) & full
+        ph = (mv | ~(d0 | pv)) & full
+        mh = pv & d0
+        if ph & top:
+            score += 1
+        elif mh & top:
+            score -= 1
+            if score < best:
+                best = score
+                if not best:
+                    break
+        # 匹配可以从 text 的任意位置开始，第一行不累加
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(d0 | ph)) & full
+        mv = ph & d0
+        prev_eq = eq
+    return best
+
+
+class FuzzyIndex:
+    """n-gram 倒排索引
+
+    每个联系人占一个槽位，倒排表记录槽位号；增量修改时旧槽位作废、新槽位追加到末尾，
+    作废的槽位累计过多时整体重建。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+        # 槽位对应的联系人ID（作废的为 None）和字段
+        self._ids = []
+        self._texts = []
+        self._slots = {}
+        self._postings = {}
+        self._removed = 0
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def rebuild(self, contacts):
+        """用联系人列表重建索引，完整记录才有邮箱"""
+        texts = []
+        for _ in collect_texts(contacts, texts):
+            pass
+        self.rebuild_texts(texts)
+
+    def rebuild_texts(self, texts):
+        """用 collect_texts 收集的 (联系人ID, 字段) 重建索引"""
+        ids = []
+        fields = []
+        slots = {}
+        postings = {}
+        for contact_id, contact_fields in texts:
+            self._add(contact_id, contact_fields, ids, fields, slots, postings)
+        with self._lock:
+            self._ids, self._texts, self._slots, self._postings = ids, fields, slots, postings
+            self._removed = 0
+            self._ready = True
+
+    @staticmethod
+    def _add(contact_id, contact_fields, ids, fields, slots, postings):
+        slot = len(ids)
+        ids.append(contact_id)
+        fields.append(contact_fields)
+        slots[contact_id] = slot
+        grams = set()
+        for text in contact_fields:
+            grams |= ngrams(text)
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array('I')
+            posting.append(slot)
+
+    def update(self, contacts, deleted_ids=()):
+        """更新有变化的联系人，删除已删除的联系人"""
+        with self._lock:
+            for contact_id in deleted_ids:
+                self._remove(contact_id)
+            for contact in contacts:
+                self._remove(contact["id"])
+                self._add(contact["id"], contact_texts(contact),
+                          self._ids, self._texts, self._slots, self._postings)
+
+            if self._removed > COMPACT_LIMIT:
+                live = [(contact_id, fields) for contact_id, fields in zip(self._ids, self._texts)
+                        if contact_id is not None]
+                ids, fields, slots, postings = [], [], {}, {}
+                for contact_id, contact_fields in live:
+                    self._add(contact_id, contact_fields, ids, fields, slots, postings)
+                self._ids, self._texts, self._slots, self._postings = ids, fields, slots, postings
+                self._removed = 0
+
+    def _remove(self, contact_id):
+        slot = self._slots.pop(contact_id, None)
+        if slot is not None:
+            self._ids[slot] = None
+            self._removed += 1
+
+    def search(self, text, limit=RERANK_LIMIT):
+        """返回按相似程度排序的联系人ID列表；索引未建好或查询太短时返回 None
+
+        先按共有的 n-gram 数量取前 limit 个候选，再按编辑距离（相同时按共有数量）排序，
+        超过允许编辑次数的候选丢弃。
+        """
+        query = " ".join(text.lower().split())
+        edits = max_edits(query)
+        if not edits or not self._ready:
+            # 太短的查询不容错，按普通搜索处理
+            return None
+
+        grams = ngrams(query)
+        with self._lock:
+            postings = self._postings
+            stop_size = max(int(len(self._slots) * STOP_GRAM_RATIO), 1)
+            lists = sorted((postings.get(gram, ()) for gram in grams), key=len)
+
+            # 每次编辑最多破坏 NGRAM_SIZE 个 n-gram（对调最多 NGRAM_SIZE + 1 个），
+            # 共有数量低于下限的不可能在允许的编辑次数内
+            threshold = len(grams) - (NGRAM_SIZE + 1) * edits
+            counts = Counter()
+            for i, posting in enumerate(lists):
+                if i and len(posting) > stop_size:
+                    # 常见 n-gram 不计数，下限相应降低
+                    threshold -= len(lists) - i
+                    break
+                counts.update(posting)
+            threshold = max(threshold, 1)
+
+            ids = self._ids
+            candidates = heapq.nlargest(
+                limit,
+                ((count, slot) for slot, count in counts.items() if count >= threshold and ids[slot] is not None)
+            )
+
+            ranked = []
+            for count, slot in candidates:
+                distance = min(substring_distance(query, field) for field in self._texts[slot])
+                if distance <= edits:
+                    ranked.append((distance, -count, slot))
+            ranked.sort()
+            return [ids[slot] for _, _, slot in ranked]
@@ -0,0 +1,30 @@
+package com.example.contacts;
+
+import android.database.ContentObserver;
+import android.net.Uri;
+import android.os.Handler;
+
+/**
+ * 通讯录变更监听
+ * pyjnius 只能实现接口，不能继承 ContentObserver，
+ * 这里把 onChange 转发给 Python 端实现的 Listener。
+ */
+public class ContactsObserver extends ContentObserver {
+
+    public interface Listener {
+        void onContactsChanged(boolean selfChange, Uri uri);
+    }
+
+    private final Listener listener;
+
+    public ContactsObserver(Listener listener) {
+        // 不指定 Handler，回调在 binder 线程上执行
+        super((Handler) null);
+        this.listener = listener;
+    }
+
+    @Override
+    public void onChange(boolean selfChange, Uri uri) {
+        listener.onContactsChanged(selfChange, uri);
+    }
+}
@@ -0,0 +1,66 @@
+package com.example.contacts;
+
+import android.database.Cursor;
+
+import java.io.ByteArrayOutputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.nio.charset.StandardCharsets;
+
+/**
+ * 把游标的若干行一次性打包成字节数组
+ * Python 端每页只需一次JNI调用，再用 contacts_native.decode_rows 解码。
+ *
+ * 格式（大端）：
+ *   "CPK1" | int32 列数 | int32 行数 | 逐行逐列的单元格
+ *   单元格：tag(1字节) 0=NULL，1=字符串(int32 长度 + UTF-8)，2=整数(int64)
+ */
+public final class CursorPacker {
+
+    public static final byte TAG_NULL = 0;
+    public static final byte TAG_STRING = 1;
+    public static final byte TAG_LONG = 2;
+
+    private CursorPacker() {
+    }
+
+    /**
+     * 从游标当前位置向后读取最多 maxRows 行（maxRows <= 0 表示读到末尾）
+     *
+     * @param columns 要读取的列索引
+     * @param types   每列的类型，'S' 为字符串，'L' 为整数
+     */
+    public static byte[] pack(Cursor cursor, int[] columns, String types, int maxRows) throws IOException {
+        ByteArrayOutputStream body = new ByteArrayOutputStream(64 * 1024);
+        DataOutputStream out = new DataOutputStream(body);
+
+        int rows = 0;
+        while ((maxRows <= 0 || rows < maxRows) && cursor.moveToNext()) {
+            for (int i = 0; i < columns.length; i++) {
+                int column = columns[i];
+                if (column < 0 || cursor.isNull(column)) {
+                    out.writeByte(TAG_NULL);
+                } else if (types.charAt(i) == 'L') {
+                    out.writeByte(TAG_LONG);
+                    out.writeLong(cursor.getLong(column));
+                } else {
+                    byte[] bytes = cursor.getString(column).getBytes(StandardCharsets.UTF_8);
+                    out.writeByte(TAG_STRING);
+                    out.writeInt(bytes.length);
+                    out.write(bytes);
+                }
+            }
+            rows++;
+        }
+        out.flush();
+
+        ByteArrayOutputStream result = new ByteArrayOutputStream(body.size() + 12);
+        DataOutputStream header = new DataOutputStream(result);
+        header.writeBytes("CPK1");
+        header.writeInt(columns.length);
+        header.writeInt(rows);
+        header.flush();
+        body.writeTo(result);
+        return result.toByteArray();
+    }
+}
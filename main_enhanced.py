@@ -7,15 +7,17 @@ import os
 import sys
 import csv
 import json
+import time
+import threading
 from datetime import datetime
 from kivy.lang import Builder
-from kivy.properties import ListProperty, StringProperty
+from kivy.properties import ListProperty, ObjectProperty
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.clock import Clock
 from kivy.core.text import LabelBase
 from kivy.core.image import Image as CoreImage
 from kivymd.app import MDApp
-from kivymd.uix.list import TwoLineAvatarListItem, ThreeLineAvatarListItem
+from kivymd.uix.list import TwoLineListItem, TwoLineAvatarListItem, ThreeLineAvatarListItem
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.button import MDFlatButton, MDRectangleFlatButton
 from kivymd.uix.progressbar import MDProgressBar
@@ -24,9 +26,30 @@ from kivymd.uix.menu import MDDropdownMenu
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.filemanager import MDFileManager
 from kivymd.toast import toast
-import threading
 from io import BytesIO
 
+from contacts_extractor import BulkContactExtractor, PAGE_SIZE
+from contacts_sync import (
+    ContactSnapshotStore, IncrementalSync, apply_changes, diff_contacts, current_millis, ID_BATCH_SIZE
+)
+from contacts_observer import create_contacts_observer
+from contacts_native import get_cursor_packer
+from android_bridge import get_bridge, detach_thread
+from fetch_coordinator import FetchCoordinator, FETCH_FULL, FETCH_SYNC, FETCH_INDEX
+from contact_details import ContactDetailLoader, summarize_contact, is_summary
+from contact_record import as_dict
+from contact_store import ContactColumns, bitmap_from_indices, bitmap_indices
+from favorites_store import FavoritesStore
+from search_index import ContactSearchIndex
+from pinyin_index import PinyinIndex
+from t9_index import T9Index
+from phone_index import PhoneIndex, collect_numbers
+from fuzzy_index import FuzzyIndex, collect_texts
+from search_pipeline import SearchPipeline, SEARCH_DEBOUNCE, LATENCY_SAMPLES
+from search_cache import QueryCache
+from detail_prefetch import DetailPrefetcher, PREFETCH_AHEAD
+from contacts_generator import get_mock_contacts, install_fake_provider
+
 # 修复Kivy的KV文件加载编码问题
 original_load_file = Builder.load_file
 def load_file_with_encoding(filename, **kwargs):
@@ -50,12 +73,23 @@ Builder.load_file = load_file_with_encoding
 try:
     from android.permissions import request_permissions, Permission, check_permission
     from android.storage import primary_external_storage_path
-    from jnius import autoclass, cast
     IS_ANDROID = True
 except ImportError:
     IS_ANDROID = False
     print("未在安卓环境中运行，将使用模拟数据")
 
+# 桌面环境设置 CONTACTS_FAKE_PROVIDER=1 时安装 provider 替身，获取、同步、监听都走与安卓相同的桥接代码
+FAKE_PROVIDER = None if IS_ANDROID else install_fake_provider()
+USE_BRIDGE = IS_ANDROID or FAKE_PROVIDER is not None
+
+
+def has_contacts_permission():
+    """是否可以读取通讯录，桌面环境总是可以"""
+    return not IS_ANDROID or check_permission(Permission.READ_CONTACTS)
+
+# 使用 Java 端 CursorPacker 按页读取游标，减少逐单元格的JNI调用
+USE_NATIVE_CURSOR = True
+
 KV = '''
 ScreenManager:
     MainScreen:
@@ -130,10 +164,11 @@ ScreenManager:
         orientation: 'vertical'
         
         MDTopAppBar:
+            id: toolbar
             title: '通讯录联系人'
             elevation: 10
             left_action_items: [["arrow-left", lambda x: app.go_back()]]
-            right_action_items: [["refresh", lambda x: app.refresh_contacts()], ["magnify", lambda x: app.show_search_dialog()]]
+            right_action_items: app.contacts_action_items(False)
             font_name: 'ChineseFont'
             
         MDBoxLayout:
@@ -148,7 +183,7 @@ ScreenManager:
                 mode: "fill"
                 size_hint_x: 0.7
                 font_name: 'ChineseFont'
-                on_text: app.filter_contacts(self.text)
+                on_text: app.on_search_text(self.text)
                 
             MDRaisedButton:
                 text: '筛选'
@@ -157,6 +192,8 @@ ScreenManager:
                 font_name: 'ChineseFont'
                 
         ScrollView:
+            id: contacts_scroll
+            on_scroll_y: app.schedule_prefetch()
             MDList:
                 id: contacts_list
                 padding: dp(10)
@@ -272,8 +309,7 @@ class ContactDetailScreen(Screen):
 class EnhancedContactsApp(MDApp):
     contacts = ListProperty([])
     all_contacts = ListProperty([])
-    current_contact = StringProperty('')
-    favorites = ListProperty([])
+    current_contact = ObjectProperty(None, allownone=True)
     
     def build(self):
         # 注册中文字体
@@ -286,6 +322,78 @@ class EnhancedContactsApp(MDApp):
         # 初始化文件管理器
         self.file_manager = None
         
+        # 本地快照，用于增量同步
+        self.snapshot_store = ContactSnapshotStore(
+            os.path.join(self.user_data_dir, 'contacts_snapshot.bin')
+        )
+        self.last_sync = 0
+        
+        # 冷启动时分帧显示快照，显示完之前不做同步，否则会用不完整的列表覆盖快照
+        self._restoring = False
+        self._refresh_after_restore = False
+        
+        # 最近一次完整显示的联系人列表，在界面线程上复制为元组；后台同步以它为基础，不读取 all_contacts
+        self._complete_contacts = ()
+        
+        # 合并重复的获取请求，丢弃过期结果
+        self.fetch_coordinator = FetchCoordinator()
+        
+        # 号码、模糊和全文索引还没有用完整记录补齐时为真，第一次搜索时在后台补齐
+        self._full_indexes_pending = True
+        
+        # 通讯录变更监听，拿到读取权限后才注册
+        self.contacts_observer = None
+        
+        # 列表只保存摘要，详情按需加载并缓存
+        self.detail_loader = ContactDetailLoader(self._fetch_contact_details)
+        
+        # 滚动停下后预取可见范围内联系人的详情
+        self.detail_prefetcher = DetailPrefetcher(self.detail_loader)
+        self._prefetch_trigger = Clock.create_trigger(self._prefetch_visible, 0.15)
+        
+        # 收藏按 LOOKUP_KEY 保存在本地，联系人ID变化后仍然有效
+        self.favorites = FavoritesStore(os.path.join(self.user_data_dir, 'favorites.json'))
+        
+        # 导出在后台线程读取完整记录，同一时间只进行一次
+        self._exporting = False
+        
+        # 本地全文索引，搜索时不再逐个扫描联系人
+        self.search_index = ContactSearchIndex(os.path.join(self.user_data_dir, 'contacts_search.db'))
+        
+        # 内存中的拼音索引，用全拼或首字母搜索中文姓名
+        self.pinyin_index = PinyinIndex()
+        
+        # 拨号盘数字搜索：姓名拼音换成数字串做前缀匹配
+        self.t9_index = T9Index()
+        
+        # 规范化后的全部号码，输入号码的任意一段（如末尾几位）即可找到联系人
+        self.phone_index = PhoneIndex()
+        
+        # 姓名、公司和邮箱的 n-gram 索引，开启模糊搜索时容忍输入错误并按相似程度排序
+        self.fuzzy_index = FuzzyIndex()
+        self.fuzzy_search = False
+        
+        # 输入停顿后才搜索，匹配在后台线程进行，只显示最新查询的结果
+        self.search_pipeline = SearchPipeline(self._match_contacts, self._deliver_search_result)
+        self._search_trigger = Clock.create_trigger(self._submit_search, SEARCH_DEBOUNCE)
+        self._search_text = ""
+        self._search_keystroke = 0.0
+        
+        # 最近查询的结果，列表或索引变化时整体作废
+        self.search_cache = QueryCache()
+        
+        # 列式存储，按类型筛选和计数时使用，列表变化后重建
+        self.contact_store = None
+        
+        # 有邮箱、有地址的联系人ID；列表查询不读取这两类数据，第一次按它们筛选或计数时查询
+        self._data_flags = None
+        self._data_flags_store = None
+        
+        # 当前的筛选条件和搜索结果，都以列式存储的行位图表示，显示时求交集
+        self.active_filters = set()
+        self.filter_any = False
+        self._search_result = None
+        
         return Builder.load_string(KV)
     
     def register_chinese_fonts(self):
@@ -317,8 +425,53 @@ class EnhancedContactsApp(MDApp):
     
     def on_start(self):
         """应用启动时检查权限"""
+        if USE_BRIDGE:
+            # 预先解析类句柄和通讯录常量，首次获取时不再逐个反射查询
+            get_bridge().warm_up()
         if IS_ANDROID:
             self.check_permissions()
+        
+        self.detail_prefetcher.start()
+        self.search_pipeline.start()
+        
+        # 先显示上次保存的联系人，再在后台校验
+        self._restore_snapshot()
+        
+        # 监听通讯录变更；首次启动还没有权限时，在授权回调中再注册
+        if has_contacts_permission():
+            self._start_contacts_observer()
+    
+    def _start_contacts_observer(self):
+        """监听通讯录变更，合并后做增量同步；已在监听时不重复注册"""
+        if self.contacts_observer is not None:
+            return
+        try:
+            observer = create_contacts_observer(self._on_contacts_changed, bridge=USE_BRIDGE)
+            observer.start()
+            self.contacts_observer = observer
+        except Exception as e:
+            print(f"注册通讯录监听失败: {str(e)}")
+    
+    def on_stop(self):
+        """应用退出时注销监听"""
+        if self.contacts_observer is not None:
+            self.contacts_observer.stop()
+        self.detail_prefetcher.stop()
+        self.search_pipeline.stop()
+        if self.search_pipeline.latency.samples:
+            print(self.search_pipeline.latency.summary())
+        self.favorites.flush()
+        self.search_index.close()
+    
+    def _on_contacts_changed(self, uris):
+        """通讯录变更回调，在去抖计时线程上执行"""
+        # 还没有加载过联系人时无需同步；快照还在显示时，显示完成后的校验会带上这些变更
+        if not self._complete_contacts or self._restoring:
+            return
+        # 正在进行的任务结束后补跑一次，避免漏掉期间的变更
+        self.fetch_coordinator.request(
+            FETCH_SYNC, lambda token: self._sync_contacts(token, quiet=True), rerun=True
+        )
     
     def check_permissions(self):
         """检查并请求权限"""
@@ -331,6 +484,8 @@ class EnhancedContactsApp(MDApp):
             
             if has_permission:
                 self.show_status("已有读取联系人权限")
+                # 在系统设置中授权的情况下，这里补注册监听
+                self._start_contacts_observer()
             else:
                 self.show_status("正在请求读取联系人权限...")
                 request_permissions([Permission.READ_CONTACTS], self.permission_callback)
@@ -343,6 +498,10 @@ class EnhancedContactsApp(MDApp):
         if all(results):
             self.show_status("已获得读取联系人权限")
             toast("已获得读取联系人权限")
+            Clock.schedule_once(lambda dt: self._start_contacts_observer())
+            # 启动时显示的缓存联系人在拿到权限后校验
+            if self.all_contacts:
+                Clock.schedule_once(lambda dt: self._revalidate_contacts())
         else:
             self.show_status("未获得读取联系人权限")
             self.show_permission_dialog()
@@ -367,10 +526,69 @@ class EnhancedContactsApp(MDApp):
         dialog.ids.text_content.font_name = 'ChineseFont'
         dialog.open()
     
+    def _restore_snapshot(self):
+        """冷启动时立即显示上次保存的联系人，之后在后台校验并只替换有变化的部分"""
+        snapshot = self.snapshot_store.open()
+        if snapshot is None:
+            return
+        if not len(snapshot):
+            snapshot.close()
+            return
+        
+        # 快照按需解码，第一页马上显示，其余各页分帧追加；
+        # 只有全量获取会中止显示，增量同步等到显示完成后再开始
+        self.last_sync = snapshot.last_sync
+        self._restoring = True
+        self._restore_snapshot_page(snapshot, 0)
+    
+    def _restore_snapshot_page(self, snapshot, start):
+        """从快照解码并追加一页"""
+        if not self._restoring:
+            snapshot.close()
+            return
+        
+        try:
+            page = snapshot[start:start + PAGE_SIZE]
+        except Exception as e:
+            print(f"读取联系人快照失败: {str(e)}")
+            snapshot.close()
+            self._restoring = False
+            self._refresh_after_restore = False
+            return
+        self._append_contacts_page(page, start == 0)
+        
+        start += PAGE_SIZE
+        if start < len(snapshot):
+            Clock.schedule_once(lambda dt: self._restore_snapshot_page(snapshot, start))
+            return
+        
+        snapshot.close()
+        self._restoring = False
+        self._complete_contacts = tuple(self.all_contacts)
+        self.show_status(f'已显示缓存的 {len(self.all_contacts)} 个联系人，正在后台更新...')
+        if self._refresh_after_restore:
+            # 显示期间点了刷新，按刷新处理
+            self._refresh_after_restore = False
+            self.fetch_coordinator.request(FETCH_SYNC, self._sync_contacts)
+        elif has_contacts_permission():
+            self._revalidate_contacts()
+    
+    def _revalidate_contacts(self):
+        """后台校验当前列表，没有变化时不打扰用户；快照显示完成后会自动校验"""
+        if self._restoring:
+            return
+        self.fetch_coordinator.request(
+            FETCH_SYNC, lambda token: self._sync_contacts(token, quiet=True), rerun=True
+        )
+    
     def get_contacts(self):
         """获取通讯录"""
         self.show_status("正在获取通讯录...")
         
+        # 全量获取会替换整个列表，不再继续显示快照
+        self._restoring = False
+        self._refresh_after_restore = False
+        
         # 禁用按钮
         main_screen = self.root.get_screen('main')
         main_screen.ids.get_contacts_btn.disabled = True
@@ -380,232 +598,272 @@ class EnhancedContactsApp(MDApp):
         contacts_screen.ids.progress_bar.opacity = 1
         contacts_screen.ids.progress_bar.start()
         
-        # 在后台线程中获取联系人
-        thread = threading.Thread(target=self._fetch_contacts)
-        thread.daemon = True
-        thread.start()
+        # 在后台线程中获取联系人，已有获取任务时合并到该任务
+        self.fetch_coordinator.request(FETCH_FULL, self._fetch_contacts)
     
-    def _fetch_contacts(self):
-        """在后台获取联系人"""
+    def _fetch_contacts(self, token):
+        """在后台分页获取联系人，每读完一页就交给界面显示"""
+        generation = token.generation
+        pages = self._iter_contact_pages()
         try:
-            if IS_ANDROID:
-                contacts_data = self._get_real_contacts_enhanced()
-            else:
-                contacts_data = self._get_mock_contacts_enhanced()
-            
-            # 更新UI
-            Clock.schedule_once(lambda dt: self._update_contacts_list(contacts_data))
-            
-        except Exception as e:
-            Clock.schedule_once(lambda dt: self._show_error(str(e)))
-    
-    def _get_real_contacts_enhanced(self):
-        """获取增强的真实安卓联系人信息"""
-        if not IS_ANDROID:
-            return self._get_mock_contacts_enhanced()
+            sync_time = current_millis()
+            contacts_data = []
+            for page in pages:
+                # 被更新的请求取代时在页与页之间停止
+                if token.cancelled:
+                    return
+                first_page = not contacts_data
+                Clock.schedule_once(
+                    lambda dt, p=page, first=first_page: self._append_contacts_page(p, first, generation)
+                )
+                contacts_data.extend(page)
             
-        if not check_permission(Permission.READ_CONTACTS):
-            raise Exception("没有读取联系人权限")
-        
-        contacts = []
-        
-        try:
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            activity = PythonActivity.mActivity
-            content_resolver = activity.getContentResolver()
+            if token.cancelled:
+                return
             
-            ContactsContract = autoclass('android.provider.ContactsContract')
-            uri = ContactsContract.Contacts.CONTENT_URI
+            # 全量获取后旧的详情缓存不再可信
+            self.detail_loader.invalidate()
             
-            # 查询所有联系人
-            cursor = content_resolver.query(uri, None, None, None, None)
+            # 更新UI
+            total = len(contacts_data)
+            Clock.schedule_once(lambda dt: self._finish_contacts_list(total, generation))
             
-            if cursor:
-                while cursor.moveToNext():
-                    contact_info = self._extract_contact_info(cursor, content_resolver, ContactsContract)
-                    if contact_info:
-                        contacts.append(contact_info)
-                
-                cursor.close()
+            # 保存快照，之后的刷新只需增量同步
+            if self.snapshot_store.save(contacts_data, sync_time):
+                self.last_sync = sync_time
             
-            return contacts
+            # 拼音和拨号盘索引只需要姓名，用摘要直接建立；号码和模糊索引先用摘要建立，
+            # 第一次搜索时再用完整记录补齐，补齐之前不使用全文索引
+            self._full_indexes_pending = True
+            self.pinyin_index.rebuild(contacts_data)
+            self.t9_index.rebuild(contacts_data)
+            self.phone_index.rebuild(contacts_data)
+            self.fuzzy_index.rebuild(contacts_data)
+            self.search_cache.invalidate()
             
         except Exception as e:
-            print(f"获取真实联系人失败: {str(e)}")
-            return self._get_mock_contacts_enhanced()
+            # except 结束后 e 会被清除，回调执行前先取出错误信息
+            message = str(e)
+            Clock.schedule_once(lambda dt, message=message: self._show_error(message, generation))
+        finally:
+            pages.close()
     
-    def _extract_contact_info(self, cursor, content_resolver, ContactsContract):
-        """提取单个联系人的完整信息"""
+    def _sync_contacts(self, token, quiet=False):
+        """在后台增量同步联系人，quiet 为真时没有变化不提示"""
+        generation = token.generation
+        since = self.last_sync
+        # 界面线程上复制好的完整列表，同步期间界面上的列表可能被替换
+        contacts = list(self._complete_contacts)
         try:
-            # 获取联系人ID
-            id_index = cursor.getColumnIndex(ContactsContract.Contacts._ID)
-            contact_id = cursor.getString(id_index)
-            
-            # 获取基本信息
-            name_index = cursor.getColumnIndex(ContactsContract.Contacts.DISPLAY_NAME)
-            name = cursor.getString(name_index) or "未知姓名"
+            changes = self._get_contact_changes()
+            if changes is None:
+                if not contacts:
+                    # 还没有列表，改为全量获取
+                    self._fetch_contacts(token)
+                    return
+                # 无法增量同步时全量读取，与当前列表比较后只替换有变化的联系人
+                changes = self._diff_all_contacts(token, contacts)
+                if changes is None:
+                    return
             
-            # 获取头像信息
-            photo_uri_index = cursor.getColumnIndex(ContactsContract.Contacts.PHOTO_URI)
-            photo_uri = cursor.getString(photo_uri_index) or ""
+            if token.cancelled:
+                return
             
-            # 获取电话号码
-            phone_numbers = self._get_contact_phones(contact_id, content_resolver, ContactsContract)
-            
-            # 获取邮箱地址
-            email_addresses = self._get_contact_emails(contact_id, content_resolver, ContactsContract)
-            
-            # 获取地址信息
-            addresses = self._get_contact_addresses(contact_id, content_resolver, ContactsContract)
+            changed = len(changes.updated) + len(changes.deleted)
+            self.detail_loader.invalidate(
+                [contact["id"] for contact in changes.updated] + list(changes.deleted)
+            )
+            if changed == 0:
+                self.last_sync = changes.sync_time
+                Clock.schedule_once(lambda dt: self._finish_sync(None, 0, generation, quiet))
+                self._update_search_index(token, changes, contacts, since)
+                return
             
-            # 获取公司信息
-            company = self._get_contact_company(contact_id, content_resolver, ContactsContract)
+            merged = apply_changes(contacts, changes)
+            # 被更新的获取任务取代后不再保存，避免覆盖它写入的快照
+            if token.cancelled:
+                return
+            if self.snapshot_store.save(merged, changes.sync_time):
+                self.last_sync = changes.sync_time
             
-            return {
-                "id": contact_id,
-                "name": name,
-                "phone": phone_numbers[0] if phone_numbers else "",
-                "phones": phone_numbers,
-                "emails": email_addresses,
-                "addresses": addresses,
-                "company": company,
-                "photo_uri": photo_uri,
-                "avatar": None  # 将在需要时加载
-            }
+            Clock.schedule_once(lambda dt: self._finish_sync(merged, changed, generation, quiet))
+            if token.cancelled:
+                return
+            self._update_search_index(token, changes, merged, since)
             
         except Exception as e:
-            print(f"提取联系人信息失败: {str(e)}")
-            return None
+            # except 结束后 e 会被清除，回调执行前先取出错误信息
+            message = str(e)
+            Clock.schedule_once(lambda dt, message=message: self._show_error(message, generation))
     
-    def _get_contact_phones(self, contact_id, content_resolver, ContactsContract):
-        """获取联系人电话号码"""
-        phone_numbers = []
-        try:
-            phone_uri = ContactsContract.CommonDataKinds.Phone.CONTENT_URI
-            phone_selection = ContactsContract.CommonDataKinds.Phone.CONTACT_ID + " = ?"
-            phone_cursor = content_resolver.query(phone_uri, None, phone_selection, [contact_id], None)
-            
-            if phone_cursor:
-                while phone_cursor.moveToNext():
-                    phone_index = phone_cursor.getColumnIndex(ContactsContract.CommonDataKinds.Phone.NUMBER)
-                    phone_type_index = phone_cursor.getColumnIndex(ContactsContract.CommonDataKinds.Phone.TYPE)
-                    phone_number = phone_cursor.getString(phone_index)
-                    phone_type = phone_cursor.getInt(phone_type_index)
-                    
-                    phone_label = self._get_phone_type_label(phone_type)
-                    phone_numbers.append({
-                        "number": phone_number,
-                        "type": phone_label
-                    })
-                phone_cursor.close()
-                
-        except Exception as e:
-            print(f"获取电话号码失败: {str(e)}")
+    def _update_search_index(self, token, changes, contacts, since):
+        """搜索索引只更新变化的联系人；contacts 是同步后的完整列表，since 是本次同步的起点
+        
+        同步过程中不读取完整通讯录：号码、模糊和全文索引还没补齐时只用摘要更新，等第一次搜索时补齐。
+        """
+        for index in (self.pinyin_index, self.t9_index):
+            if index.ready:
+                index.update(changes.updated, changes.deleted)
+            else:
+                index.rebuild(contacts)
+        
+        # 全文索引的内容早于本次同步起点时，增量写入会漏掉中间的变更
+        index = self.search_index
+        if self._full_indexes_pending or (index.available and (not index.synced or index.synced < since)):
+            self._full_indexes_pending = True
+            for memory_index in (self.phone_index, self.fuzzy_index):
+                if memory_index.ready:
+                    memory_index.update(changes.updated, changes.deleted)
+                else:
+                    memory_index.rebuild(contacts)
+            self.search_cache.invalidate()
+            return
         
-        return phone_numbers
+        self.search_index.delete(list(changes.deleted))
+        self.phone_index.update([], changes.deleted)
+        self.fuzzy_index.update([], changes.deleted)
+        updated_ids = [contact["id"] for contact in changes.updated]
+        for start in range(0, len(updated_ids), ID_BATCH_SIZE):
+            if token.cancelled:
+                # 没写完的变更在补齐索引时按记录的同步时间补上
+                self._full_indexes_pending = True
+                return
+            details = self._fetch_contact_details(updated_ids[start:start + ID_BATCH_SIZE])
+            self.search_index.upsert(details)
+            self.phone_index.update(details)
+            self.fuzzy_index.update(details)
+        self.search_index.set_synced(changes.sync_time)
+        self.search_cache.invalidate()
     
-    def _get_contact_emails(self, contact_id, content_resolver, ContactsContract):
-        """获取联系人邮箱地址"""
-        email_addresses = []
-        try:
-            email_uri = ContactsContract.CommonDataKinds.Email.CONTENT_URI
-            email_selection = ContactsContract.CommonDataKinds.Email.CONTACT_ID + " = ?"
-            email_cursor = content_resolver.query(email_uri, None, email_selection, [contact_id], None)
-            
-            if email_cursor:
-                while email_cursor.moveToNext():
-                    email_index = email_cursor.getColumnIndex(ContactsContract.CommonDataKinds.Email.ADDRESS)
-                    email_type_index = email_cursor.getColumnIndex(ContactsContract.CommonDataKinds.Email.TYPE)
-                    email_address = email_cursor.getString(email_index)
-                    email_type = email_cursor.getInt(email_type_index)
-                    
-                    email_label = self._get_email_type_label(email_type)
-                    email_addresses.append({
-                        "address": email_address,
-                        "type": email_label
-                    })
-                email_cursor.close()
-                
-        except Exception as e:
-            print(f"获取邮箱地址失败: {str(e)}")
+    def _request_full_indexes(self):
+        """号码、模糊和全文索引还没补齐时，在后台补齐；正在获取或同步时排在其后"""
+        if self._full_indexes_pending:
+            self.fetch_coordinator.request(FETCH_INDEX, self._complete_full_indexes, rerun=True)
+    
+    def _complete_full_indexes(self, token):
+        """补齐号码、模糊和全文索引
         
-        return email_addresses
+        全文索引只补写它记录的同步时间之后的变更，号码和模糊索引由全文索引的缓存表建立；
+        没有可用的全文索引、或变更记录已被系统清理时，才读取一遍完整记录。
+        """
+        if not self._full_indexes_pending:
+            return
+        index = self.search_index
+        if USE_BRIDGE and index.synced:
+            bridge = get_bridge()
+            changes = IncrementalSync(
+                bridge.content_resolver, bridge.ContactsContract, self._get_packer()
+            ).fetch_changes(index.synced)
+            if changes is not None:
+                if token.cancelled:
+                    return
+                index.delete(list(changes.deleted))
+                index.upsert(changes.updated)
+                index.set_synced(changes.sync_time)
+                documents = index.documents()
+                self.phone_index.rebuild(documents)
+                self.fuzzy_index.rebuild(documents)
+                self._full_indexes_pending = False
+                self.search_cache.invalidate()
+                return
+        self._rebuild_full_indexes(token)
+    
+    def _rebuild_full_indexes(self, token):
+        """读取一遍完整记录，重建全文索引并顺便收集全部号码和文本重建号码索引、模糊索引"""
+        sync_time = current_millis()
+        numbers = []
+        texts = []
+        contacts = collect_texts(collect_numbers(self._iter_full_contacts(), numbers), texts)
+        if self.search_index.available:
+            if not self.search_index.rebuild(contacts, cancelled=lambda: token.cancelled, synced=sync_time):
+                return
+        else:
+            for _ in contacts:
+                if token.cancelled:
+                    return
+        self.phone_index.rebuild_numbers(numbers)
+        self.fuzzy_index.rebuild_texts(texts)
+        self._full_indexes_pending = False
+        self.search_cache.invalidate()
     
-    def _get_contact_addresses(self, contact_id, content_resolver, ContactsContract):
-        """获取联系人地址"""
-        addresses = []
+    def _diff_all_contacts(self, token, contacts):
+        """全量读取联系人并与 contacts 比较，被取消时返回 None"""
+        sync_time = current_millis()
+        fresh = []
+        pages = self._iter_contact_pages()
         try:
-            address_uri = ContactsContract.CommonDataKinds.StructuredPostal.CONTENT_URI
-            address_selection = ContactsContract.CommonDataKinds.StructuredPostal.CONTACT_ID + " = ?"
-            address_cursor = content_resolver.query(address_uri, None, address_selection, [contact_id], None)
-            
-            if address_cursor:
-                while address_cursor.moveToNext():
-                    street_index = address_cursor.getColumnIndex(ContactsContract.CommonDataKinds.StructuredPostal.STREET)
-                    city_index = address_cursor.getColumnIndex(ContactsContract.CommonDataKinds.StructuredPostal.CITY)
-                    region_index = address_cursor.getColumnIndex(ContactsContract.CommonDataKinds.StructuredPostal.REGION)
-                    
-                    street = address_cursor.getString(street_index) or ""
-                    city = address_cursor.getString(city_index) or ""
-                    region = address_cursor.getString(region_index) or ""
-                    
-                    full_address = f"{street} {city} {region}".strip()
-                    if full_address:
-                        addresses.append(full_address)
-                address_cursor.close()
-                
-        except Exception as e:
-            print(f"获取地址失败: {str(e)}")
+            for page in pages:
+                if token.cancelled:
+                    return None
+                fresh.extend(page)
+        finally:
+            pages.close()
+        return diff_contacts(contacts, fresh, sync_time)
+    
+    def _get_contact_changes(self):
+        """查询上次同步之后的联系人变更，无法增量同步时返回 None"""
+        if not (USE_BRIDGE and self.last_sync):
+            return None
+        
+        if not has_contacts_permission():
+            raise Exception("没有读取联系人权限")
         
-        return addresses
+        bridge = get_bridge()
+        return IncrementalSync(
+            bridge.content_resolver, bridge.ContactsContract, self._get_packer(), summary=True
+        ).fetch_changes(self.last_sync)
     
-    def _get_contact_company(self, contact_id, content_resolver, ContactsContract):
-        """获取联系人公司信息"""
-        company = ""
-        try:
-            org_uri = ContactsContract.Data.CONTENT_URI
-            org_selection = (ContactsContract.Data.CONTACT_ID + " = ? AND " +
-                           ContactsContract.Data.MIMETYPE + " = ?")
-            org_cursor = content_resolver.query(org_uri, None, org_selection, 
-                                               [contact_id, ContactsContract.CommonDataKinds.Organization.CONTENT_ITEM_TYPE])
-            
-            if org_cursor and org_cursor.moveToFirst():
-                company_index = org_cursor.getColumnIndex(ContactsContract.CommonDataKinds.Organization.COMPANY)
-                company = org_cursor.getString(company_index) or ""
-                org_cursor.close()
-                
-        except Exception as e:
-            print(f"获取公司信息失败: {str(e)}")
-        
-        return company
-    
-    def _get_phone_type_label(self, phone_type):
-        """获取电话类型标签"""
-        phone_types = {
-            1: "住宅",
-            2: "手机", 
-            3: "工作",
-            4: "工作传真",
-            5: "住宅传真",
-            6: "寻呼机",
-            7: "其他",
-            0: "自定义"
-        }
-        return phone_types.get(phone_type, "其他")
-    
-    def _get_email_type_label(self, email_type):
-        """获取邮箱类型标签"""
-        email_types = {
-            1: "住宅",
-            2: "工作", 
-            3: "其他",
-            4: "手机",
-            0: "自定义"
-        }
-        return email_types.get(email_type, "其他")
+    def _get_packer(self):
+        """按开关返回游标打包类，不可用时回退到逐单元格读取"""
+        if not USE_NATIVE_CURSOR:
+            return None
+        return get_cursor_packer()
+    
+    def _iter_contact_pages(self):
+        """按页生成联系人"""
+        if not USE_BRIDGE:
+            contacts_data = [summarize_contact(c) for c in self._get_mock_contacts_enhanced()]
+            for start in range(0, len(contacts_data), PAGE_SIZE):
+                yield contacts_data[start:start + PAGE_SIZE]
+            return
+        
+        if not has_contacts_permission():
+            raise Exception("没有读取联系人权限")
+        
+        # 列表只读取摘要字段
+        bridge = get_bridge()
+        extractor = BulkContactExtractor(
+            bridge.content_resolver, bridge.ContactsContract, self._get_packer(), summary=True
+        )
+        yield from extractor.iter_pages()
+    
+    def _iter_full_contacts(self):
+        """逐个生成完整联系人记录，用于建立搜索索引"""
+        if not USE_BRIDGE:
+            yield from self._get_mock_contacts_enhanced()
+            return
+        
+        bridge = get_bridge()
+        extractor = BulkContactExtractor(bridge.content_resolver, bridge.ContactsContract, self._get_packer())
+        yield from extractor.iter_contacts()
+    
+    def _fetch_contact_details(self, contact_ids):
+        """加载指定联系人的完整信息"""
+        if not USE_BRIDGE:
+            wanted = set(contact_ids)
+            return [c for c in self._get_mock_contacts_enhanced() if c["id"] in wanted]
+        
+        bridge = get_bridge()
+        extractor = BulkContactExtractor(bridge.content_resolver, bridge.ContactsContract, self._get_packer())
+        return extractor.extract_ids(contact_ids)
     
     def _get_mock_contacts_enhanced(self):
         """获取增强的模拟联系人数据"""
+        # 设置了 CONTACTS_MOCK_COUNT 时使用生成的大通讯录
+        generated = get_mock_contacts()
+        if generated is not None:
+            return generated
+        
         return [
             {
                 "id": "1",
@@ -642,24 +900,91 @@ class EnhancedContactsApp(MDApp):
             }
         ]
     
-    def _update_contacts_list(self, contacts_data):
-        """更新联系人列表"""
-        self.all_contacts = contacts_data
-        self.contacts = contacts_data
+    def _append_contacts_page(self, page, first_page, generation=None):
+        """追加一页联系人，第一页到达时替换旧列表并切换到联系人屏幕；快照恢复的页不带代号"""
+        # 已被更新的获取任务取代，丢弃这一页
+        if generation is not None and not self.fetch_coordinator.is_current(generation):
+            return
         
         contacts_screen = self.root.get_screen('contacts')
         contacts_list = contacts_screen.ids.contacts_list
+        
+        if first_page:
+            self.all_contacts = []
+            self.contacts = []
+            self.contact_store = None
+            self._data_flags = None
+            contacts_list.clear_widgets()
+            self.root.current = 'contacts'
+        
+        self.all_contacts.extend(page)
+        self.contacts.extend(page)
+        self.search_cache.invalidate()
+        self._add_contact_items(contacts_list, page)
+        if first_page:
+            self.schedule_prefetch()
+        
+        self.show_status(f'已加载 {len(self.all_contacts)} 个联系人...')
+    
+    def _finish_contacts_list(self, total, generation):
+        """全部页加载完成"""
+        if not self.fetch_coordinator.is_current(generation):
+            return
+        
+        contacts_screen = self.root.get_screen('contacts')
         progress_bar = contacts_screen.ids.progress_bar
         
         # 隐藏进度条
         progress_bar.opacity = 0
         progress_bar.stop()
         
-        # 清空现有列表
-        contacts_list.clear_widgets()
+        if total == 0:
+            self.all_contacts = []
+            self.contacts = []
+            contacts_screen.ids.contacts_list.clear_widgets()
+            self.root.current = 'contacts'
+        self._complete_contacts = tuple(self.all_contacts)
+        
+        # 加载过程中输入的搜索条件和筛选条件在完整列表上重新应用
+        search_text = contacts_screen.ids.search_field.text
+        if search_text or self.active_filters:
+            self.filter_contacts(search_text)
+        
+        # 更新状态
+        self.show_status(f'成功获取 {total} 个联系人')
+        toast(f'成功获取 {total} 个联系人')
+        
+        # 重新启用按钮
+        main_screen = self.root.get_screen('main')
+        main_screen.ids.get_contacts_btn.disabled = False
+    
+    def _finish_sync(self, merged, changed, generation, quiet=False):
+        """增量同步完成，把变更后的列表应用到界面"""
+        if not self.fetch_coordinator.is_current(generation):
+            return
+        
+        contacts_screen = self.root.get_screen('contacts')
+        contacts_screen.ids.progress_bar.opacity = 0
+        contacts_screen.ids.progress_bar.stop()
+        
+        if changed == 0:
+            if not quiet:
+                toast("通讯录没有变化")
+            return
         
-        # 添加联系人项
-        for contact in contacts_data:
+        self.all_contacts = merged
+        self._complete_contacts = tuple(merged)
+        self.contact_store = None
+        self._data_flags = None
+        self.search_cache.invalidate()
+        self.filter_contacts(contacts_screen.ids.search_field.text)
+        
+        self.show_status(f'已同步 {changed} 处变更，共 {len(self.all_contacts)} 个联系人')
+        toast(f'已同步 {changed} 处变更')
+    
+    def _add_contact_items(self, contacts_list, contacts):
+        """为联系人创建列表项"""
+        for contact in contacts:
             item = ThreeLineAvatarListItem(
                 text=contact["name"],
                 secondary_text=contact["phone"],
@@ -671,24 +996,19 @@ class EnhancedContactsApp(MDApp):
             item.ids._lbl_secondary.font_name = 'ChineseFont'
             item.ids._lbl_tertiary.font_name = 'ChineseFont'
             
+            # 按下时优先预取，松开时详情多半已在缓存中
+            item.bind(on_press=lambda x, c=contact: self.detail_prefetcher.prefetch([c["id"]], urgent=True))
             # 添加点击事件
             item.bind(on_release=lambda x, c=contact: self.show_contact_detail(c))
             
             contacts_list.add_widget(item)
-        
-        # 更新状态
-        self.show_status(f'成功获取 {len(contacts_data)} 个联系人')
-        toast(f'成功获取 {len(contacts_data)} 个联系人')
-        
-        # 重新启用按钮
-        main_screen = self.root.get_screen('main')
-        main_screen.ids.get_contacts_btn.disabled = False
-        
-        # 切换到联系人列表屏幕
-        self.root.current = 'contacts'
     
     def show_contact_detail(self, contact):
         """显示联系人详情"""
+        # 列表中只有摘要，完整信息从详情缓存读取
+        if is_summary(contact):
+            contact = self.detail_loader.get(contact["id"]) or contact
+        
         self.current_contact = contact
         detail_screen = self.root.get_screen('contact_detail')
         
@@ -733,58 +1053,287 @@ class EnhancedContactsApp(MDApp):
         # 切换到详情页面
         self.root.current = 'contact_detail'
     
-    def filter_contacts(self, search_text):
-        """搜索联系人"""
-        if not search_text:
-            self.contacts = self.all_contacts
+    def on_search_text(self, search_text):
+        """搜索框内容变化，只记录查询和按键时间，停顿后再搜索；搜过的查询（如回删）直接显示"""
+        keystroke_time = time.perf_counter()
+        if search_text.strip() and not self.fuzzy_search:
+            cached = self.search_cache.get(search_text.lower())
+            if cached is not None:
+                self._search_trigger.cancel()
+                self._apply_search_result(self.search_pipeline.complete(search_text, keystroke_time), (cached, None))
+                return
+        
+        self._search_text = search_text
+        self._search_keystroke = keystroke_time
+        # 触发器重复调用不会推迟时间，先取消再重新计时，停顿后才搜索
+        self._search_trigger.cancel()
+        self._search_trigger()
+    
+    def _submit_search(self, dt):
+        self.filter_contacts(self._search_text, self._search_keystroke)
+    
+    def filter_contacts(self, search_text, keystroke_time=None):
+        """搜索联系人，结果由后台线程匹配后再显示"""
+        if not search_text.strip():
+            # 清空搜索框时丢弃还没显示的结果，只按筛选条件显示
+            self.search_pipeline.cancel()
+            self._search_result = None
+            self._show_filtered()
             return
         
+        # 第一次搜索时在后台补齐完整记录的索引，补齐之前按摘要匹配
+        self._request_full_indexes()
+        
+        # 列式存储保存了列表当时的记录，后台线程只读它；数据版本用于判断结果能否缓存
+        context = (self._get_contact_store(), self.search_cache.version, self.fuzzy_search)
+        self.search_pipeline.submit(search_text, context, keystroke_time)
+    
+    def _match_contacts(self, search_text, context, is_stale):
+        """在搜索线程上匹配联系人，返回 (行位图, 排在最前的行)；查询已过期时返回 None"""
+        store, version, fuzzy = context
+        bitmap = self._match_bitmap(search_text, store, version, is_stale)
+        if bitmap is None:
+            return None
+        if not fuzzy:
+            return bitmap, None
+        
+        # 模糊搜索补充有输入错误的匹配，相似程度高的排在前面，其余精确匹配按原顺序跟在后面
+        ranked_ids = self.fuzzy_index.search(search_text) or ()
+        ranked = [row for row in map(store.row_of, ranked_ids) if row is not None]
+        return bitmap | bitmap_from_indices(ranked, len(store)), ranked
+    
+    def _match_bitmap(self, search_text, store, version, is_stale):
+        """精确匹配的行位图，结果按查询缓存；查询已过期时返回 None"""
+        query = search_text.lower()
+        # 缓存的位图对应当时的列表，只使用与本次请求的列式存储同一版本的结果
+        cached = self.search_cache.get(query, version)
+        if cached is not None:
+            return cached
+        
+        # 字母查询同时按拼音前缀匹配中文姓名，数字查询按拨号盘匹配姓名、按规范化号码匹配号码
+        extra_ids = set()
+        for index in (self.pinyin_index, self.t9_index, self.phone_index):
+            extra_ids.update(index.search(search_text) or ())
+        
+        # 索引可用时查询全文索引，还没补齐时内容可能过期，改为扫描摘要
+        contact_ids = None if self._full_indexes_pending else self.search_index.search(search_text)
+        scanned = contact_ids is None
+        bitmap = store.ids_bitmap(extra_ids.union(contact_ids or ()))
+        if scanned:
+            # 接着之前的查询继续输入时，匹配结果一定在之前的结果里，只筛选这些行
+            candidates = self.search_cache.narrowest(query, version)
+            rows = range(len(store)) if candidates is None else bitmap_indices(candidates, store.use_numpy)
+            matched = self._scan_contacts(query, store.records, rows, is_stale)
+            if matched is None:
+                return None
+            bitmap |= bitmap_from_indices(matched, len(store))
+        
+        self.search_cache.put(query, version, bitmap, scanned)
+        return bitmap
+    
+    def _scan_contacts(self, search_text, records, rows, is_stale):
+        """逐行比较姓名、号码和公司，返回匹配的行；查询已过期时返回 None"""
         search_text = search_text.lower()
-        filtered = []
+        matched = []
         
-        for contact in self.all_contacts:
+        for i, row in enumerate(rows):
+            # 每扫描一段检查一次，用户继续输入时放弃这次扫描
+            if i % 1000 == 0 and is_stale():
+                return None
+            contact = records[row]
             if (search_text in contact["name"].lower() or 
                 search_text in contact["phone"].lower() or
                 search_text in contact.get("company", "").lower()):
-                filtered.append(contact)
+                matched.append(row)
+        
+        return matched
+    
+    def _deliver_search_result(self, request, result):
+        """搜索线程得到结果，转回界面线程显示"""
+        Clock.schedule_once(lambda dt: self._apply_search_result(request, result))
+    
+    def _apply_search_result(self, request, result):
+        """一次性替换列表内容，期间又有新查询时丢弃"""
+        if not self.search_pipeline.is_current(request):
+            return
+        
+        # 位图的行对应计算时的列表；缓存命中的结果总是对应当前列表
+        store = request.context[0] if request.context else self._get_contact_store()
+        bitmap, ranked = result
+        self._search_result = (store, bitmap, ranked)
+        self._show_filtered()
         
-        self.contacts = filtered
+        latency = self.search_pipeline.record_applied(request)
+        # 不逐次打印，每攒够一轮样本输出一次统计
+        if self.search_pipeline.latency.count % LATENCY_SAMPLES == 0:
+            print(self.search_pipeline.latency.summary())
+        self.show_status(f'找到 {len(self.contacts)} 个联系人（{latency:.0f} ms）')
+    
+    def _show_filtered(self):
+        """搜索结果与筛选条件的位图求交集，只取回可见的联系人"""
+        if self._search_result is None and not self.active_filters:
+            self.contacts = self.all_contacts
+            self._update_filtered_list()
+            return
+        
+        store = self._get_contact_store()
+        if "favorites" in self.active_filters:
+            self._ensure_favorites_bitmap(store)
+        if self.active_filters & {"has_email", "has_address"}:
+            self._ensure_data_flag_bitmaps(store)
+        
+        bitmap = store.combine(self.active_filters, any_of=self.filter_any)
+        ranked = None
+        if self._search_result is not None:
+            search_store, search_bitmap, ranked = self._search_result
+            if search_store is not store:
+                # 列表在搜索之后重建过，按ID换算到新的行
+                rows = bitmap_indices(search_bitmap, store.use_numpy)
+                search_bitmap = store.ids_bitmap(search_store.ids[row] for row in rows)
+                if ranked:
+                    ranked = [row for row in map(store.row_of, (search_store.ids[r] for r in ranked))
+                              if row is not None]
+                self._search_result = (store, search_bitmap, ranked)
+            bitmap &= search_bitmap
+        
+        if ranked:
+            # 模糊搜索的结果按相似程度排在前面
+            ranked = [row for row in ranked if bitmap >> row & 1]
+            first = set(ranked)
+            rows = bitmap_indices(bitmap, store.use_numpy)
+            self.contacts = store.take(ranked + [row for row in rows if row not in first])
+        else:
+            self.contacts = store.take_bitmap(bitmap)
         self._update_filtered_list()
     
+    def _ensure_favorites_bitmap(self, store):
+        """返回列表中收藏联系人的位图"""
+        if not store.has_bitmap("favorites"):
+            # 收藏按 LOOKUP_KEY 判断，每个列表只逐个检查一次，之后随收藏操作更新
+            store.set_bitmap("favorites", store.bitmap_where(self.favorites.contains))
+        return store.bitmap("favorites")
+    
+    def _ensure_data_flag_bitmaps(self, store):
+        """用单独查询到的ID设置有邮箱、有地址两个条件的位图，每个列表只设置一次"""
+        if self._data_flags is None:
+            try:
+                self._data_flags = self._get_data_flags()
+            except Exception as e:
+                print(f"读取邮箱和地址信息失败: {str(e)}")
+                return
+            self._data_flags_store = None
+        if self._data_flags_store is not store:
+            for key, contact_ids in self._data_flags.items():
+                store.set_bitmap(key, store.ids_bitmap(contact_ids))
+            self._data_flags_store = store
+    
+    def _get_data_flags(self):
+        """有邮箱和有地址的联系人ID"""
+        if not USE_BRIDGE:
+            contacts = self._get_mock_contacts_enhanced()
+            return {
+                "has_email": {c["id"] for c in contacts if c.get("emails")},
+                "has_address": {c["id"] for c in contacts if c.get("addresses")},
+            }
+        
+        bridge = get_bridge()
+        extractor = BulkContactExtractor(
+            bridge.content_resolver, bridge.ContactsContract, self._get_packer(), summary=True
+        )
+        return extractor.data_flag_ids()
+    
     def _update_filtered_list(self):
-        """更新过滤后的列表"""
+        """更新过滤后的列表，清空和重建在同一帧内完成"""
         contacts_screen = self.root.get_screen('contacts')
         contacts_list = contacts_screen.ids.contacts_list
         
         contacts_list.clear_widgets()
+        self._add_contact_items(contacts_list, self.contacts)
+        self.schedule_prefetch()
+    
+    def schedule_prefetch(self):
+        """列表滚动或内容变化后预取详情，滚动期间合并为一次"""
+        self._prefetch_trigger()
+    
+    def _prefetch_visible(self, dt):
+        """预取可见行及其后若干行的联系人详情"""
+        if not self.contacts:
+            return
         
-        for contact in self.contacts:
-            item = ThreeLineAvatarListItem(
-                text=contact["name"],
-                secondary_text=contact["phone"],
-                tertiary_text=contact.get("company", "")
-            )
-            
-            item.ids._lbl_primary.font_name = 'ChineseFont'
-            item.ids._lbl_secondary.font_name = 'ChineseFont'
-            item.ids._lbl_tertiary.font_name = 'ChineseFont'
-            
-            item.bind(on_release=lambda x, c=contact: self.show_contact_detail(c))
-            contacts_list.add_widget(item)
+        contacts_screen = self.root.get_screen('contacts')
+        scroll = contacts_screen.ids.contacts_scroll
+        contacts_list = contacts_screen.ids.contacts_list
+        if not contacts_list.children:
+            return
+        
+        # 列表项高度一致，根据滚动位置直接算出可见行的下标
+        item_height = contacts_list.children[0].height or 1
+        hidden = max(contacts_list.height - scroll.height, 0)
+        top = (1 - scroll.scroll_y) * hidden
+        first = max(int(top // item_height), 0)
+        count = int(scroll.height // item_height) + 2 + PREFETCH_AHEAD
+        
+        contacts = self.contacts[first:first + count]
+        ids = [contact["id"] for contact in contacts if is_summary(contact)]
+        self.detail_prefetcher.prefetch(ids, replace=True)
     
     def show_search_dialog(self):
         """显示搜索对话框"""
         toast("使用顶部的搜索框进行搜索")
+        self.root.get_screen('contacts').ids.search_field.focus = True
+    
+    def contacts_action_items(self, fuzzy):
+        """联系人页顶栏右侧的按钮，模糊搜索按钮的图标显示当前是否开启"""
+        return [
+            ["refresh", lambda x: self.refresh_contacts()],
+            ["magnify", lambda x: self.show_search_dialog()],
+            ["approximately-equal-box" if fuzzy else "approximately-equal", lambda x: self.toggle_fuzzy_search()],
+        ]
+    
+    def toggle_fuzzy_search(self):
+        """开关模糊搜索，按新的方式重新搜索当前输入"""
+        self.fuzzy_search = not self.fuzzy_search
+        toast("已开启模糊搜索" if self.fuzzy_search else "已关闭模糊搜索")
+        
+        contacts_screen = self.root.get_screen('contacts')
+        contacts_screen.ids.toolbar.right_action_items = self.contacts_action_items(self.fuzzy_search)
+        contacts_screen.ids.search_field.hint_text = '模糊搜索联系人...' if self.fuzzy_search else '搜索联系人...'
+        self.filter_contacts(contacts_screen.ids.search_field.text)
+    
+    def _get_contact_store(self):
+        """当前联系人列表的列式存储，分页加载中途调用时按已加载部分重建"""
+        store = self.contact_store
+        if store is None or len(store) != len(self.all_contacts):
+            store = self.contact_store = ContactColumns(self.all_contacts)
+        return store
     
     def show_filter_menu(self, button):
-        """显示筛选菜单"""
+        """显示筛选菜单，条件可以多选"""
+        store = self._get_contact_store()
+        counts = store.count_flags()
+        # 摘要没有邮箱和地址标志，按单独查询的位图计数
+        self._ensure_data_flag_bitmaps(store)
+        for key in ("has_email", "has_address"):
+            counts[key] = bin(store.bitmap(key)).count("1")
+        # 收藏记录可能包含已不在通讯录中的联系人，按当前列表的位图计数
+        counts["favorites"] = bin(self._ensure_favorites_bitmap(store)).count("1")
+        labels = [
+            ("has_phone", "有电话的"), ("has_email", "有邮箱的"),
+            ("has_address", "有地址的"), ("favorites", "收藏的"),
+        ]
         menu_items = [
-            {"text": "全部", "on_release": lambda: self.filter_by_type("all")},
-            {"text": "有电话的", "on_release": lambda: self.filter_by_type("has_phone")},
-            {"text": "有邮箱的", "on_release": lambda: self.filter_by_type("has_email")},
-            {"text": "有地址的", "on_release": lambda: self.filter_by_type("has_address")},
-            {"text": "收藏的", "on_release": lambda: self.filter_by_type("favorites")},
+            {"text": f"全部 ({len(self.all_contacts)})", "on_release": lambda: self.filter_by_type("all")},
         ]
+        for key, label in labels:
+            mark = "√ " if key in self.active_filters else ""
+            menu_items.append({
+                "text": f"{mark}{label} ({counts[key]})",
+                "on_release": lambda key=key: self.filter_by_type(key)
+            })
+        menu_items.append({
+            "text": f"条件关系：{'满足任一' if self.filter_any else '全部满足'}",
+            "on_release": lambda: self.filter_by_type("any")
+        })
         
         self.menu = MDDropdownMenu(
             caller=button,
@@ -794,22 +1343,20 @@ class EnhancedContactsApp(MDApp):
         self.menu.open()
     
     def filter_by_type(self, filter_type):
-        """按类型筛选联系人"""
+        """切换筛选条件，"all" 清除全部条件，"any" 切换条件之间的关系；结果与搜索结果组合"""
         if filter_type == "all":
-            self.contacts = self.all_contacts
-        elif filter_type == "has_phone":
-            self.contacts = [c for c in self.all_contacts if c.get("phones")]
-        elif filter_type == "has_email":
-            self.contacts = [c for c in self.all_contacts if c.get("emails")]
-        elif filter_type == "has_address":
-            self.contacts = [c for c in self.all_contacts if c.get("addresses")]
-        elif filter_type == "favorites":
-            self.contacts = [c for c in self.all_contacts if c["id"] in self.favorites]
+            self.active_filters.clear()
+        elif filter_type == "any":
+            self.filter_any = not self.filter_any
+        elif filter_type in self.active_filters:
+            self.active_filters.discard(filter_type)
+        else:
+            self.active_filters.add(filter_type)
         
         if hasattr(self, 'menu'):
             self.menu.dismiss()
         
-        self._update_filtered_list()
+        self._show_filtered()
     
     def show_export_dialog(self):
         """显示导出对话框"""
@@ -839,60 +1386,93 @@ class EnhancedContactsApp(MDApp):
         dialog.ids.text_content.font_name = 'ChineseFont'
         dialog.open()
     
+    def _get_export_contacts(self):
+        """导出需要完整信息，列表中只有摘要；在后台线程调用，读取失败时抛出异常"""
+        if not has_contacts_permission():
+            raise Exception("没有读取联系人权限")
+        return list(self._iter_full_contacts())
+    
     def export_contacts_csv(self):
         """导出联系人为CSV格式"""
-        try:
-            filename = f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = os.path.join(os.path.expanduser("~"), "Downloads", filename)
-            
-            with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['姓名', '电话', '邮箱', '公司', '地址']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for contact in self.all_contacts:
-                    writer.writerow({
-                        '姓名': contact['name'],
-                        '电话': contact['phone'],
-                        '邮箱': '; '.join([e['address'] for e in contact.get('emails', [])]),
-                        '公司': contact.get('company', ''),
-                        '地址': '; '.join(contact.get('addresses', []))
-                    })
-            
-            toast(f"联系人已导出到: {filepath}")
-            
-        except Exception as e:
-            toast(f"导出失败: {str(e)}")
+        self._start_export("csv", self._write_contacts_csv)
     
     def export_contacts_json(self):
         """导出联系人为JSON格式"""
+        self._start_export("json", self._write_contacts_json)
+    
+    def _start_export(self, extension, write):
+        """在后台线程读取完整记录并写入文件，读取大通讯录时界面不卡住"""
+        if self._exporting:
+            toast("正在导出，请稍候")
+            return
+        self._exporting = True
+        
+        filename = f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        filepath = os.path.join(os.path.expanduser("~"), "Downloads", filename)
+        self.show_status("正在导出联系人...")
+        
+        thread = threading.Thread(target=self._run_export, args=(write, filepath))
+        thread.daemon = True
+        thread.start()
+    
+    def _run_export(self, write, filepath):
+        """后台线程：读取并写入，结果转回界面线程提示"""
         try:
-            filename = f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            filepath = os.path.join(os.path.expanduser("~"), "Downloads", filename)
-            
-            export_data = {
-                "export_time": datetime.now().isoformat(),
-                "total_contacts": len(self.all_contacts),
-                "contacts": self.all_contacts
-            }
-            
-            with open(filepath, 'w', encoding='utf-8') as jsonfile:
-                json.dump(export_data, jsonfile, ensure_ascii=False, indent=2)
-            
-            toast(f"联系人已导出到: {filepath}")
-            
+            write(filepath, self._get_export_contacts())
+            message = f"联系人已导出到: {filepath}"
         except Exception as e:
-            toast(f"导出失败: {str(e)}")
+            message = f"导出失败: {str(e)}"
+        finally:
+            detach_thread()
+        Clock.schedule_once(lambda dt: self._finish_export(message))
+    
+    def _finish_export(self, message):
+        self._exporting = False
+        self.show_status(message)
+        toast(message)
+    
+    def _write_contacts_csv(self, filepath, contacts):
+        with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            fieldnames = ['姓名', '电话', '邮箱', '公司', '地址']
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            
+            writer.writeheader()
+            for contact in contacts:
+                writer.writerow({
+                    '姓名': contact['name'],
+                    '电话': contact['phone'],
+                    '邮箱': '; '.join([e['address'] for e in contact.get('emails', [])]),
+                    '公司': contact.get('company', ''),
+                    '地址': '; '.join(contact.get('addresses', []))
+                })
+    
+    def _write_contacts_json(self, filepath, contacts):
+        export_data = {
+            "export_time": datetime.now().isoformat(),
+            "total_contacts": len(contacts),
+            "contacts": [as_dict(contact) for contact in contacts]
+        }
+        
+        with open(filepath, 'w', encoding='utf-8') as jsonfile:
+            json.dump(export_data, jsonfile, ensure_ascii=False, indent=2)
     
     def add_to_favorites(self):
         """添加到收藏"""
         if self.current_contact:
-            contact_id = self.current_contact["id"]
-            if contact_id not in self.favorites:
-                self.favorites.append(contact_id)
+            added = self.favorites.toggle(self.current_contact)
+            
+            # 只改收藏位图中的这一行
+            store = self.contact_store
+            if store is not None and store.has_bitmap("favorites"):
+                row = store.row_of(self.current_contact["id"])
+                if row is not None:
+                    store.set_row_bit("favorites", row, added)
+            if "favorites" in self.active_filters:
+                self._show_filtered()
+            
+            if added:
                 toast("已添加到收藏")
             else:
-                self.favorites.remove(contact_id)
                 toast("已从收藏中移除")
     
     def refresh_contacts(self):
@@ -902,12 +1482,22 @@ class EnhancedContactsApp(MDApp):
         progress_bar.opacity = 1
         progress_bar.start()
         
-        thread = threading.Thread(target=self._fetch_contacts)
-        thread.daemon = True
-        thread.start()
+        # 快照还在显示时，显示完成后再同步
+        if self._restoring:
+            self._refresh_after_restore = True
+            return
+        
+        # 已有列表时只同步变化；连续点击会合并为一次
+        if self.all_contacts:
+            self.fetch_coordinator.request(FETCH_SYNC, self._sync_contacts)
+        else:
+            self.fetch_coordinator.request(FETCH_FULL, self._fetch_contacts)
     
-    def _show_error(self, error_msg):
+    def _show_error(self, error_msg, generation=None):
         """显示错误信息"""
+        if generation is not None and not self.fetch_coordinator.is_current(generation):
+            return
+        
         self.show_status(f'获取失败: {error_msg}')
         
         # 重新启用按钮
@@ -18,6 +18,9 @@ from kivymd.uix.button import MDFlatButton, MDRectangleFlatButton
 from kivymd.uix.progressbar import MDProgressBar
 import threading
 
+from android_bridge import get_bridge
+from contacts_cursor import Projection, query, STRING
+
 # 修复Kivy的KV文件加载编码问题
 original_load_file = Builder.load_file
 def load_file_with_encoding(filename, **kwargs):
@@ -290,56 +293,51 @@ class ContactsApp(MDApp):
         contacts = []
         
         try:
-            # 获取安卓上下文
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            activity = PythonActivity.mActivity
-            content_resolver = activity.getContentResolver()
+            # 获取安卓上下文，类句柄和通讯录常量在进程内只解析一次
+            bridge = get_bridge()
+            content_resolver = bridge.content_resolver
             
             # 联系人URI
-            ContactsContract = autoclass('android.provider.ContactsContract')
-            uri = ContactsContract.Contacts.CONTENT_URI
+            ContactsContract = bridge.ContactsContract
+            Contacts = ContactsContract.Contacts
+            Phone = ContactsContract.CommonDataKinds.Phone
+            uri = Contacts.CONTENT_URI
+            
+            # 只查询需要的列，列索引在每个游标上只解析一次
+            contacts_projection = Projection(
+                ("id", Contacts._ID, STRING),
+                ("name", Contacts.DISPLAY_NAME, STRING),
+            )
+            phone_projection = Projection(
+                ("number", Phone.NUMBER, STRING),
+            )
+            phone_selection = Phone.CONTACT_ID + " = ?"
             
             # 查询联系人
-            cursor = content_resolver.query(uri, None, None, None, None)
+            reader = query(content_resolver, uri, contacts_projection)
             
-            if cursor:
-                while cursor.moveToNext():
-                    # 获取联系人ID
-                    id_index = cursor.getColumnIndex(ContactsContract.Contacts._ID)
-                    contact_id = cursor.getString(id_index)
-                    
-                    # 获取联系人姓名
-                    name_index = cursor.getColumnIndex(ContactsContract.Contacts.DISPLAY_NAME)
-                    name = cursor.getString(name_index)
-                    
-                    # 获取电话号码
-                    phone_uri = ContactsContract.CommonDataKinds.Phone.CONTENT_URI
-                    phone_selection = ContactsContract.CommonDataKinds.Phone.CONTACT_ID + " = ?"
-                    phone_cursor = content_resolver.query(
-                        phone_uri, 
-                        None, 
-                        phone_selection, 
-                        [contact_id], 
-                        None
-                    )
-                    
-                    phone_numbers = []
-                    if phone_cursor:
-                        while phone_cursor.moveToNext():
-                            phone_index = phone_cursor.getColumnIndex(
-                                ContactsContract.CommonDataKinds.Phone.NUMBER
-                            )
-                            phone_number = phone_cursor.getString(phone_index)
-                            phone_numbers.append(phone_number)
-                        phone_cursor.close()
-                    
-                    if name and phone_numbers:
-                        contacts.append({
-                            "name": name,
-                            "phone": phone_numbers[0]  # 取第一个电话号码
-                        })
-                
-                cursor.close()
+            if reader:
+                with reader:
+                    for row in reader:
+                        # 获取电话号码
+                        phone_reader = query(
+                            content_resolver,
+                            Phone.CONTENT_URI,
+                            phone_projection,
+                            phone_selection,
+                            [row.id]
+                        )
+                        
+                        phone_numbers = []
+                        if phone_reader:
+                            with phone_reader:
+                                phone_numbers = [phone.number for phone in phone_reader]
+                        
+                        if row.name and phone_numbers:
+                            contacts.append({
+                                "name": row.name,
+                                "phone": phone_numbers[0]  # 取第一个电话号码
+                            })
             
             return contacts
             
@@ -15,6 +15,9 @@ from kivymd.uix.button import MDFlatButton, MDRectangleFlatButton
 from kivymd.toast import toast
 import threading
 
+from android_bridge import get_bridge
+from contacts_cursor import Projection, query, STRING, INT
+
 try:
     from android.permissions import request_permissions, Permission, check_permission
     from jnius import autoclass
@@ -184,50 +187,48 @@ class ContactsApp(MDApp):
             return self._get_mock_contacts()
             
         try:
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            activity = PythonActivity.mActivity
-            content_resolver = activity.getContentResolver()
-            
-            ContactsContract = autoclass('android.provider.ContactsContract')
-            uri = ContactsContract.Contacts.CONTENT_URI
+            # 类句柄和通讯录常量在进程内只解析一次
+            bridge = get_bridge()
+            content_resolver = bridge.content_resolver
+            ContactsContract = bridge.ContactsContract
+            Contacts = ContactsContract.Contacts
+            uri = Contacts.CONTENT_URI
             
             # 只查询基本字段
-            projection = [
-                ContactsContract.Contacts._ID,
-                ContactsContract.Contacts.DISPLAY_NAME,
-                ContactsContract.Contacts.HAS_PHONE_NUMBER
-            ]
+            projection = Projection(
+                ("id", Contacts._ID, STRING),
+                ("name", Contacts.DISPLAY_NAME, STRING),
+                ("has_phone", Contacts.HAS_PHONE_NUMBER, INT),
+            )
+            phone_projection = Projection(
+                ("number", ContactsContract.CommonDataKinds.Phone.NUMBER, STRING),
+            )
             
-            cursor = content_resolver.query(uri, projection, None, None, None)
+            reader = query(content_resolver, uri, projection)
             
             contacts = []
-            if cursor:
-                while cursor.moveToNext():
-                    try:
-                        id_index = cursor.getColumnIndex(ContactsContract.Contacts._ID)
-                        name_index = cursor.getColumnIndex(ContactsContract.Contacts.DISPLAY_NAME)
-                        has_phone_index = cursor.getColumnIndex(ContactsContract.Contacts.HAS_PHONE_NUMBER)
-                        
-                        contact_id = cursor.getString(id_index)
-                        name = cursor.getString(name_index) or "未知姓名"
-                        has_phone = cursor.getInt(has_phone_index)
-                        
-                        # 获取第一个电话号码
-                        phone = ""
-                        if has_phone > 0:
-                            phone = self._get_first_phone(contact_id, content_resolver, ContactsContract)
-                        
-                        contacts.append({
-                            'id': contact_id,
-                            'name': name,
-                            'phone': phone
-                        })
-                        
-                    except Exception as e:
-                        print(f"处理联系人失败: {str(e)}")
-                        continue
-                
-                cursor.close()
+            if reader:
+                with reader:
+                    for row in reader:
+                        try:
+                            name = row.name or "未知姓名"
+                            
+                            # 获取第一个电话号码
+                            phone = ""
+                            if row.has_phone > 0:
+                                phone = self._get_first_phone(
+                                    row.id, content_resolver, ContactsContract, phone_projection
+                                )
+                            
+                            contacts.append({
+                                'id': row.id,
+                                'name': name,
+                                'phone': phone
+                            })
+                            
+                        except Exception as e:
+                            print(f"处理联系人失败: {str(e)}")
+                            continue
             
             return contacts
             
@@ -235,27 +236,23 @@ class ContactsApp(MDApp):
             print(f"获取联系人失败: {str(e)}")
             return self._get_mock_contacts()
     
-    def _get_first_phone(self, contact_id, content_resolver, ContactsContract):
+    def _get_first_phone(self, contact_id, content_resolver, ContactsContract, phone_projection):
         """获取第一个电话号码"""
         try:
-            phone_uri = ContactsContract.CommonDataKinds.Phone.CONTENT_URI
-            phone_selection = ContactsContract.CommonDataKinds.Phone.CONTACT_ID + " = ?"
-            phone_cursor = content_resolver.query(
-                phone_uri, 
-                [ContactsContract.CommonDataKinds.Phone.NUMBER],
-                phone_selection, 
-                [contact_id], 
-                None
+            Phone = ContactsContract.CommonDataKinds.Phone
+            phone_selection = Phone.CONTACT_ID + " = ?"
+            phone_reader = query(
+                content_resolver,
+                Phone.CONTENT_URI,
+                phone_projection,
+                phone_selection,
+                [contact_id]
             )
             
-            if phone_cursor and phone_cursor.moveToFirst():
-                phone_index = phone_cursor.getColumnIndex(ContactsContract.CommonDataKinds.Phone.NUMBER)
-                phone = phone_cursor.getString(phone_index) or ""
-                phone_cursor.close()
-                return phone
-                
-            if phone_cursor:
-                phone_cursor.close()
+            if phone_reader:
+                with phone_reader:
+                    for phone in phone_reader:
+                        return phone.number or ""
                 
         except Exception as e:
             print(f"获取电话号码失败: {str(e)}")
@@ -1,3 +1,3 @@
 
 import os
-os.system('python-for-android apk --private . --package=com.example.contacts --name="通讯录获取器" --version=1.0 --bootstrap=sdl2 --requirements=python3,kivy,kivymd,android --permission=READ_CONTACTS --permission=INTERNET --arch=arm64-v8a')
+os.system('python-for-android apk --private . --package=com.example.contacts --name="通讯录获取器" --version=1.0 --bootstrap=sdl2 --requirements=python3,kivy,kivymd,android --permission=READ_CONTACTS --permission=INTERNET --arch=arm64-v8a --add-source=java')
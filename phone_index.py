@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+电话号码索引
+号码先统一格式：去掉空格、连字符等符号，去掉中国的国家码（+86、0086）和 IP 拨号前缀，
+固话补回长途区号前的 0，"+86 138-0013-8000" 和 "138 0013 8000" 得到同一个号码。
+联系人的全部号码拼接成一个字符串建后缀数组，输入号码的任意一段（如末尾4到8位）即可找到联系人
+"""
+import threading
+from array import array
+from functools import lru_cache
+
+# 中国的国家码
+CN_COUNTRY_CODE = "86"
+# 运营商 IP 长途拨号前缀
+IP_DIAL_PREFIXES = ("17951", "17911", "12593", "17901", "17909", "96688")
+
+# 规范化结果缓存的号码数量，通讯录里的号码写法通常远少于该值
+NORMALIZE_CACHE_SIZE = 65536
+
+# 增量修改累计超过该数量后重建后缀数组
+COMPACT_LIMIT = 500
+
+# 号码之间的分隔符，排在所有数字之前
+_SEPARATOR = ","
+
+
+def _is_mobile(digits):
+    return len(digits) == 11 and digits[0] == "1"
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_phone(number):
+    """规范化号码，只返回数字；按原始写法缓存"""
+    if not number:
+        return ""
+    digits = "".join(ch for ch in number if ch.isdigit())
+    international = number.lstrip().startswith("+")
+
+    if digits.startswith("00" + CN_COUNTRY_CODE):
+        digits = digits[4:]
+        international = True
+    elif international and digits.startswith(CN_COUNTRY_CODE):
+        digits = digits[2:]
+    elif len(digits) == 13 and digits.startswith(CN_COUNTRY_CODE + "1"):
+        # 省略了 + 号的手机号
+        digits = digits[2:]
+        international = True
+    elif international:
+        # 其他国家的号码保留国家码
+        return digits
+
+    if len(digits) == 16 and digits.startswith(IP_DIAL_PREFIXES) and digits[5] == "1":
+        digits = digits[5:]
+    if international and 9 <= len(digits) <= 11 and not _is_mobile(digits) and digits[0] != "0":
+        # 国际格式的固话省略了长途区号前的 0；输入到一半的号码不补
+        digits = "0" + digits
+    return digits
+
+
+def contact_numbers(contact):
+    """联系人全部号码的规范化形式，摘要只有主号码"""
+    phones = contact.get("phones")
+    if phones is None:
+        numbers = [contact.get("phone", "")]
+    else:
+        numbers = [phone["number"] for phone in phones]
+    return tuple({digits for digits in map(normalize_phone, numbers) if digits})
+
+
+def collect_numbers(contacts, numbers):
+    """逐个生成联系人，同时把 (号码, 联系人ID) 收集到 numbers
+
+    建立其他索引的同一遍读取里顺便收集号码，不必再读一遍或保留完整记录。
+    """
+    for contact in contacts:
+        contact_id = contact["id"]
+        numbers.extend((digits, contact_id) for digits in contact_numbers(contact))
+        yield contact
+
+
+def normalize_query(text):
+    """号码查询只含数字，允许空格、连字符、括号和开头的 + 号"""
+    stripped = text.strip()
+    if not stripped or stripped.strip("+0123456789 -()") or not any(ch.isdigit() for ch in stripped):
+        return ""
+    # 只输入了国家码时按原样匹配
+    return normalize_phone(stripped) or "".join(ch for ch in stripped if ch.isdigit())
+
+
+def _suffix_range(text, suffixes, query, lo, hi):
+    """后缀数组中以 query 开头的区间"""
+    size = len(query)
+    start, end = lo, hi
+    while start < end:
+        middle = (start + end) // 2
+        position = suffixes[middle]
+        if text[position:position + size] < query:
+            start = middle + 1
+        else:
+            end = middle
+    first = start
+    end = hi
+    while start < end:
+        middle = (start + end) // 2
+        position = suffixes[middle]
+        if text[position:position + size] <= query:
+            start = middle + 1
+        else:
+            end = middle
+    return first, start
+
+
+def _build_suffixes(numbers):
+    """拼接号码并排序全部后缀"""
+    parts = []
+    starts = array('I')
+    owners = []
+    tails = []
+    positions = []
+    number_indices = []
+    offset = 0
+    for number_index, (digits, contact_id) in enumerate(numbers):
+        parts.append(digits)
+        parts.append(_SEPARATOR)
+        starts.append(offset)
+        owners.append(contact_id)
+        for i in range(len(digits)):
+            tails.append(digits[i:])
+            positions.append(offset + i)
+            number_indices.append(number_index)
+        offset += len(digits) + 1
+    text = "".join(parts)
+
+    # 分隔符排在数字之前，按号码内的后缀排序与按整段文本排序结果一致
+    order = sorted(range(len(tails)), key=tails.__getitem__)
+    suffixes = array('I', [positions[i] for i in order])
+    suffix_numbers = array('I', [number_indices[i] for i in order])
+    return text, starts, owners, suffixes, suffix_numbers
+
+
+class PhoneIndex:
+    """号码子串索引
+
+    增量修改不改动后缀数组：变化的联系人记入 _removed 使旧号码失效，
+    新号码放在 _extra 中逐个比较，累计过多时整体重建。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+
+        # 拼接后的号码串、各号码起点与所属联系人、后缀数组及后缀所属号码
+        self._text = ""
+        self._starts = array('I')
+        self._owners = []
+        self._suffixes = array('I')
+        self._suffix_numbers = array('I')
+        self._removed = set()
+        self._extra = {}
+
+        # 上一次查询及其结果区间，下一次查询以它开头时在区间内继续查找
+        self._cursor = None
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def rebuild(self, contacts):
+        """用联系人列表重建索引，完整记录包含全部号码"""
+        numbers = []
+        for _ in collect_numbers(contacts, numbers):
+            pass
+        self.rebuild_numbers(numbers)
+
+    def rebuild_numbers(self, numbers):
+        """用 collect_numbers 收集的 (号码, 联系人ID) 重建索引"""
+        suffix_index = _build_suffixes(numbers)
+        with self._lock:
+            self._set_suffixes(suffix_index)
+            self._ready = True
+
+    def _set_suffixes(self, suffix_index):
+        """替换后缀数组，调用方持有锁"""
+        self._text, self._starts, self._owners, self._suffixes, self._suffix_numbers = suffix_index
+        self._removed = set()
+        self._extra = {}
+        self._cursor = None
+
+    def update(self, contacts, deleted_ids=()):
+        """更新有变化的联系人，删除已删除的联系人"""
+        with self._lock:
+            for contact_id in deleted_ids:
+                self._removed.add(contact_id)
+                self._extra.pop(contact_id, None)
+            for contact in contacts:
+                self._removed.add(contact["id"])
+                self._extra[contact["id"]] = contact_numbers(contact)
+            self._cursor = None
+
+            if len(self._removed) + len(self._extra) > COMPACT_LIMIT:
+                self._set_suffixes(_build_suffixes(self._current_numbers()))
+
+    def _current_numbers(self):
+        """后缀数组中仍然有效的号码加上增量号码，调用方持有锁"""
+        text = self._text
+        removed = self._removed
+        numbers = []
+        for start, contact_id in zip(self._starts, self._owners):
+            if contact_id not in removed:
+                numbers.append((text[start:text.index(_SEPARATOR, start)], contact_id))
+        for contact_id, digits_list in self._extra.items():
+            numbers.extend((digits, contact_id) for digits in digits_list)
+        return numbers
+
+    def search(self, text):
+        """返回号码包含查询数字的联系人ID集合；索引未建好或查询不是号码时返回 None"""
+        query = normalize_query(text)
+        if not query or not self._ready:
+            return None
+
+        with self._lock:
+            lo, hi = 0, len(self._suffixes)
+            cursor = self._cursor
+            if cursor is not None and query.startswith(cursor[0]):
+                # 多输入了几位，结果一定在上一次的区间内
+                _, lo, hi = cursor
+            lo, hi = _suffix_range(self._text, self._suffixes, query, lo, hi)
+            self._cursor = (query, lo, hi)
+
+            owners = self._owners
+            removed = self._removed
+            matches = set()
+            for number_index in set(self._suffix_numbers[lo:hi]):
+                contact_id = owners[number_index]
+                if contact_id not in removed:
+                    matches.add(contact_id)
+            for contact_id, digits_list in self._extra.items():
+                if any(query in digits for digits in digits_list):
+                    matches.add(contact_id)
+            return matches
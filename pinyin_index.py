@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+拼音搜索索引
+为每个联系人的姓名生成全拼和首字母（多音字姓氏同时生成姓氏读音和常用读音），
+所有键排序后用二分查找做前缀匹配："zs"、"zhangsan"、"zhangs" 都能找到"张三"
+"""
+import threading
+from bisect import bisect_left, bisect_right
+
+from pinyin_table import char_pinyin
+
+# 多音字姓氏：姓氏读音在前，常用读音也保留，用户两种拼法都可能输入
+SURNAME_READINGS = {
+    "单": ("shan", "dan"), "曾": ("zeng", "ceng"), "区": ("ou", "qu"), "仇": ("qiu", "chou"),
+    "解": ("xie", "jie"), "查": ("zha", "cha"), "朴": ("piao", "pu"), "乐": ("yue", "le"),
+    "覃": ("qin", "tan"), "尉": ("yu", "wei"), "缪": ("miao", "mou"), "翟": ("zhai", "di"),
+    "秘": ("bi", "mi"), "盖": ("ge", "gai"), "繁": ("po", "fan"), "黑": ("he", "hei"),
+    "召": ("shao", "zhao"), "种": ("chong", "zhong"), "员": ("yun", "yuan"),
+    "藏": ("zang", "cang"), "柏": ("bai", "bo"), "薄": ("bo", "bao"), "句": ("gou", "ju"),
+    "隗": ("wei", "kui"), "阚": ("kan", "han"), "厍": ("she",), "祭": ("zhai", "ji"),
+    "长": ("chang", "zhang"), "沈": ("shen",), "石": ("shi",), "那": ("na",),
+    "能": ("nai", "neng"), "宓": ("fu", "mi"), "笪": ("da",), "犍": ("qian", "jian"),
+}
+
+# 名字中常见的多音字：常用读音在前，另一种读音也保留（"王长江"可以用 wcj 或 wzj 找到）
+NAME_READINGS = {
+    "长": ("chang", "zhang"), "重": ("zhong", "chong"), "乐": ("le", "yue"), "朝": ("chao", "zhao"),
+    "行": ("xing", "hang"), "茜": ("qian", "xi"), "晟": ("sheng", "cheng"),
+}
+
+# 读音特殊的复姓，每个字一个音节
+COMPOUND_SURNAMES = {
+    "尉迟": ("yu", "chi"), "万俟": ("mo", "qi"), "长孙": ("zhang", "sun"), "单于": ("chan", "yu"),
+    "澹台": ("tan", "tai"), "令狐": ("ling", "hu"),
+}
+
+# 一个姓名最多生成的读法数量
+MAX_VARIANTS = 4
+
+
+def name_syllables(name):
+    """把姓名拆成音节，每个音节是若干候选读法
+
+    汉字按拼音表取读音，开头的姓氏按姓氏读音，名字中的常见多音字保留两种读音；
+    连续的字母或数字作为一个音节，其余字符忽略。
+    """
+    syllables = []
+    text = (name or "").strip()
+    start = 0
+
+    compound = COMPOUND_SURNAMES.get(text[:2])
+    if compound is not None and len(text) > 2:
+        syllables.extend((reading,) for reading in compound)
+        start = 2
+    elif text[:1] in SURNAME_READINGS:
+        syllables.append(SURNAME_READINGS[text[0]])
+        start = 1
+
+    word = []
+    for char in text[start:].lower():
+        if char.isascii() and char.isalnum():
+            word.append(char)
+            continue
+        if word:
+            syllables.append(("".join(word),))
+            word = []
+        readings = NAME_READINGS.get(char)
+        if readings is not None:
+            syllables.append(readings)
+            continue
+        reading = char_pinyin(char)
+        if reading is not None:
+            syllables.append((reading,))
+    if word:
+        syllables.append(("".join(word),))
+    return syllables
+
+
+def pinyin_keys(name):
+    """姓名的全部索引键：每种读法的全拼和首字母"""
+    variants = [("", "")]
+    for readings in name_syllables(name):
+        variants = [
+            (full + reading, initials + reading[0])
+            for full, initials in variants
+            for reading in readings
+        ][:MAX_VARIANTS]
+
+    keys = set()
+    for full, initials in variants:
+        if full:
+            keys.add(full)
+            keys.add(initials)
+    return keys
+
+
+def normalize_query(text):
+    """拼音查询只允许字母和数字，忽略空格；其他查询返回空串"""
+    query = "".join(text.lower().split())
+    if query and query.isascii() and query.isalnum():
+        return query
+    return ""
+
+
+class PinyinIndex:
+    """按联系人ID组织的拼音前缀索引
+
+    keys 与 ids 是按键排序的平行列表；全量重建后整体替换，增量修改在锁内插入删除。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._ids = []
+        self._entries = {}
+        self._ready = False
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, contacts):
+        """用联系人列表重建索引，只需要姓名，摘要记录即可"""
+        entries = {}
+        pairs = []
+        for contact in contacts:
+            keys = tuple(pinyin_keys(contact["name"]))
+            entries[contact["id"]] = keys
+            pairs.extend((key, contact["id"]) for key in keys)
+        pairs.sort()
+
+        keys = [pair[0] for pair in pairs]
+        ids = [pair[1] for pair in pairs]
+        with self._lock:
+            self._keys = keys
+            self._ids = ids
+            self._entries = entries
+            self._ready = True
+
+    def update(self, contacts, deleted_ids=()):
+        """更新有变化的联系人，删除已删除的联系人"""
+        with self._lock:
+            for contact_id in deleted_ids:
+                self._remove(contact_id)
+            for contact in contacts:
+                self._remove(contact["id"])
+                self._insert(contact)
+
+    def _insert(self, contact):
+        contact_id = contact["id"]
+        keys = tuple(pinyin_keys(contact["name"]))
+        self._entries[contact_id] = keys
+        for key in keys:
+            position = bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._ids.insert(position, contact_id)
+
+    def _remove(self, contact_id):
+        for key in self._entries.pop(contact_id, ()):
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == contact_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+                position += 1
+
+    def search(self, text):
+        """前缀匹配，返回联系人ID集合；索引未建好或查询不是拼音时返回 None"""
+        query = normalize_query(text)
+        if not query or not self._ready:
+            return None
+        with self._lock:
+            # 键只含小写字母和数字，"\x7f" 大于其中任何字符
+            start = bisect_left(self._keys, query)
+            end = bisect_left(self._keys, query + "\x7f", start)
+            return set(self._ids[start:end])
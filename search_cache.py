@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+搜索结果缓存
+保存最近若干次查询的结果：回删到之前输入过的查询时直接取回结果；
+新查询在缓存的查询后面继续输入时，只需在缓存结果里筛选。
+联系人列表或索引变化时递增数据版本，旧结果全部作废
+"""
+import threading
+from collections import OrderedDict
+
+# 缓存的查询数量
+QUERY_CACHE_SIZE = 16
+
+
+class QueryCache:
+    """按查询文本缓存结果，带数据版本
+
+    scanned 表示结果包含了逐个比较的匹配（查询是结果中每个联系人的子串匹配的超集），
+    只有这样的结果可以作为更长查询的候选集。
+    """
+
+    def __init__(self, size=QUERY_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries = OrderedDict()
+
+    @property
+    def version(self):
+        """当前数据版本，计算结果前读取，写入时用于判断结果是否已过期"""
+        return self._version
+
+    def invalidate(self):
+        """联系人或索引变化后调用"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, query, version=None):
+        """完全相同的查询的结果，没有时返回 None
+
+        给出 version 时只返回该数据版本的结果：结果中的行位图对应计算时的列表，不能用在别的列表上。
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                return None
+            entry = self._entries.get(query)
+            if entry is None:
+                return None
+            self._entries.move_to_end(query)
+            return entry[0]
+
+    def narrowest(self, query, version=None):
+        """query 以其开头的最长的已缓存查询的结果，可作为候选集；没有时返回 None，version 同 get()"""
+        with self._lock:
+            if version is not None and version != self._version:
+                return None
+            best = None
+            for cached_query, (result, scanned) in self._entries.items():
+                if (scanned and query.startswith(cached_query)
+                        and (best is None or len(cached_query) > len(best[0]))):
+                    best = (cached_query, result)
+            return best[1] if best is not None else None
+
+    def put(self, query, version, result, scanned=False):
+        """保存结果；计算期间数据已变化时丢弃"""
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[query] = (result, scanned)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+联系人搜索索引
+本地 SQLite 缓存保存联系人的姓名、公司、全部号码和邮箱，并建立 FTS5 全文索引。
+使用 trigram 分词（适合中文等不分词的文字，任意位置子串匹配），
+不支持 trigram 时对缓存表做 LIKE 子串查询（unicode61 分词只能匹配词首，"明华公" 查不到 "北京明华公司"）；
+trigram 无法匹配的一两个字符的查询使用姓名和公司的短片段表，号码由内存中的号码索引匹配；
+缓存表同时保存原始号码，冷启动时号码索引和模糊索引直接由缓存表建立，不必再读一遍通讯录
+"""
+import os
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from contact_store import normalize_digits
+
+# 每个事务写入的联系人数量，写入期间搜索最多等待一批
+INDEX_BATCH_SIZE = 500
+
+# 索引内容的版本，表结构或短片段表的内容变化后递增，旧索引在下次获取时重建
+INDEX_VERSION = "3"
+
+# 索引模式
+MODE_TRIGRAM = "trigram"
+MODE_LIKE = "like"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS contacts (
+    rowid INTEGER PRIMARY KEY,
+    contact_id TEXT UNIQUE NOT NULL,
+    name TEXT, company TEXT, phones TEXT, emails TEXT, numbers TEXT
+);
+CREATE TABLE IF NOT EXISTS short_grams (
+    gram TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    PRIMARY KEY (gram, row)
+) WITHOUT ROWID;
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    name, company, phones, emails,
+    content='contacts', content_rowid='rowid'{options}
+);
+CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts (rowid, name, company, phones, emails)
+    VALUES (new.rowid, new.name, new.company, new.phones, new.emails);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+    INSERT INTO contacts_fts (contacts_fts, rowid, name, company, phones, emails)
+    VALUES ('delete', old.rowid, old.name, old.company, old.phones, old.emails);
+END;
+"""
+
+_FTS_OPTIONS = {
+    MODE_TRIGRAM: ", tokenize='trigram'",
+}
+
+
+def contact_numbers(contact):
+    """联系人的原始号码，摘要只有主号码"""
+    numbers = [phone["number"] for phone in contact.get("phones", []) if phone["number"]]
+    if not numbers and contact.get("phone"):
+        numbers = [contact["phone"]]
+    return numbers
+
+
+def search_document(contact):
+    """联系人的可搜索字段：(姓名, 公司, 号码, 邮箱)
+
+    号码同时保存原样和只含数字两种写法，"138 0013" 和 "1380013" 都能匹配。
+    """
+    numbers = contact_numbers(contact)
+    terms = []
+    for number in numbers:
+        terms.append(number)
+        digits = normalize_digits(number)
+        if digits != number:
+            terms.append(digits)
+    emails = [email["address"] for email in contact.get("emails", []) if email["address"]]
+    return (
+        contact.get("name", "") or "",
+        contact.get("company", "") or "",
+        " ".join(terms),
+        " ".join(emails),
+    )
+
+
+def short_grams(name, company=""):
+    """姓名和公司中长度为1和2的片段，trigram 无法处理的短查询（如"科技"、"华为"）用它匹配"""
+    grams = set()
+    for text in (name.lower(), (company or "").lower()):
+        for i in range(len(text)):
+            if not text[i].isspace():
+                grams.add(text[i])
+            pair = text[i:i + 2]
+            if len(pair) == 2 and not pair.isspace():
+                grams.add(pair)
+    return grams
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ContactSearchIndex:
+    """持久化的联系人全文索引
+
+    rebuild() 在后台线程调用，search() 在界面线程调用；
+    索引未建完时 search() 返回 None，调用方退回线性扫描。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mode = None
+        self._db = None
+        self._lock = threading.Lock()
+        self._ready = False
+        self._synced = 0
+
+        if sqlite3 is None:
+            print("当前环境没有 sqlite3，搜索使用线性扫描")
+            return
+        try:
+            self._open()
+        except Exception as e:
+            print(f"打开搜索索引失败: {str(e)}")
+            self._db = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+
+        # 沿用已有索引的模式，否则先尝试 trigram，不支持时使用 LIKE
+        row = db.execute("SELECT value FROM meta WHERE key = 'mode'").fetchone()
+        modes = [row[0]] if row and row[0] in (MODE_TRIGRAM, MODE_LIKE) else [MODE_TRIGRAM]
+        self._create_fts(db, modes)
+
+        row = db.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        version = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        self._ready = bool(row and row[0] == "1" and version and version[0] == INDEX_VERSION)
+        row = db.execute("SELECT value FROM meta WHERE key = 'synced'").fetchone()
+        self._synced = int(row[0]) if row and self._ready else 0
+        db.commit()
+        self._db = db
+
+    def _create_fts(self, db, modes):
+        """按顺序尝试创建全文索引"""
+        self.mode = MODE_LIKE
+        for mode in modes:
+            if mode == MODE_LIKE:
+                break
+            try:
+                db.executescript(_FTS_SCHEMA.format(options=_FTS_OPTIONS[mode]))
+                self.mode = mode
+                break
+            except sqlite3.OperationalError:
+                continue
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('mode', ?)", (self.mode,))
+
+    @property
+    def available(self):
+        return self._db is not None
+
+    @property
+    def ready(self):
+        """索引是否完整可用"""
+        return self._db is not None and self._ready
+
+    @property
+    def synced(self):
+        """索引内容对应的同步时间（毫秒），之后的变更还没有写入；未知时为 0"""
+        return self._synced if self.ready else 0
+
+    # ---- 写入 ----
+
+    def rebuild(self, contacts, cancelled=None, synced=0):
+        """用完整联系人记录重建索引，cancelled() 为真时中止并保持未完成状态；synced 为开始读取的时间"""
+        if not self.available:
+            return False
+
+        self._set_complete(False)
+        with self._lock:
+            # 整表重建比逐行删除快得多，触发器随表一起删除
+            self._db.executescript(
+                "DROP TABLE IF EXISTS contacts_fts; DROP TABLE contacts; DROP TABLE short_grams;"
+            )
+            self._db.executescript(_SCHEMA)
+            if self.mode != MODE_LIKE:
+                self._create_fts(self._db, [self.mode])
+            self._db.commit()
+
+        batch = []
+        for contact in contacts:
+            batch.append(contact)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                if cancelled is not None and cancelled():
+                    return False
+                self._write(batch, replace=False)
+                batch = []
+        if cancelled is not None and cancelled():
+            return False
+        self._write(batch, replace=False)
+
+        self._set_complete(True)
+        self.set_synced(synced)
+        return True
+
+    def upsert(self, contacts):
+        """写入或更新联系人"""
+        if not self.available:
+            return
+        contacts = list(contacts)
+        for start in range(0, len(contacts), INDEX_BATCH_SIZE):
+            self._write(contacts[start:start + INDEX_BATCH_SIZE])
+
+    def delete(self, contact_ids):
+        """删除联系人"""
+        if not self.available or not contact_ids:
+            return
+        with self._lock:
+            self._delete_rows(contact_ids)
+            self._db.commit()
+
+    def _write(self, contacts, replace=True):
+        if not contacts:
+            return
+        rows = [
+            (contact["id"],) + search_document(contact) + ("\n".join(contact_numbers(contact)),)
+            for contact in contacts
+        ]
+        with self._lock:
+            # 先删后插，触发器同步更新全文索引；重建时表已清空，不需要删除
+            if replace:
+                self._delete_rows([row[0] for row in rows])
+            grams = []
+            for row in rows:
+                rowid = self._db.execute(
+                    "INSERT INTO contacts (contact_id, name, company, phones, emails, numbers) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    row
+                ).lastrowid
+                grams.extend((gram, rowid) for gram in short_grams(row[1], row[2]))
+            self._db.executemany("INSERT OR IGNORE INTO short_grams VALUES (?, ?)", grams)
+            self._db.commit()
+
+    def _delete_rows(self, contact_ids):
+        """删除联系人及其短片段，调用方持有锁"""
+        grams = []
+        for contact_id in contact_ids:
+            row = self._db.execute(
+                "SELECT rowid, name, company FROM contacts WHERE contact_id = ?", (contact_id,)
+            ).fetchone()
+            if row is not None:
+                grams.extend((gram, row[0]) for gram in short_grams(row[1], row[2]))
+        self._db.executemany("DELETE FROM short_grams WHERE gram = ? AND row = ?", grams)
+        self._db.executemany(
+            "DELETE FROM contacts WHERE contact_id = ?", [(contact_id,) for contact_id in contact_ids]
+        )
+
+    def set_synced(self, synced):
+        """记录索引内容对应的同步时间"""
+        if not self.available:
+            return
+        with self._lock:
+            self._synced = synced
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('synced', ?)", (str(synced),))
+            self._db.commit()
+
+    def documents(self):
+        """缓存表中的联系人，格式与完整记录相同（只有ID、姓名、公司、号码和邮箱），用于建立内存索引"""
+        if not self.ready:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT contact_id, name, company, numbers, emails FROM contacts ORDER BY rowid"
+            ).fetchall()
+        return [
+            {
+                "id": contact_id,
+                "name": name or "",
+                "company": company or "",
+                "phones": [{"number": number} for number in (numbers or "").split("\n") if number],
+                "emails": [{"address": address} for address in (emails or "").split()],
+            }
+            for contact_id, name, company, numbers, emails in rows
+        ]
+
+    def _set_complete(self, complete):
+        with self._lock:
+            self._ready = complete
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('complete', ?)", ("1" if complete else "0",)
+            )
+            if complete:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (INDEX_VERSION,))
+            self._db.commit()
+
+    # ---- 查询 ----
+
+    def search(self, text):
+        """返回匹配的联系人ID列表，索引不可用时返回 None"""
+        if not self.ready:
+            return None
+        text = text.strip()
+        if not text:
+            return None
+
+        sql, args = self._build_query(text)
+        try:
+            with self._lock:
+                return [row[0] for row in self._db.execute(sql, args)]
+        except Exception as e:
+            print(f"搜索索引查询失败: {str(e)}")
+            return None
+
+    def _build_query(self, text):
+        if len(text) < 3:
+            # 一两个字符的查询匹配姓名和公司，号码由号码索引匹配，邮箱至少输入3个字符
+            return (
+                "SELECT c.contact_id FROM short_grams g JOIN contacts c ON c.rowid = g.row "
+                "WHERE g.gram = ? ORDER BY g.row",
+                (text.lower(),)
+            )
+        if self.mode == MODE_TRIGRAM:
+            phrase = '"' + text.replace('"', '""') + '"'
+            return (
+                "SELECT c.contact_id FROM contacts_fts f JOIN contacts c ON c.rowid = f.rowid "
+                "WHERE contacts_fts MATCH ? ORDER BY f.rowid",
+                (phrase,)
+            )
+        # 没有 trigram 时扫描缓存表，仍然是任意位置的子串匹配
+        pattern = "%" + _escape_like(text) + "%"
+        return (
+            "SELECT contact_id FROM contacts WHERE name LIKE ?1 ESCAPE '\\' "
+            "OR company LIKE ?1 ESCAPE '\\' OR phones LIKE ?1 ESCAPE '\\' "
+            "OR emails LIKE ?1 ESCAPE '\\' ORDER BY rowid",
+            (pattern,)
+        )
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+搜索流水线
+输入框变化去抖后把查询交给后台线程匹配，同一时间只保留最新的查询：
+新查询到来时旧查询作废，匹配函数可以中途检查并放弃，过期结果不会送到界面；
+每次结果显示后记录从最后一次按键到显示的延迟
+"""
+import time
+import threading
+from collections import deque
+
+from android_bridge import detach_thread
+
+# 输入停顿多久后开始搜索（秒）
+SEARCH_DEBOUNCE = 0.12
+# 保留的延迟样本数量
+LATENCY_SAMPLES = 100
+
+
+class SearchRequest:
+    """一次搜索请求"""
+
+    def __init__(self, seq, text, context, keystroke_time):
+        self.seq = seq
+        self.text = text
+        self.context = context
+        self.keystroke_time = keystroke_time
+        self.started = 0.0
+        self.finished = 0.0
+
+    @property
+    def match_ms(self):
+        """后台匹配耗时（毫秒）"""
+        return (self.finished - self.started) * 1000
+
+
+class LatencyStats:
+    """按键到结果显示的延迟统计"""
+
+    def __init__(self, size=LATENCY_SAMPLES):
+        self.samples = deque(maxlen=size)
+        self.last = 0.0
+        self.count = 0
+
+    def record(self, ms):
+        self.last = ms
+        self.count += 1
+        self.samples.append(ms)
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def summary(self):
+        return (f"最近 {len(self.samples)} 次搜索延迟 p50 {self.percentile(50):.1f} ms，"
+                f"p95 {self.percentile(95):.1f} ms，最近一次 {self.last:.1f} ms")
+
+
+class SearchPipeline:
+    """后台搜索线程
+
+    match(text, context, is_stale) 在后台线程执行，is_stale() 为真时可以提前返回；
+    deliver(request, result) 在后台线程收到仍然有效的结果，由调用方转回界面线程。
+    """
+
+    def __init__(self, match, deliver):
+        self._match = match
+        self._deliver = deliver
+
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._pending = None
+        self._thread = None
+        self._running = False
+        self.latency = LatencyStats()
+
+    def start(self):
+        """启动后台线程"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程，正在匹配的查询作废"""
+        with self._cond:
+            self._running = False
+            self._seq += 1
+            self._pending = None
+            self._cond.notify_all()
+
+    def submit(self, text, context=None, keystroke_time=None):
+        """提交查询，尚未开始的旧查询直接丢弃，进行中的旧查询作废"""
+        with self._cond:
+            self._seq += 1
+            request = SearchRequest(
+                self._seq, text, context,
+                keystroke_time if keystroke_time is not None else time.perf_counter()
+            )
+            self._pending = request
+            self._cond.notify()
+        return request
+
+    def complete(self, text, keystroke_time=None):
+        """结果已经现成时（如缓存命中）使用：作废未完成的查询，返回一个视为最新的请求"""
+        with self._cond:
+            self._seq += 1
+            self._pending = None
+            request = SearchRequest(
+                self._seq, text, None,
+                keystroke_time if keystroke_time is not None else time.perf_counter()
+            )
+        request.started = request.finished = time.perf_counter()
+        return request
+
+    def cancel(self):
+        """作废所有未完成的查询"""
+        with self._cond:
+            self._seq += 1
+            self._pending = None
+
+    def is_current(self, request):
+        """请求是否仍是最新的查询"""
+        return request.seq == self._seq
+
+    def record_applied(self, request):
+        """结果显示到界面后调用，返回按键到显示的延迟（毫秒）"""
+        ms = (time.perf_counter() - request.keystroke_time) * 1000
+        self.latency.record(ms)
+        return ms
+
+    def _next_request(self):
+        with self._cond:
+            while self._running and self._pending is None:
+                self._cond.wait()
+            if not self._running:
+                return None
+            request, self._pending = self._pending, None
+            return request
+
+    def _run(self):
+        try:
+            while True:
+                request = self._next_request()
+                if request is None:
+                    break
+
+                is_stale = lambda: request.seq != self._seq
+                request.started = time.perf_counter()
+                try:
+                    result = self._match(request.text, request.context, is_stale)
+                except Exception as e:
+                    print(f"搜索失败: {str(e)}")
+                    continue
+                request.finished = time.perf_counter()
+
+                if result is not None and not is_stale():
+                    self._deliver(request, result)
+        finally:
+            detach_thread()
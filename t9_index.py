@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+T9 拨号盘姓名索引
+姓名的全拼和首字母按拨号盘换成数字串（张三 -> 94264726 / 97），排序后做前缀匹配；
+多输入一位时只在上一次的结果区间内继续二分，不重新扫描。号码由 phone_index 匹配
+"""
+import threading
+from bisect import bisect_left, bisect_right
+
+from pinyin_index import pinyin_keys
+
+# 拨号盘字母
+T9_LETTERS = {
+    "2": "abc", "3": "def", "4": "ghi", "5": "jkl",
+    "6": "mno", "7": "pqrs", "8": "tuv", "9": "wxyz",
+}
+T9_TRANSLATION = str.maketrans({
+    letter: digit for digit, letters in T9_LETTERS.items() for letter in letters
+})
+
+
+def t9_digits(text):
+    """字母换成拨号盘数字，数字保持不变"""
+    return text.translate(T9_TRANSLATION)
+
+
+def t9_keys(name):
+    """姓名的拨号盘数字串"""
+    return {t9_digits(key) for key in pinyin_keys(name)}
+
+
+def normalize_query(text):
+    """拨号盘查询只含数字，允许空格和连字符"""
+    query = text.replace(" ", "").replace("-", "")
+    if query and query.isascii() and query.isdigit():
+        return query
+    return ""
+
+
+class T9Index:
+    """姓名的拨号盘前缀索引
+
+    keys 与 ids 是按数字串排序的平行列表；查询只在搜索线程进行，
+    全量重建和增量修改在后台线程进行，两者通过锁互斥。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._keys = []
+        self._ids = []
+        self._entries = {}
+
+        # 上一次查询及其结果区间，下一次查询以它开头时在区间内继续查找
+        self._cursor = None
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def rebuild(self, contacts):
+        """用联系人列表重建索引，只需要姓名"""
+        entries = {}
+        pairs = []
+        for contact in contacts:
+            keys = tuple(t9_keys(contact["name"]))
+            entries[contact["id"]] = keys
+            pairs.extend((key, contact["id"]) for key in keys)
+        pairs.sort()
+
+        keys = [pair[0] for pair in pairs]
+        ids = [pair[1] for pair in pairs]
+        with self._lock:
+            self._keys = keys
+            self._ids = ids
+            self._entries = entries
+            self._cursor = None
+            self._ready = True
+
+    def update(self, contacts, deleted_ids=()):
+        """更新有变化的联系人，删除已删除的联系人"""
+        with self._lock:
+            for contact_id in deleted_ids:
+                self._remove(contact_id)
+            for contact in contacts:
+                self._remove(contact["id"])
+                self._insert(contact)
+            self._cursor = None
+
+    def _insert(self, contact):
+        contact_id = contact["id"]
+        keys = tuple(t9_keys(contact["name"]))
+        self._entries[contact_id] = keys
+        for key in keys:
+            position = bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._ids.insert(position, contact_id)
+
+    def _remove(self, contact_id):
+        for key in self._entries.pop(contact_id, ()):
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == contact_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    break
+                position += 1
+
+    def search(self, text):
+        """返回姓名匹配的联系人ID集合；索引未建好或查询不是数字时返回 None"""
+        query = normalize_query(text)
+        if not query or not self._ready:
+            return None
+
+        with self._lock:
+            lo, hi = 0, len(self._keys)
+            cursor = self._cursor
+            if cursor is not None and query.startswith(cursor[0]):
+                # 多输入了几位，结果一定在上一次的区间内
+                _, lo, hi = cursor
+            lo = bisect_left(self._keys, query, lo, hi)
+            hi = bisect_left(self._keys, query + ":", lo, hi)
+            self._cursor = (query, lo, hi)
+            return set(self._ids[lo:hi])
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+二进制联系人快照的桌面测试
+覆盖文件头、偏移表、字符串池解码、摘要与完整记录混合以及空文件；
+运行：python -m pytest -q test_contact_snapshot.py
+"""
+import struct
+
+import pytest
+
+import contact_snapshot
+from contact_record import Contact
+from contact_snapshot import ContactSnapshot, encode_snapshot, read_snapshot, write_snapshot
+from contacts_generator import _load_mock_snapshot, generate_contacts, mock_snapshot_path
+
+FULL = {
+    "id": "1",
+    "lookup_key": "0r1-ABC",
+    "name": "张三",
+    "phones": [{"number": "138 0013 8000", "type": "手机"}, {"number": "010-12345678", "type": "工作"}],
+    "emails": [{"address": "zhangsan@example.com", "type": "工作"}],
+    "addresses": ["北京市朝阳区建国门外大街1号"],
+    "company": "科技有限公司",
+    "photo_uri": "content://com.android.contacts/contacts/1/photo",
+}
+SUMMARY = {
+    "id": "2",
+    "lookup_key": "0r2-DEF",
+    "name": "李四",
+    "phone": "13900139000",
+    "company": "科技有限公司",
+    "photo_uri": "",
+    "has_phone": True,
+    "has_email": False,
+    "has_address": True,
+}
+# 没有任何号码、邮箱、地址的完整记录
+EMPTY_FULL = {"id": "3", "name": "王五", "phones": [], "emails": [], "addresses": [], "company": ""}
+
+CONTACTS = [FULL, SUMMARY, EMPTY_FULL]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "contacts.bin")
+    write_snapshot(path, CONTACTS, last_sync=1234567890123)
+    return path
+
+
+def test_header_and_offset_tables(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, _, count, string_count, last_sync, record_table, string_table = \
+        contact_snapshot._HEADER.unpack_from(data, 0)
+    assert (magic, version, count, last_sync) == (b"CSN1", 1, 3, 1234567890123)
+    assert record_table == contact_snapshot._HEADER.size
+
+    # 记录偏移递增且都落在记录区内
+    record_offsets = struct.unpack_from(f"<{count}I", data, record_table)
+    assert list(record_offsets) == sorted(record_offsets)
+    assert record_table + 4 * count <= record_offsets[0] < string_table
+
+    # 字符串池去重：相同的公司名只保存一次
+    string_offsets = struct.unpack_from(f"<{string_count}I", data, string_table)
+    strings = []
+    for offset in string_offsets:
+        length = struct.unpack_from("<I", data, offset)[0]
+        strings.append(data[offset + 4:offset + 4 + length].decode("utf-8"))
+    assert len(strings) == len(set(strings))
+    assert "科技有限公司" in strings and "张三" in strings
+
+
+def test_round_trip_summary_and_full(path):
+    with ContactSnapshot(path) as snapshot:
+        assert len(snapshot) == 3
+        assert snapshot.last_sync == 1234567890123
+        # 按下标访问逐个解码字符串，顺序迭代一次解码整个字符串池，两者结果一致
+        by_index = [snapshot[i] for i in range(len(snapshot))]
+        assert list(snapshot) == by_index
+        assert snapshot[-1] == by_index[2]
+        assert snapshot[1:] == by_index[1:]
+        with pytest.raises(IndexError):
+            snapshot.record(3)
+
+    full, summary, empty_full = by_index
+    assert full == Contact.from_dict(FULL)
+    assert not full.is_summary
+    assert full.phones == (("138 0013 8000", "手机"), ("010-12345678", "工作"))
+    assert full.lookup_key == "0r1-ABC"
+
+    assert summary.is_summary
+    assert summary == Contact.from_dict(SUMMARY)
+    assert (summary["has_phone"], summary["has_email"], summary["has_address"]) == (True, False, True)
+
+    assert not empty_full.is_summary
+    assert empty_full.phones == () and empty_full.addresses == ()
+
+
+def test_read_snapshot(path):
+    contacts, last_sync = read_snapshot(path)
+    assert contacts == [Contact.from_dict(contact) for contact in CONTACTS]
+    assert last_sync == 1234567890123
+
+
+def test_empty_contact_list(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    write_snapshot(path, [])
+    assert read_snapshot(path) == ([], 0)
+
+
+def test_empty_and_damaged_files(tmp_path):
+    path = tmp_path / "broken.bin"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        ContactSnapshot(str(path))
+
+    path.write_bytes(encode_snapshot(CONTACTS)[:10])
+    with pytest.raises(ValueError):
+        ContactSnapshot(str(path))
+
+    path.write_bytes(b"XXXX" + encode_snapshot(CONTACTS)[4:])
+    with pytest.raises(ValueError):
+        ContactSnapshot(str(path))
+
+
+def test_generated_contacts_round_trip(tmp_path):
+    contacts = generate_contacts(300, seed=7)
+    path = str(tmp_path / "generated.bin")
+    write_snapshot(path, contacts)
+    assert read_snapshot(path)[0] == [Contact.from_dict(contact) for contact in contacts]
+
+
+def test_mock_snapshot_keyed_by_count_and_seed(tmp_path):
+    path = str(tmp_path / "mock.bin")
+    first = _load_mock_snapshot(path, 50, 1)
+    second = _load_mock_snapshot(path, 50, 2)
+    assert first != second
+
+    # 每个数量和种子各有一个文件，头部的同步时间不再被占用
+    for seed, contacts in ((1, first), (2, second)):
+        saved, last_sync = read_snapshot(mock_snapshot_path(path, 50, seed))
+        assert last_sync == 0
+        assert saved == [Contact.from_dict(contact) for contact in contacts]
+    assert _load_mock_snapshot(path, 50, 1) == first
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+列式联系人存储的桌面测试
+array 模块和 NumPy 两条路径各跑一遍，没有安装 NumPy 时跳过后者；
+运行：python -m pytest -q test_contact_store.py
+"""
+import pytest
+
+from contact_store import ContactColumns, bitmap_from_indices, bitmap_indices, normalize_digits
+
+CONTACTS = [
+    {"id": "1", "name": "张三", "phones": [{"number": "138-0013-8000", "type": "手机"},
+                                          {"number": "010 1234 5678", "type": "工作"}],
+     "emails": [{"address": "zhangsan@example.com", "type": "工作"}], "addresses": [], "company": ""},
+    {"id": "2", "name": "李四", "phone": "13900139000", "has_phone": True, "has_email": False,
+     "has_address": True},
+    {"id": "3", "name": "王五", "phones": [], "emails": [{"address": "ww@example.com", "type": "住宅"}],
+     "addresses": ["广州市天河区"], "company": "互联网公司"},
+    {"id": "4", "name": "赵六", "phone": "", "has_phone": False, "has_email": False, "has_address": False},
+]
+
+
+@pytest.fixture(params=[False, True], ids=["array", "numpy"])
+def store(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    store = ContactColumns(CONTACTS, use_numpy=request.param)
+    assert store.use_numpy == request.param
+    return store
+
+
+@pytest.mark.parametrize("use_numpy", [False, True], ids=["array", "numpy"])
+def test_bitmap_round_trip(use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    for indices in ([], [0], [7, 8], [0, 3, 64, 65, 200], list(range(0, 1000, 3))):
+        bitmap = bitmap_from_indices(indices, 1001)
+        assert bitmap_indices(bitmap, use_numpy) == indices
+
+
+def test_normalize_digits():
+    assert normalize_digits("+86 138-0013-8000") == "8613800138000"
+    assert normalize_digits(None) == ""
+
+
+def test_columns(store):
+    assert len(store) == 4
+    assert store.ids == ["1", "2", "3", "4"]
+    assert store.phones == ["13800138000", "13900139000", "", ""]
+    # 完整记录保存全部号码，摘要只有主号码
+    assert store.phone_numbers(0) == ["13800138000", "01012345678"]
+    assert store.phone_numbers(1) == ["13900139000"]
+    assert store.phone_numbers(2) == [] and store.phone_numbers(3) == []
+
+
+def test_flags(store):
+    assert store.flag_indices(1) == [0, 1]
+    assert store.count_flags() == {"has_phone": 2, "has_email": 2, "has_address": 2}
+    assert store.bitmap("has_email") == 0b0101
+    assert store.has_bitmap("has_address") and not store.has_bitmap("favorites")
+
+
+def test_combine_and_take(store):
+    assert store.combine([]) == store.all_bitmap == 0b1111
+    assert store.combine(["has_phone", "has_email"]) == 0b0001
+    assert store.combine(["has_phone", "has_address"], any_of=True) == 0b0111
+    records = store.take_bitmap(store.combine(["has_address"]))
+    assert [record["id"] for record in records] == ["2", "3"]
+    assert store.take([3, 0]) == [CONTACTS[3], CONTACTS[0]]
+    assert store.take_bitmap(0) == []
+
+
+def test_id_rows_and_custom_bitmaps(store):
+    assert store.row_of("3") == 2
+    assert store.row_of("missing") is None
+    assert store.ids_bitmap(["4", "1", "missing"]) == 0b1001
+
+    store.set_bitmap("favorites", store.bitmap_where(lambda record: record["name"] == "李四"))
+    assert store.bitmap("favorites") == 0b0010
+    store.set_row_bit("favorites", 3, True)
+    store.set_row_bit("favorites", 1, False)
+    assert store.bitmap("favorites") == 0b1000
+    assert store.combine(["favorites", "has_phone"], any_of=True) == 0b1011
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+通讯录读取链路的桌面测试
+覆盖游标打包格式的编解码、变更通知的去抖合并，以及 BulkContactExtractor 在替身 provider 上的提取结果；
+运行：python -m pytest -q test_contacts_pipeline.py
+"""
+import pytest
+
+import android_bridge
+import contacts_native
+import fake_provider
+from contacts_native import encode_rows, decode_rows
+from contacts_observer import ChangeCoalescer, BridgeContactsObserver
+from contacts_extractor import BulkContactExtractor
+
+CONTACTS = [
+    {
+        "name": "张三",
+        "phones": [{"number": "13800138000", "type": "手机"}, {"number": "010-12345678", "type": "工作"}],
+        "emails": [{"address": "zhangsan@example.com", "type": "工作"}],
+        "addresses": ["北京市朝阳区建国门外大街1号"],
+        "company": "科技有限公司",
+    },
+    {
+        "name": "李四",
+        "phones": [{"number": "13900139000", "type": "手机"}],
+        "emails": [],
+        "addresses": [],
+        "company": "",
+    },
+    {
+        "name": "王五",
+        "phones": [],
+        "emails": [{"address": "wangwu@company.com", "type": "住宅"}],
+        "addresses": ["广州市天河区珠江新城", "深圳市南山区科技园"],
+        "company": "互联网科技公司",
+    },
+]
+
+
+# ---- 游标打包格式 ----
+
+def test_encode_decode_round_trip():
+    rows = [
+        ("张三", 1, "13800138000"),
+        ("", -5, None),
+        (None, None, "emoji 😀"),
+        ("a" * 1000, 2 ** 62, "x"),
+    ]
+    assert decode_rows(encode_rows(rows, "SLS")) == rows
+
+
+def test_decode_empty_page():
+    assert decode_rows(encode_rows([], "SL")) == []
+
+
+def test_decode_rejects_bad_buffer():
+    with pytest.raises(ValueError):
+        decode_rows(b"CPK")
+    with pytest.raises(ValueError):
+        decode_rows(b"XXXX" + encode_rows([], "S")[4:])
+
+
+# ---- 变更通知合并 ----
+
+class FakeTimer:
+    """threading.Timer 的替身，记录延迟，由测试决定何时触发"""
+
+    def __init__(self, delay, function):
+        self.delay = delay
+        self.function = function
+        self.daemon = False
+        self.started = False
+        self.cancelled = False
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.function()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _coalescer(delay=1.0, max_delay=5.0):
+    timers = []
+    clock = FakeClock()
+    batches = []
+
+    def timer_factory(seconds, function):
+        timer = FakeTimer(seconds, function)
+        timers.append(timer)
+        return timer
+
+    coalescer = ChangeCoalescer(batches.append, delay, max_delay, timer_factory=timer_factory, clock=clock)
+    return coalescer, timers, clock, batches
+
+
+def test_coalescer_merges_bursts():
+    coalescer, timers, clock, batches = _coalescer()
+    coalescer.notify("content://a")
+    clock.now = 0.5
+    coalescer.notify("content://b")
+    coalescer.notify(None)
+
+    # 每次通知都重新计时，之前的计时器作废
+    assert [timer.cancelled for timer in timers] == [True, True, False]
+    assert timers[-1].delay == 1.0
+    assert coalescer.pending
+
+    timers[-1].fire()
+    assert batches == [{"content://a", "content://b"}]
+    assert coalescer.notify_count == 3
+    assert coalescer.flush_count == 1
+    assert not coalescer.pending
+
+
+def test_coalescer_respects_max_delay():
+    coalescer, timers, clock, batches = _coalescer(delay=1.0, max_delay=2.0)
+    coalescer.notify("content://a")
+    clock.now = 1.5
+    coalescer.notify("content://a")
+    assert timers[-1].delay == pytest.approx(0.5)
+
+    # 已超过最长等待时间，立即处理
+    clock.now = 2.5
+    coalescer.notify("content://b")
+    assert timers[-1].delay == 0.0
+
+    timers[-1].fire()
+    assert batches == [{"content://a", "content://b"}]
+
+    # 处理后重新开始计算最长等待时间
+    coalescer.notify("content://c")
+    assert timers[-1].delay == 1.0
+
+
+def test_coalescer_cancel_drops_pending():
+    coalescer, timers, clock, batches = _coalescer()
+    coalescer.notify("content://a")
+    coalescer.cancel()
+    assert timers[-1].cancelled
+    coalescer.flush()
+    assert batches == []
+
+
+# ---- 替身 provider 上的提取 ----
+
+@pytest.fixture
+def bridge():
+    yield fake_provider.install(fake_provider.FakeContactsProvider(CONTACTS))
+    # 还原桥接和缓存的打包类，不影响其他测试
+    android_bridge.set_autoclass(None)
+    contacts_native._packer = None
+
+
+def _extractors(bridge, summary=False):
+    packer = bridge.get_class("com.example.contacts.CursorPacker")
+    return [
+        BulkContactExtractor(bridge.content_resolver, bridge.ContactsContract, None, summary=summary),
+        BulkContactExtractor(bridge.content_resolver, bridge.ContactsContract, packer, summary=summary),
+    ]
+
+
+def test_extract_all_matches_provider(bridge):
+    for extractor in _extractors(bridge):
+        contacts = sorted(extractor.extract_all(), key=lambda contact: contact["name"])
+        assert [contact["name"] for contact in contacts] == ["张三", "李四", "王五"]
+
+        zhang = contacts[0]
+        assert zhang["phone"] == "13800138000"
+        assert zhang["phones"] == CONTACTS[0]["phones"]
+        assert zhang["emails"] == CONTACTS[0]["emails"]
+        assert zhang["addresses"] == CONTACTS[0]["addresses"]
+        assert zhang["company"] == "科技有限公司"
+
+        wang = contacts[2]
+        assert wang["phone"] == ""
+        assert wang["phones"] == []
+        assert wang["addresses"] == CONTACTS[2]["addresses"]
+
+
+def test_packer_and_cell_reads_agree(bridge):
+    plain, packed = _extractors(bridge)
+    assert [c.to_dict() for c in plain.extract_all()] == [c.to_dict() for c in packed.extract_all()]
+
+
+def test_summary_pages_carry_list_fields(bridge):
+    for extractor in _extractors(bridge, summary=True):
+        summaries = [contact for page in extractor.iter_pages(page_size=2, first_page_size=1) for contact in page]
+        by_name = {contact["name"]: contact for contact in summaries}
+        assert len(summaries) == 3
+        assert (by_name["张三"]["phone"], by_name["张三"]["company"], by_name["张三"]["has_phone"]) == ("13800138000", "科技有限公司", True)
+        assert (by_name["李四"]["phone"], by_name["李四"]["company"], by_name["李四"]["has_phone"]) == ("13900139000", "", True)
+        assert (by_name["王五"]["phone"], by_name["王五"]["company"], by_name["王五"]["has_phone"]) == ("", "互联网科技公司", False)
+
+
+def test_summary_reads_only_phone_and_company_rows(bridge):
+    provider = bridge.content_resolver.provider
+    queries = []
+    original = provider.query
+
+    def recording_query(uri, projection, selection=None, selection_args=None, sort_order=None):
+        queries.append((uri, list(projection), list(selection_args or [])))
+        return original(uri, projection, selection, selection_args, sort_order)
+
+    provider.query = recording_query
+    extractor = _extractors(bridge, summary=True)[0]
+    extractor.extract_all()
+    data_queries = [query for query in queries if query[0].endswith("/data")]
+    assert sorted(data_queries) == sorted([
+        (fake_provider.AUTHORITY_URI + "/data", ["contact_id", "data1"], [fake_provider.PHONE_MIME]),
+        (fake_provider.AUTHORITY_URI + "/data", ["contact_id", "data1"], [fake_provider.ORG_MIME]),
+    ])
+
+
+def test_data_flag_ids(bridge):
+    for extractor in _extractors(bridge, summary=True):
+        ids = {contact["name"]: contact["id"] for contact in extractor.extract_all()}
+        flags = extractor.data_flag_ids()
+        assert flags["has_email"] == {ids["张三"], ids["王五"]}
+        assert flags["has_address"] == {ids["张三"], ids["王五"]}
+
+
+def test_extract_ids(bridge):
+    for extractor in _extractors(bridge):
+        ids = {contact["name"]: contact["id"] for contact in extractor.extract_all()}
+        result = extractor.extract_ids([ids["李四"], ids["王五"]])
+        assert sorted(contact["name"] for contact in result) == ["李四", "王五"]
+
+
+def test_bridge_observer_receives_provider_changes(bridge):
+    batches = []
+    timers = []
+
+    def timer_factory(seconds, function):
+        timer = FakeTimer(seconds, function)
+        timers.append(timer)
+        return timer
+
+    observer = BridgeContactsObserver(batches.append, timer_factory=timer_factory, clock=FakeClock())
+    observer.start()
+    contacts_uri = bridge.ContactsContract.Contacts.CONTENT_URI
+    bridge.content_resolver.notifyChange(contacts_uri + "/1")
+    timers[-1].fire()
+    assert batches == [{contacts_uri + "/1"}]
+
+    # 注销后不再收到通知
+    observer.stop()
+    bridge.content_resolver.notifyChange(contacts_uri)
+    assert len(timers) == 1
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+收藏持久化的桌面测试
+覆盖 LOOKUP_KEY 分段匹配、延迟合并写盘和重新读取；计时器由测试替身代替，由测试决定何时触发。
+运行：python -m pytest -q test_favorites_store.py
+"""
+import json
+
+import pytest
+
+from favorites_store import FavoritesStore, lookup_segments
+
+
+class FakeTimer:
+    """threading.Timer 的替身"""
+
+    def __init__(self, delay, function):
+        self.delay = delay
+        self.function = function
+        self.daemon = False
+        self.started = False
+        self.cancelled = False
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.function()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "favorites.json"
+
+
+@pytest.fixture
+def timers():
+    return []
+
+
+@pytest.fixture
+def make_store(path, timers):
+    def make_store():
+        def timer_factory(seconds, function):
+            timer = FakeTimer(seconds, function)
+            timers.append(timer)
+            return timer
+        return FavoritesStore(str(path), flush_delay=2.0, timer_factory=timer_factory)
+    return make_store
+
+
+def test_lookup_segments():
+    assert lookup_segments("0r1-ABC.0r2-DEF") == ["0r1-ABC", "0r2-DEF"]
+    assert lookup_segments("0r1-ABC") == ["0r1-ABC"]
+    assert lookup_segments("") == []
+
+
+def test_lookup_key_segments_match(make_store):
+    store = make_store()
+    merged = {"id": "10", "lookup_key": "0r1-ABC.0r2-DEF"}
+    store.add(merged)
+    assert store.contains(merged)
+
+    # 合并联系人拆开或与其他联系人重新合并后，ID 变了但仍能按键的某一段认出
+    assert {"id": "11", "lookup_key": "0r2-DEF"} in store
+    assert {"id": "12", "lookup_key": "0r9-XYZ.0r1-ABC"} in store
+    assert {"id": "10", "lookup_key": "0r9-XYZ"} not in store
+
+    assert store.toggle(merged) is False
+    assert {"id": "11", "lookup_key": "0r2-DEF"} not in store
+    assert len(store) == 0
+
+
+def test_contacts_without_lookup_key_match_by_id(make_store):
+    store = make_store()
+    assert store.toggle({"id": "1", "lookup_key": ""}) is True
+    assert {"id": "1"} in store
+    assert {"id": "2"} not in store
+    assert store.toggle({"id": "1"}) is False
+    assert len(store) == 0
+
+
+def test_write_behind_flush(make_store, path, timers):
+    store = make_store()
+    store.add({"id": "1"})
+    store.add({"id": "2", "lookup_key": "0r2-B"})
+    store.toggle({"id": "1"})
+
+    # 连续修改只安排一次写盘，触发前不写文件
+    assert len(timers) == 1
+    assert timers[0].delay == 2.0 and timers[0].started and timers[0].daemon
+    assert not path.exists()
+
+    timers[0].fire()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"lookup_keys": ["0r2-B"], "ids": []}
+
+    # 写盘后的修改重新安排计时器
+    store.add({"id": "3"})
+    assert len(timers) == 2
+    assert store.flush() is True
+    assert timers[1].cancelled
+    assert json.loads(path.read_text(encoding="utf-8"))["ids"] == ["3"]
+
+    # 没有未保存的修改时不再写盘
+    path.unlink()
+    assert store.flush() is True
+    assert not path.exists()
+
+
+def test_favorites_survive_reload(make_store):
+    store = make_store()
+    store.add({"id": "1", "lookup_key": "0r1-A.0r2-B"})
+    store.add({"id": "7"})
+    store.flush()
+
+    reloaded = make_store()
+    assert len(reloaded) == 3
+    assert {"id": "99", "lookup_key": "0r2-B"} in reloaded
+    assert {"id": "7"} in reloaded
+
+
+def test_missing_and_damaged_files(make_store, path):
+    assert len(make_store()) == 0
+    path.write_text("{", encoding="utf-8")
+    assert len(make_store()) == 0
+
+
+def test_failed_write_stays_dirty(make_store, path, tmp_path):
+    store = make_store()
+    store.path = str(tmp_path / "missing" / "blocked" / "favorites.json")
+    # 目录位置被普通文件占用，写盘失败后保留修改，下次再写
+    (tmp_path / "missing").write_text("", encoding="utf-8")
+    store.add({"id": "1"})
+    assert store.flush() is False
+
+    store.path = str(path)
+    assert store.flush() is True
+    assert json.loads(path.read_text(encoding="utf-8"))["ids"] == ["1"]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+电话号码规范化和号码索引的桌面测试
+索引的查询结果与逐个比较全部号码的结果对照；
+运行：python -m pytest -q test_phone_index.py
+"""
+import random
+
+import pytest
+
+import phone_index
+from contacts_generator import generate_contacts
+from phone_index import PhoneIndex, contact_numbers, normalize_phone, normalize_query
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("138 0013 8000", "13800138000"),
+    ("+86 138-0013-8000", "13800138000"),
+    ("008613800138000", "13800138000"),
+    ("8613800138000", "13800138000"),
+    ("17951 13800138000", "13800138000"),
+    ("010-12345678", "01012345678"),
+    ("(010) 1234 5678", "01012345678"),
+    ("+86 10 1234 5678", "01012345678"),
+    ("+86 21-6123-4567", "02161234567"),
+    ("+1 650-253-0000", "16502530000"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+def test_normalize_query():
+    assert normalize_query(" 8000 ") == "8000"
+    assert normalize_query("+86 138") == "138"
+    assert normalize_query("+86") == "86"
+    assert normalize_query("张三") == ""
+    assert normalize_query("138a") == ""
+    assert normalize_query("--") == ""
+
+
+def test_contact_numbers_cover_all_numbers():
+    full = {"id": "1", "phones": [{"number": "+86 138-0013-8000", "type": "手机"},
+                                  {"number": "138 0013 8000", "type": "工作"},
+                                  {"number": "010-12345678", "type": "住宅"}]}
+    assert sorted(contact_numbers(full)) == ["01012345678", "13800138000"]
+    assert contact_numbers({"id": "2", "phone": "139 0013 9000"}) == ("13900139000",)
+    assert contact_numbers({"id": "3", "phone": ""}) == ()
+
+
+def _brute_force(contacts, query):
+    """逐个联系人比较全部号码"""
+    digits = normalize_query(query)
+    return {contact["id"] for contact in contacts
+            if any(digits in number for number in contact_numbers(contact))}
+
+
+def _queries(contacts, rng, count=200):
+    """取号码中的任意一段，以及号码末尾4到8位"""
+    numbers = [number for contact in contacts for number in contact_numbers(contact)]
+    queries = []
+    for _ in range(count):
+        number = rng.choice(numbers)
+        start = rng.randrange(len(number))
+        queries.append(number[start:start + rng.randint(1, 8)])
+        queries.append(number[-rng.randint(4, 8):])
+    return queries + ["0000000000", "99999999999"]
+
+
+def test_search_matches_brute_force():
+    contacts = generate_contacts(1000, seed=3)
+    index = PhoneIndex()
+    assert index.search("8000") is None
+    index.rebuild(contacts)
+    rng = random.Random(3)
+    for query in _queries(contacts, rng, count=100):
+        assert index.search(query) == _brute_force(contacts, query), query
+
+
+def test_search_narrows_from_previous_query():
+    contacts = generate_contacts(500, seed=5)
+    index = PhoneIndex()
+    index.rebuild(contacts)
+    number = contact_numbers(next(c for c in contacts if contact_numbers(c)))[0]
+    # 逐位输入和回删，结果都与逐个比较一致
+    prefixes = [number[:size] for size in range(1, len(number) + 1)]
+    for query in prefixes + prefixes[::-1]:
+        assert index.search(query) == _brute_force(contacts, query), query
+
+
+def test_update_and_compact(monkeypatch):
+    monkeypatch.setattr(phone_index, "COMPACT_LIMIT", 20)
+    contacts = {contact["id"]: contact for contact in generate_contacts(300, seed=9)}
+    index = PhoneIndex()
+    index.rebuild(list(contacts.values()))
+
+    rng = random.Random(9)
+    ids = sorted(contacts)
+    for round_number in range(3):
+        # 增量修改号码、删除联系人，第三轮累计超过上限后整体重建
+        changed = []
+        for contact_id in rng.sample(ids, 8):
+            contact = dict(contacts[contact_id])
+            contact["phones"] = [{"number": f"+86 139 {round_number:04d} {rng.randrange(10000):04d}",
+                                  "type": "手机"}]
+            contacts[contact_id] = contact
+            changed.append(contact)
+        changed_ids = {contact["id"] for contact in changed}
+        deleted = rng.sample([contact_id for contact_id in ids
+                              if contact_id in contacts and contact_id not in changed_ids], 3)
+        for contact_id in deleted:
+            contacts.pop(contact_id)
+        index.update(changed, deleted)
+
+        current = list(contacts.values())
+        for query in _queries(current, rng, count=50) + [f"139{round_number:04d}"]:
+            assert index.search(query) == _brute_force(current, query), query
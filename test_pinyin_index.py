@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+拼音表和拼音索引的桌面测试
+运行：python -m pytest -q test_pinyin_index.py
+"""
+import pytest
+
+from pinyin_index import PinyinIndex, pinyin_keys
+from pinyin_table import char_pinyin, is_hanzi
+
+CONTACTS = [
+    {"id": "1", "name": "张三"},
+    {"id": "2", "name": "王长江"},
+    {"id": "3", "name": "翟志刚"},
+    {"id": "4", "name": "单田芳"},
+    {"id": "5", "name": "尉迟恭"},
+    {"id": "6", "name": "Tom 李"},
+    {"id": "7", "name": "张珊珊"},
+]
+
+
+def test_char_pinyin():
+    assert char_pinyin("张") == "zhang"
+    assert char_pinyin("绿") == "lv"
+    assert is_hanzi("國") and not is_hanzi("a") and not is_hanzi("，")
+
+
+def test_pinyin_keys():
+    assert pinyin_keys("张三") == {"zhangsan", "zs"}
+    # 名字中的多音字两种读音都保留
+    assert {"wcj", "wzj", "wangchangjiang", "wangzhangjiang"} <= pinyin_keys("王长江")
+    # 多音字姓氏同时保留姓氏读音和常用读音
+    assert {"zhaizhigang", "dizhigang", "zzg", "dzg"} <= pinyin_keys("翟志刚")
+    assert {"shantianfang", "stf"} <= pinyin_keys("单田芳")
+    assert {"yuchigong", "ycg"} <= pinyin_keys("尉迟恭")
+    assert pinyin_keys("Tom 李") == {"tomli", "tl"}
+    assert pinyin_keys("") == set()
+
+
+@pytest.fixture
+def pinyin():
+    index = PinyinIndex()
+    index.rebuild(CONTACTS)
+    return index
+
+
+def test_pinyin_search(pinyin):
+    assert pinyin.search("zs") == {"1", "7"}
+    assert pinyin.search("zhangs") == {"1", "7"}
+    assert pinyin.search("Zhang San") == {"1"}
+    assert pinyin.search("zhangshan") == {"7"}
+    assert pinyin.search("wcj") == pinyin.search("wzj") == {"2"}
+    assert pinyin.search("zhai") == pinyin.search("di") == {"3"}
+    assert pinyin.search("xyz") == set()
+    assert pinyin.search("张三") is None
+    assert PinyinIndex().search("zs") is None
+
+
+def test_update_narrows_results(pinyin):
+    assert pinyin.search("zs") == {"1", "7"}
+    # 改名和删除后，之前的查询结果随之缩小
+    pinyin.update([{"id": "1", "name": "李四"}], deleted_ids=["7"])
+    assert pinyin.search("zs") == set()
+    assert pinyin.search("ls") == {"1"}
+
+    pinyin.update([{"id": "8", "name": "周深"}])
+    assert pinyin.search("zs") == {"8"}
+    assert pinyin.search("zhou") == {"8"}
+    assert len(pinyin) == len(CONTACTS)
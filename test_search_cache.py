@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+搜索结果缓存的桌面测试
+运行：python -m pytest -q test_search_cache.py
+"""
+from search_cache import QueryCache
+
+
+def test_put_and_get():
+    cache = QueryCache()
+    version = cache.version
+    cache.put("zh", version, 0b101)
+    assert cache.get("zh") == 0b101
+    assert cache.get("zh", version) == 0b101
+    assert cache.get("zha") is None
+    assert len(cache) == 1
+
+
+def test_put_drops_results_computed_before_invalidate():
+    cache = QueryCache()
+    version = cache.version
+    cache.invalidate()
+    cache.put("zh", version, 0b101)
+    assert cache.get("zh") is None
+    assert len(cache) == 0
+
+
+def test_get_rejects_other_versions():
+    cache = QueryCache()
+    old_version = cache.version
+    cache.invalidate()
+    cache.put("zh", cache.version, 0b11, scanned=True)
+    # 过期的请求不能拿到按新列表计算的位图
+    assert cache.get("zh", old_version) is None
+    assert cache.narrowest("zhang", old_version) is None
+    assert cache.get("zh", cache.version) == 0b11
+
+
+def test_put_evicts_least_recently_used():
+    cache = QueryCache(size=2)
+    version = cache.version
+    cache.put("a", version, 1)
+    cache.put("b", version, 2)
+    cache.get("a")
+    cache.put("c", version, 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_narrowest_uses_longest_scanned_prefix():
+    cache = QueryCache()
+    version = cache.version
+    cache.put("z", version, 0b1111, scanned=True)
+    cache.put("zh", version, 0b0111, scanned=True)
+    # 只由索引得到的结果不是子串匹配的超集，不能作为候选集
+    cache.put("zha", version, 0b0001, scanned=False)
+    assert cache.narrowest("zhang", version) == 0b0111
+    assert cache.narrowest("zh", version) == 0b0111
+    assert cache.narrowest("li", version) is None
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+联系人搜索索引的桌面测试
+覆盖 trigram 与 LIKE 两种模式的子串查询、一两个字符的短查询，以及同步时间和缓存表在重新打开后保留；
+运行：python -m pytest -q test_search_index.py
+"""
+import sqlite3
+
+import pytest
+
+from search_index import ContactSearchIndex, MODE_LIKE, MODE_TRIGRAM
+
+CONTACTS = [
+    {
+        "id": "1",
+        "name": "张明华",
+        "company": "北京明华公司",
+        "phones": [{"number": "+86 138 0013 8000", "type": "手机"}],
+        "emails": [{"address": "minghua@example.com", "type": "工作"}],
+    },
+    {
+        "id": "2",
+        "name": "李四",
+        "company": "科技有限公司",
+        "phones": [{"number": "010-12345678", "type": "工作"}],
+        "emails": [],
+    },
+]
+
+
+def _open(tmp_path, mode=None):
+    path = str(tmp_path / "index.db")
+    if mode is not None:
+        # 预先写入模式，模拟不支持 trigram 的设备
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute("INSERT INTO meta VALUES ('mode', ?)", (mode,))
+        db.commit()
+        db.close()
+    index = ContactSearchIndex(path)
+    assert index.rebuild(CONTACTS, synced=1000)
+    return index
+
+
+@pytest.fixture
+def indexes(tmp_path):
+    """trigram 模式和 LIKE 模式的索引，内容相同"""
+    (tmp_path / "trigram").mkdir()
+    (tmp_path / "like").mkdir()
+    indexes = [_open(tmp_path / "trigram"), _open(tmp_path / "like", MODE_LIKE)]
+    yield indexes
+    for index in indexes:
+        index.close()
+
+
+def test_modes(indexes):
+    if indexes[0].mode != MODE_TRIGRAM:
+        pytest.skip("当前 SQLite 不支持 trigram")
+    assert [index.mode for index in indexes] == [MODE_TRIGRAM, MODE_LIKE]
+
+
+def test_mid_word_queries(indexes):
+    for index in indexes:
+        assert index.search("明华公") == ["1"]
+        assert index.search("有限公司") == ["2"]
+        assert index.search("0013") == ["1"]
+        assert index.search("1380013") == ["1"]
+        assert index.search("example.com") == ["1"]
+        assert index.search("不存在") == []
+
+
+def test_short_queries_match_name_and_company(indexes):
+    for index in indexes:
+        assert index.search("明") == ["1"]
+        assert index.search("科技") == ["2"]
+        assert index.search("李") == ["2"]
+
+
+def test_synced_and_documents_survive_reopen(tmp_path):
+    index = _open(tmp_path)
+    index.set_synced(2000)
+    index.close()
+
+    index = ContactSearchIndex(str(tmp_path / "index.db"))
+    assert index.ready
+    assert index.synced == 2000
+    documents = {document["id"]: document for document in index.documents()}
+    assert documents["1"]["phones"] == [{"number": "+86 138 0013 8000"}]
+    assert documents["1"]["emails"] == [{"address": "minghua@example.com"}]
+    assert documents["2"]["company"] == "科技有限公司"
+    index.close()
+
+
+def test_upsert_and_delete(tmp_path):
+    index = _open(tmp_path)
+    index.upsert([dict(CONTACTS[1], company="华为技术")])
+    assert index.search("华为") == ["2"]
+    assert index.search("科技") == []
+    index.delete(["1"])
+    assert index.search("明华") == []
+    index.close()
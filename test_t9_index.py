@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+T9 拨号盘索引的桌面测试
+运行：python -m pytest -q test_t9_index.py
+"""
+import pytest
+
+from t9_index import T9Index, t9_digits, t9_keys
+
+CONTACTS = [
+    {"id": "1", "name": "张三"},
+    {"id": "2", "name": "王长江"},
+    {"id": "3", "name": "翟志刚"},
+    {"id": "4", "name": "单田芳"},
+    {"id": "5", "name": "尉迟恭"},
+    {"id": "6", "name": "Tom 李"},
+    {"id": "7", "name": "张珊珊"},
+]
+
+
+def test_t9_keys():
+    assert t9_digits("zhangsan") == "94264726"
+    assert t9_keys("张三") == {"94264726", "97"}
+    assert {"925", "995"} <= t9_keys("王长江")
+
+
+@pytest.fixture
+def t9():
+    index = T9Index()
+    index.rebuild(CONTACTS)
+    return index
+
+
+def test_t9_search_narrows_while_typing(t9):
+    assert t9.search("9") == {"1", "2", "3", "5", "7"}
+    assert t9.search("97") == {"1", "7"}
+    assert t9.search("9426") == {"1", "7"}
+    assert t9.search("94264726") == {"1"}
+    # 回删后重新从整个索引查找
+    assert t9.search("92") == {"2", "5"}
+    assert t9.search("925") == {"2"}
+    assert t9.search("34") == {"3"}
+    assert t9.search("0") == set()
+    assert t9.search("zs") is None
+    assert T9Index().search("97") is None
+
+
+def test_update_narrows_results(t9):
+    assert t9.search("97") == {"1", "7"}
+    # 改名和删除后，之前的查询结果随之缩小
+    t9.update([{"id": "1", "name": "李四"}], deleted_ids=["7"])
+    assert t9.search("97") == set()
+    assert t9.search("57") == {"1"}
+
+    t9.update([{"id": "8", "name": "周深"}])
+    assert t9.search("9") == {"2", "3", "5", "8"}
+    assert t9.search("97") == {"8"}